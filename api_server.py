@@ -0,0 +1,308 @@
+"""JSON prediction API that runs beside the Streamlit UI.
+
+Concurrent requests for the same disease are collected for a short window and
+scored as one stacked array, so throughput is bounded by the model rather than
+by per-request overhead.
+
+    python api_server.py --port 8000 --max-batch-size 64 --max-wait-ms 5
+
+    POST /predict/<disease>   {"features": [...]} or {"features": {"Glucose": 148, ...}}
+                              or a binary block of rows (Content-Type: application/x-disease-matrix,
+                              see wire_format.py), scored in one call and answered in kind
+    GET  /stats               queue depth and batch-size histogram per disease
+    GET  /metrics             Prometheus text format (see metrics.py)
+    GET  /health
+    GET  /ready               200 once warm-up predictions have run, 503 before
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from batch_predict import score_block
+from disease_models import MODEL_FILES, MODELS_DIR, load_model
+from feature_schema import SCHEMAS
+from inference import sample_inputs
+from metrics import REGISTRY, timer
+from validation import validate
+from wire_format import CONTENT_TYPE, WireFormatError, decode, encode_response
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+REQUEST_TIMEOUT = 30.0
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class MicroBatcher:
+    """Collect single-row requests for one model and score them in stacked batches"""
+
+    def __init__(self, model, n_features, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.model = model
+        self.n_features = n_features
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self._batches = 0
+        self._requests = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        """Queue one feature row and return a Future resolving to (prediction, probability)"""
+        future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            X = np.empty((len(batch), self.n_features), dtype=np.float64)
+            for i, (row, _) in enumerate(batch):
+                X[i] = row
+            try:
+                predictions, probabilities, _ = score_block(self.model, X)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for i, (_, future) in enumerate(batch):
+                    future.set_result((int(predictions[i]), float(probabilities[i])))
+            self._record(len(batch))
+
+    def _record(self, size):
+        bucket = next((i for i, upper in enumerate(BATCH_SIZE_BUCKETS) if size <= upper),
+                      len(BATCH_SIZE_BUCKETS))
+        with self._lock:
+            self._histogram[bucket] += 1
+            self._batches += 1
+            self._requests += size
+
+    def stats(self):
+        """Queue depth and batch-size histogram for this model"""
+        with self._lock:
+            labels = [str(upper) for upper in BATCH_SIZE_BUCKETS] + ['+Inf']
+            return {
+                'queue_depth': self._queue.qsize(),
+                'batches': self._batches,
+                'requests': self._requests,
+                'mean_batch_size': self._requests / self._batches if self._batches else 0.0,
+                'batch_size_histogram': dict(zip(labels, self._histogram)),
+            }
+
+
+def parse_features(disease, features):
+    """Turn a JSON list (model order) or object (feature names or columns) into a float row"""
+    if not isinstance(features, (list, dict)):
+        raise ValueError("'features' must be a list or an object")
+    row = SCHEMAS[disease].pack(features)
+    report = validate(disease, row)
+    if not report.ok:
+        raise ValueError("; ".join(report.row_errors()))
+    return row
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """Routes /predict/<disease>, /stats and /health to the server's batchers"""
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'models': sorted(self.server.batchers)})
+        elif self.path == '/ready':
+            if self.server.ready:
+                self._send_json(200, {'status': 'ready'})
+            else:
+                self._send_json(503, {'status': 'warming up'})
+        elif self.path == '/stats':
+            self._send_json(200, {disease: batcher.stats() for disease, batcher in self.server.batchers.items()})
+        elif self.path == '/metrics':
+            body = REGISTRY.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        prefix = '/predict/'
+        if not self.path.startswith(prefix):
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+            return
+        disease = self.path[len(prefix):].strip('/')
+        if disease not in MODEL_FILES:
+            self._send_json(404, {'error': f"Unknown disease: {disease}"})
+            return
+        batcher = self.server.batchers.get(disease)
+        if batcher is None:
+            self._send_json(503, {'error': f"Model for {disease} is not available"})
+            return
+        if self.headers.get('Content-Type', '').split(';')[0].strip() == CONTENT_TYPE:
+            self._predict_matrix(disease, batcher.model)
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            row = parse_features(disease, payload.get('features'))
+        except (ValueError, TypeError, AttributeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        try:
+            with timer('api_predict', disease):
+                prediction, probability = batcher.submit(row).result(timeout=REQUEST_TIMEOUT)
+        except Exception as e:
+            self._send_json(500, {'error': f"Error making prediction: {e}"})
+            return
+        REGISTRY.inc('predictions_total', disease=disease, result=prediction)
+        self._send_json(200, {
+            'disease': disease,
+            'prediction': prediction,
+            'probability': None if np.isnan(probability) else probability,
+        })
+
+    def _predict_matrix(self, disease, model):
+        # A binary block is already a batch: score it directly instead of through the batcher
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            message_disease, X = decode(self.rfile.read(length))
+            if message_disease != disease:
+                raise WireFormatError(f"Message is for {message_disease}, posted to /predict/{disease}")
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        try:
+            with timer('api_predict_matrix', disease):
+                report = validate(disease, X)
+                predictions, probabilities, valid = score_block(model, report.X, report.row_valid)
+        except Exception as e:
+            self._send_json(500, {'error': f"Error making prediction: {e}"})
+            return
+        for result, count in zip(*np.unique(predictions[valid], return_counts=True)):
+            REGISTRY.inc('predictions_total', int(count), disease=disease, result=int(result))
+        body = encode_response(disease, predictions, probabilities, X.dtype)
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class PredictionServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog sized for bursts of concurrent clients"""
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def load_available_models(models_dir=MODELS_DIR):
+    """Every model that can be loaded, keyed by disease
+
+    A missing or unloadable model only takes its own disease offline.
+    """
+    models = {}
+    for disease in MODEL_FILES:
+        try:
+            models[disease] = load_model(disease, models_dir)
+        except FileNotFoundError:
+            print(f"Model file not found for {disease}, /predict/{disease} will return 503")
+        except Exception as e:
+            print(f"Could not load the {disease} model ({type(e).__name__}: {e}), "
+                  f"/predict/{disease} will return 503", file=sys.stderr)
+    return models
+
+
+def make_server(host='127.0.0.1', port=8000, models=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                max_wait_ms=DEFAULT_MAX_WAIT_MS, models_dir=MODELS_DIR, verbose=False, sock=None):
+    """Build a ThreadingHTTPServer with one MicroBatcher per available model
+
+    With sock, the server accepts on that already-listening socket (shared by
+    pre-forked workers) instead of binding host:port itself.
+    """
+    if models is None:
+        models = load_available_models(models_dir)
+    if sock is None:
+        server = PredictionServer((host, port), PredictionHandler)
+    else:
+        server = PredictionServer(sock.getsockname()[:2], PredictionHandler, bind_and_activate=False)
+        server.socket.close()
+        server.socket = sock
+    server.verbose = verbose
+    server.ready = False
+    server.batchers = {
+        disease: MicroBatcher(model, SCHEMAS[disease].n_features, max_batch_size, max_wait_ms)
+        for disease, model in models.items() if model is not None
+    }
+    for disease, batcher in server.batchers.items():
+        REGISTRY.gauge('api_queue_depth', batcher._queue.qsize, disease=disease)
+    return server
+
+
+def warm_up(server, rows=64):
+    """Push sample rows through every batcher, then mark the server ready"""
+    for disease, batcher in server.batchers.items():
+        futures = [batcher.submit(row) for row in sample_inputs(SCHEMAS[disease], rows)]
+        for future in futures:
+            future.result(timeout=REQUEST_TIMEOUT)
+    server.ready = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the disease models over HTTP with micro-batching")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="How long the first request in a batch waits for others")
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, max_batch_size=args.max_batch_size,
+                         max_wait_ms=args.max_wait_ms, models_dir=args.models_dir, verbose=args.verbose)
+    warm_up(server)
+    print(f"Serving {', '.join(sorted(server.batchers))} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
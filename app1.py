@@ -1,9 +1,23 @@
 import streamlit as st
-import pickle
-import pandas as pd
 import numpy as np
-from datetime import datetime
+from contextlib import nullcontext
+from functools import lru_cache
+from datetime import datetime, timedelta
+import hmac
 import json
+import os
+import uuid
+from disease_models import model_path
+from explain import contributions, explainable, top_features
+from feature_schema import SCHEMAS, SCHEMAS_BY_TITLE
+from history_store import from_env as history_store_from_env
+from metrics import REGISTRY, start_exporters_from_env, timed, timer
+from model_registry import from_env as model_registry_from_env
+from prediction_cache import from_env as prediction_cache_from_env
+from screening import SHARED_FIELDS, screen, shared_features
+from session_store import from_env as session_store_from_env
+from static_assets import image_source
+from validation import validate
 
 # Page configuration
 st.set_page_config(
@@ -14,7 +28,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -67,30 +81,67 @@ st.markdown("""
         margin: 0.5rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+with timer('render_css'):
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+def report_model_error(disease, error):
+    """Show a model loading failure in the page that first needed the model"""
+    if isinstance(error, FileNotFoundError):
+        st.error(f"Model file not found: {model_path(disease)}")
+    else:
+        st.error(f"Error loading {disease} model: {str(error)}")
 
-# Load models with error handling
+# Load models lazily: each disease model is read from the store on first use, and
+# the registry swaps in retrained versions (and A/B candidates) without a restart
 @st.cache_resource
+@timed('load_models')
 def load_models():
     """Load all disease prediction models"""
-    models = {}
-    model_files = {
-        'diabetes': 'Models/diabetes_model.sav',
-        'heart_disease': 'Models/heart_disease_model.sav',
-        'parkinsons': 'Models/parkinsons_model.sav',
-        'lung_cancer': 'Models/lungs_disease_model.sav',
-        'thyroid': 'Models/Thyroid_model.sav'
-    }
-    for disease, filepath in model_files.items():
-        try:
-            models[disease] = pickle.load(open(filepath, 'rb'))
-        except FileNotFoundError:
-            st.error(f"Model file not found: {filepath}")
-            models[disease] = None
-        except Exception as e:
-            st.error(f"Error loading {disease} model: {str(e)}")
-            models[disease] = None
-    return models
+    return model_registry_from_env(on_error=report_model_error)
+
+def session_key():
+    """Stable per-session key, so A/B routing keeps a user on one model version"""
+    return st.session_state.setdefault('model_route_key', uuid.uuid4().hex)
+
+# One result cache per server process; set PREDICTION_CACHE_DB to share hits between workers
+@st.cache_resource
+def load_prediction_cache():
+    """Create the prediction result cache"""
+    return prediction_cache_from_env()
+
+# Metrics scrape endpoint ($METRICS_PORT) and/or textfile ($METRICS_FILE), started once per process
+@st.cache_resource
+def start_metrics():
+    """Start the metrics exporters and publish the cache counters as gauges"""
+    cache = load_prediction_cache()
+    for name in ('hits', 'shared_hits', 'misses', 'evictions', 'entries'):
+        REGISTRY.gauge(f"prediction_cache_{name}", lambda name=name: cache.stats()[name])
+    sessions = load_session_store()
+    for name in ('handles', 'evictions'):
+        REGISTRY.gauge(f"session_{name}", lambda name=name: sessions.stats()[name])
+    return start_exporters_from_env()
+
+# Prediction history lives in SQLite (PREDICTION_HISTORY_DB), shared by all sessions
+@st.cache_resource
+def load_history_store():
+    """Open the prediction history store"""
+    return history_store_from_env()
+
+# Each session keeps a handle with its last few results; the rest is in sharded SQLite (SESSION_STORE_DIR)
+@st.cache_resource
+def load_session_store():
+    """Open the per-session result store"""
+    return session_store_from_env()
+
+def session_handle():
+    """This session's handle in the session store"""
+    return load_session_store().handle(session_key())
+
+HISTORY_PAGE_SIZE = 25
+# Unlocks the all-users history dashboard and its Clear All button; unset, nobody can clear other users' history
+HISTORY_ADMIN_ENV = 'HISTORY_ADMIN_TOKEN'
+SCREENING_TITLE = 'Full Screening'
 
 # Disease information database
 DISEASE_INFO = {
@@ -118,6 +169,12 @@ DISEASE_INFO = {
         'prevention': ['No smoking', 'Avoid secondhand smoke', 'Test home for radon', 'Healthy diet'],
         'icon': '🫁'
     },
+    'Full Screening': {
+        'description': 'Screen one patient against all five models at once. Shared fields such as age and sex are entered only once.',
+        'risk_factors': ['See the individual disease pages for details'],
+        'prevention': ['Regular check-ups', 'Healthy diet', 'Regular exercise', 'No smoking'],
+        'icon': '🩻'
+    },
     'Hypo-Thyroid Prediction': {
         'description': 'Hypothyroidism is a condition where the thyroid gland doesn\'t produce enough thyroid hormone.',
         'risk_factors': ['Autoimmune disease', 'Family history', 'Age over 60', 'Gender (women more likely)'],
@@ -151,28 +208,19 @@ def create_input_field(label, help_text, key, input_type="number", min_val=0, ma
             st.info(f"Range: {min_val}-{max_val if max_val else '∞'}")
     return value
 
-def display_disease_info(disease_name):
-    """Display disease information card"""
+# HTML fragments depend only on their arguments, so each is built once per process
+@lru_cache(maxsize=None)
+def disease_card_html(disease_name):
     info = DISEASE_INFO.get(disease_name, {})
-    st.markdown(f"""
+    return f"""
     <div class="disease-card">
         <h3>{info.get('icon', '🏥')} {disease_name}</h3>
         <p>{info.get('description', 'No description available.')}</p>
     </div>
-    """, unsafe_allow_html=True)
-    col1, col2 = st.columns(2)
-    with col1:
-        st.subheader("🚨 Risk Factors")
-        for factor in info.get('risk_factors', []):
-            st.write(f"• {factor}")
-    with col2:
-        st.subheader("🛡️ Prevention Tips")
-        for tip in info.get('prevention', []):
-            st.write(f"• {tip}")
+    """
 
-def display_prediction_result(prediction, disease_name):
-    """Display prediction results with styling"""
-    is_positive = prediction[0] == 1
+@lru_cache(maxsize=None)
+def prediction_result_html(is_positive, disease_name):
     if is_positive:
         result_class = "positive-result"
         result_text = f"⚠️ High Risk: The model predicts a higher likelihood of {disease_name.lower()}"
@@ -181,62 +229,169 @@ def display_prediction_result(prediction, disease_name):
         result_class = "negative-result"
         result_text = f"✅ Low Risk: The model predicts a lower likelihood of {disease_name.lower()}"
         recommendation = "Continue maintaining a healthy lifestyle and regular check-ups."
-
-    st.markdown(f"""
+    result = f"""
     <div class="prediction-result {result_class}">
         {result_text}
     </div>
-    """, unsafe_allow_html=True)
-
-    st.markdown(f"""
+    """
+    advice = f"""
     <div class="info-box">
         <strong>Recommendation:</strong> {recommendation}
         <br><br>
         <strong>Disclaimer:</strong> This prediction is for informational purposes only and should not replace professional medical advice, diagnosis, or treatment.
     </div>
-    """, unsafe_allow_html=True)
-
-def save_prediction_history(disease, inputs, prediction, timestamp):
-    """Save prediction to session state history"""
-    if 'prediction_history' not in st.session_state:
-        st.session_state.prediction_history = []
-    history_entry = {
-        'disease': disease,
-        'inputs': inputs,
-        'prediction': int(prediction[0]),
-        'timestamp': timestamp
-    }
-    st.session_state.prediction_history.append(history_entry)
+    """
+    return result, advice
 
+def display_disease_info(disease_name):
+    """Display disease information card"""
+    info = DISEASE_INFO.get(disease_name, {})
+    st.markdown(disease_card_html(disease_name), unsafe_allow_html=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("🚨 Risk Factors")
+        for factor in info.get('risk_factors', []):
+            st.write(f"• {factor}")
+    with col2:
+        st.subheader("🛡️ Prevention Tips")
+        for tip in info.get('prevention', []):
+            st.write(f"• {tip}")
+
+def display_prediction_result(prediction, disease_name, probability=None):
+    """Display prediction results with styling"""
+    result, advice = prediction_result_html(bool(prediction[0] == 1), disease_name)
+    st.markdown(result, unsafe_allow_html=True)
+    if probability is not None:
+        st.progress(float(probability), text=f"Estimated risk: {probability:.0%}")
+    st.markdown(advice, unsafe_allow_html=True)
+
+def display_explanation(schema, model, row, top=5):
+    """List the inputs that moved this prediction the most"""
+    if not explainable(model):
+        return
+    contrib, _ = contributions(model, row)
+    with st.expander("🔍 What drove this prediction"):
+        for label, value in top_features(schema, contrib[0], top):
+            if round(value, 2) == 0:
+                st.markdown(f"- **{label}** has little effect on the risk score")
+            else:
+                direction = "raises" if value > 0 else "lowers"
+                st.markdown(f"- **{label}** {direction} the risk score ({value:+.2f})")
+        st.caption("Contributions to the model's score, relative to the average patient in its "
+                   "training data; positive values push towards High Risk.")
+
+def save_prediction_history(disease, inputs, prediction, timestamp, model_version=None):
+    """Queue a prediction for the history store and this session's recent results"""
+    load_history_store().append(disease, inputs, prediction[0], timestamp, model_version)
+    session_handle().record(disease, prediction[0], timestamp, model_version)
+
+def is_history_admin():
+    """Whether this session entered the $HISTORY_ADMIN_TOKEN in the sidebar"""
+    token = os.environ.get(HISTORY_ADMIN_ENV)
+    if not token:
+        return False
+    entered = st.sidebar.text_input("History admin token", type="password", key='history_admin_token')
+    return bool(entered) and hmac.compare_digest(entered.encode(), token.encode())
+
+@timed('display_history')
 def display_prediction_history():
-    """Display prediction history"""
-    if 'prediction_history' not in st.session_state or not st.session_state.prediction_history:
+    """Display this session's prediction history one page at a time"""
+    # pandas is only needed here; importing it lazily keeps it off the startup path
+    import pandas as pd
+
+    # Only this session's results: other visitors' predictions are never listed
+    sessions = load_session_store()
+    session = session_key()
+    counts = sessions.counts(session)
+    if not counts['total']:
         st.info("No previous predictions found.")
+    else:
+        st.subheader("📊 Your Prediction History")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Predictions", counts['total'])
+        with col2:
+            st.metric("Positive Results", counts['positive'])
+        with col3:
+            st.metric("Negative Results", counts['negative'])
+
+        # Keyset pagination: each page starts below the last id of the previous one
+        cursors = st.session_state.setdefault('history_cursors', [None])
+        rows = sessions.entries(session, HISTORY_PAGE_SIZE + 1, before_id=cursors[-1])
+        has_older = len(rows) > HISTORY_PAGE_SIZE
+        rows = rows[:HISTORY_PAGE_SIZE]
+        if rows:
+            display_df = pd.DataFrame(rows, columns=['timestamp', 'disease', 'prediction', 'model_version'])
+            display_df['result'] = display_df.pop('prediction').map({1: 'Positive', 0: 'Negative'})
+            # Stored ISO timestamps only need trimming to minutes
+            display_df['timestamp'] = display_df['timestamp'].str.slice(0, 16).str.replace('T', ' ')
+            st.dataframe(display_df, use_container_width=True)
+
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("⬅️ Newer", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            st.caption(f"Page {len(cursors)} of {-(-counts['total'] // HISTORY_PAGE_SIZE)}")
+        with col3:
+            if st.button("Older ➡️", disabled=not has_older):
+                cursors.append(rows[-1]['id'])
+                st.rerun()
+
+        # Clears this session's results only
+        if st.button("🗑️ Clear My History"):
+            sessions.clear(session)
+            st.session_state.history_cursors = [None]
+            st.rerun()
+
+    if is_history_admin():
+        display_history_overview()
+
+def display_history_overview():
+    """All-users aggregates, drift and the global clear, for history admins"""
+    import pandas as pd
+
+    store = load_history_store()
+    store.flush()
+    counts = store.counts()
+    st.markdown("---")
+    st.subheader("🛡️ All Users (admin)")
+    if not counts['total']:
+        st.info("No predictions recorded yet.")
         return
 
-    st.subheader("📊 Prediction History")
-    history_df = pd.DataFrame(st.session_state.prediction_history)
-    history_df['result'] = history_df['prediction'].map({1: 'Positive', 0: 'Negative'})
-
-    # Summary statistics
-    col1, col2, col3 = st.columns(3)
+    # Summary statistics, read from the running aggregates
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Predictions", len(history_df))
+        st.metric("Total Predictions", counts['total'])
     with col2:
-        positive_count = (history_df['prediction'] == 1).sum()
-        st.metric("Positive Results", positive_count)
+        st.metric("Positive Results", counts['positive'])
     with col3:
-        negative_count = (history_df['prediction'] == 0).sum()
-        st.metric("Negative Results", negative_count)
-
-    # Display history table
-    display_df = history_df[['timestamp', 'disease', 'result']].copy()
-    display_df['timestamp'] = pd.to_datetime(display_df['timestamp']).dt.strftime('%Y-%m-%d %H:%M')
-    st.dataframe(display_df, use_container_width=True)
-
-    # Clear history button
-    if st.button("🗑️ Clear History"):
-        st.session_state.prediction_history = []
+        st.metric("Negative Results", counts['negative'])
+    with col4:
+        st.metric("7-Day Positive Rate", f"{store.positive_rate():.0%}")
+
+    with st.expander("📈 Trends"):
+        by_disease = pd.DataFrame.from_dict(store.counts_by_disease(), orient='index')
+        st.dataframe(by_disease, use_container_width=True)
+        daily = pd.DataFrame(store.rollups('day', start=datetime.now() - timedelta(days=30)))
+        if not daily.empty:
+            st.line_chart(daily.set_index('bucket')[['total', 'positive']])
+
+    # Input drift against the training data, from the sketches kept by the history writer
+    drift = store.drift_report(days=30)
+    if drift:
+        with st.expander("📉 Input Drift (last 30 days)"):
+            for disease, features in drift.items():
+                st.caption(f"{SCHEMAS[disease].title}: {features[0]['rows']} inputs, "
+                           f"largest PSI {features[0]['psi']:.2f} ({features[0]['status']})")
+                st.dataframe(pd.DataFrame(features[:5])[['label', 'psi', 'ks', 'status', 'mean', 'reference_mean']],
+                             use_container_width=True)
+
+    # Deletes every user's history, rollups and drift sketches
+    if st.button("🗑️ Clear All History"):
+        store.clear()
         st.rerun()
 
 # Main App
@@ -246,29 +401,29 @@ def main():
 
     # Load models
     models = load_models()
+    start_metrics()
 
     # Sidebar
     with st.sidebar:
-        st.image("https://img.icons8.com/fluency/96/000000/health-checkup.png", width=80)
+        st.image(image_source('health_checkup_icon'), width=80)
         st.title("Navigation")
         selected = st.selectbox(
             'Select Disease Prediction',
-            [
-                'Diabetes Prediction',
-                'Heart Disease Prediction',
-                'Parkinsons Prediction',
-                'Lung Cancer Prediction',
-                'Hypo-Thyroid Prediction'
-            ]
+            list(SCHEMAS_BY_TITLE) + [SCREENING_TITLE]
         )
         st.markdown("---")
         # Quick stats
         st.subheader("📈 Quick Stats")
-        if 'prediction_history' in st.session_state:
-            total_predictions = len(st.session_state.prediction_history)
-            st.metric("Total Predictions", total_predictions)
-        else:
-            st.metric("Total Predictions", 0)
+        st.metric("Total Predictions", load_session_store().counts(session_key())['total'])
+        cache_stats = load_prediction_cache().stats()
+        st.caption(f"Cache: {cache_stats['hits'] + cache_stats['shared_hits']} hits, "
+                   f"{cache_stats['misses']} misses, {cache_stats['evictions']} evictions")
+        recent = session_handle().recent(5)
+        if recent:
+            st.subheader("🕘 Your Recent Results")
+            for entry in recent:
+                result = 'Positive' if entry['prediction'] == 1 else 'Negative'
+                st.caption(f"{entry['timestamp'][11:16]} · {entry['disease']}: {result}")
         st.markdown("---")
         # Show history toggle
         show_history = st.checkbox("📊 Show Prediction History")
@@ -281,213 +436,110 @@ def main():
         display_disease_info(selected)
         st.markdown("---")
 
-        # Disease-specific prediction forms
-        if selected == 'Diabetes Prediction' and models['diabetes']:
-            diabetes_prediction(models['diabetes'])
-        elif selected == 'Heart Disease Prediction' and models['heart_disease']:
-            heart_disease_prediction(models['heart_disease'])
-        elif selected == 'Parkinsons Prediction' and models['parkinsons']:
-            parkinsons_prediction(models['parkinsons'])
-        elif selected == 'Lung Cancer Prediction' and models['lung_cancer']:
-            lung_cancer_prediction(models['lung_cancer'])
-        elif selected == 'Hypo-Thyroid Prediction' and models['thyroid']:
-            thyroid_prediction(models['thyroid'])
+        # Disease-specific prediction forms, generated from the schema registry
+        if selected == SCREENING_TITLE:
+            full_screening(models)
+            return
+        schema = SCHEMAS_BY_TITLE[selected]
+        model, version = models.route(schema.disease, session_key())
+        if model:
+            disease_prediction(schema, model, version)
         else:
             st.error(f"Model for {selected} is not available. Please check the model file.")
 
-def diabetes_prediction(model):
-    st.subheader("🩺 Diabetes Risk Assessment")
-    col1, col2 = st.columns(2)
-    with col1:
-        pregnancies = create_input_field('Number of Pregnancies', 'Number of times pregnant', 'pregnancies', max_val=20)
-        glucose = create_input_field('Glucose Level (mg/dL)', 'Plasma glucose concentration', 'glucose', max_val=300)
-        blood_pressure = create_input_field('Blood Pressure (mm Hg)', 'Diastolic blood pressure', 'blood_pressure', max_val=200)
-        skin_thickness = create_input_field('Skin Thickness (mm)', 'Triceps skinfold thickness', 'skin_thickness', max_val=100)
-    with col2:
-        insulin = create_input_field('Insulin Level (μU/mL)', '2-Hour serum insulin', 'insulin', max_val=1000)
-        bmi = create_input_field('BMI', 'Body mass index (weight in kg/(height in m)^2)', 'bmi', max_val=70.0, step=0.1)  # Fixed type
-        dpf = create_input_field('Diabetes Pedigree Function', 'Diabetes pedigree function score', 'dpf', max_val=5.0, step=0.01)
-        age = create_input_field('Age (years)', 'Age of the person', 'age', max_val=120)
-
-    if st.button('🔍 Predict Diabetes Risk', type="primary"):
+def create_feature_input(schema, feature, key_prefix=''):
+    """Render the widget declared for a feature in the schema registry"""
+    key = key_prefix + schema.key(feature)
+    if feature.widget == 'select':
+        return st.selectbox(feature.label, list(feature.codes), format_func=feature.option_label, key=key)
+    return create_input_field(feature.label, feature.help, key,
+                              min_val=feature.min, max_val=feature.max, step=feature.step)
+
+def render_feature_form(schema):
+    """Render a disease's input form from its schema and return the values in model order"""
+    values = []
+    for section, columns in schema.sections():
+        container = st.expander(section.title, expanded=section.expanded) if section.title else nullcontext()
+        with container:
+            for col, features in zip(st.columns(len(columns)), columns):
+                with col:
+                    values.extend(create_feature_input(schema, feature) for feature in features)
+    return values
+
+@timed('prediction', disease=lambda schema, *_: schema.disease)
+def disease_prediction(schema, model, version=None):
+    st.subheader(schema.header)
+    if schema.note:
+        st.info(schema.note)
+    with timer('render_form', schema.disease):
+        values = render_feature_form(schema)
+
+    if st.button(schema.button, type="primary"):
         try:
-            input_data = [pregnancies, glucose, blood_pressure, skin_thickness, insulin, bmi, dpf, age]
-            if any(val is None or val < 0 for val in input_data):
-                st.error("Please fill in all fields with valid non-negative values.")
+            input_data = schema.pack(values, out=schema.row_buffer())
+            report = validate(schema.disease, input_data)
+            if not report.ok:
+                st.error("Please correct the following fields: " + "; ".join(report.row_errors()))
                 return
-            prediction = model.predict([input_data])
+            with timer('predict', schema.disease):
+                label, probability = load_prediction_cache().predict(schema, model, input_data)
+            prediction = np.array([label])
+            REGISTRY.inc('predictions_total', disease=schema.disease, result=label)
             timestamp = datetime.now().isoformat()
-            save_prediction_history('Diabetes', input_data, prediction, timestamp)
-            display_prediction_result(prediction, 'Diabetes')
+            save_prediction_history(schema.history_name, input_data.tolist(), prediction, timestamp, version)
+            with timer('display_result', schema.disease):
+                display_prediction_result(prediction, schema.result_name, probability)
+                display_explanation(schema, model, input_data)
         except Exception as e:
             st.error(f"Error making prediction: {str(e)}")
 
-def heart_disease_prediction(model):
-    st.subheader("❤️ Heart Disease Risk Assessment")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        age = create_input_field('Age (years)', 'Age of the person', 'hd_age', max_val=120)
-        sex = st.selectbox('Gender', [0, 1], format_func=lambda x: 'Female' if x == 0 else 'Male', key='hd_sex')
-        cp = st.selectbox('Chest Pain Type', [0, 1, 2, 3],
-                         format_func=lambda x: ['Typical Angina', 'Atypical Angina', 'Non-anginal Pain', 'Asymptomatic'][x],
-                         key='hd_cp')
-        trestbps = create_input_field('Resting Blood Pressure (mm Hg)', 'Resting blood pressure', 'hd_trestbps', max_val=250)
-        chol = create_input_field('Cholesterol (mg/dL)', 'Serum cholesterol', 'hd_chol', max_val=600)
-    with col2:
-        fbs = st.selectbox('Fasting Blood Sugar > 120 mg/dl', [0, 1],
-                          format_func=lambda x: 'No' if x == 0 else 'Yes', key='hd_fbs')
-        restecg = st.selectbox('Resting ECG', [0, 1, 2],
-                              format_func=lambda x: ['Normal', 'ST-T Wave Abnormality', 'Left Ventricular Hypertrophy'][x],
-                              key='hd_restecg')
-        thalach = create_input_field('Max Heart Rate', 'Maximum heart rate achieved', 'hd_thalach', max_val=250)
-        exang = st.selectbox('Exercise Induced Angina', [0, 1],
-                            format_func=lambda x: 'No' if x == 0 else 'Yes', key='hd_exang')
-    with col3:
-        oldpeak = create_input_field('ST Depression', 'ST depression induced by exercise', 'hd_oldpeak', max_val=10.0, step=0.1)
-        slope = st.selectbox('Slope of Peak Exercise ST', [0, 1, 2],
-                            format_func=lambda x: ['Upsloping', 'Flat', 'Downsloping'][x],
-                            key='hd_slope')
-        ca = create_input_field('Major Vessels (0-3)', 'Number of major vessels colored by fluoroscopy', 'hd_ca', max_val=3)
-        thal = st.selectbox('Thalassemia', [0, 1, 2],
-                           format_func=lambda x: ['Normal', 'Fixed Defect', 'Reversible Defect'][x],
-                           key='hd_thal')
-
-    if st.button('🔍 Predict Heart Disease Risk', type="primary"):
-        try:
-            input_data = [age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal]
-            prediction = model.predict([input_data])
-            timestamp = datetime.now().isoformat()
-            save_prediction_history('Heart Disease', input_data, prediction, timestamp)
-            display_prediction_result(prediction, 'Heart Disease')
-        except Exception as e:
-            st.error(f"Error making prediction: {str(e)}")
-
-def parkinsons_prediction(model):
-    st.subheader("🧠 Parkinson's Disease Risk Assessment")
-    st.info("This assessment uses voice measurement data. Please consult with a healthcare professional for proper voice analysis.")
-
-    with st.expander("📊 Fundamental Frequency Measures", expanded=True):
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            fo = create_input_field('MDVP:Fo(Hz)', 'Average vocal fundamental frequency', 'pk_fo', max_val=300.0, step=0.01)
-        with col2:
-            fhi = create_input_field('MDVP:Fhi(Hz)', 'Maximum vocal fundamental frequency', 'pk_fhi', max_val=600.0, step=0.01)
-        with col3:
-            flo = create_input_field('MDVP:Flo(Hz)', 'Minimum vocal fundamental frequency', 'pk_flo', max_val=300.0, step=0.01)
-
-    with st.expander("📈 Jitter Measures"):
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            jitter_percent = create_input_field('Jitter (%)', 'Jitter percentage', 'pk_jitter_percent', max_val=10.0, step=0.001)
-        with col2:
-            jitter_abs = create_input_field('Jitter (Abs)', 'Absolute jitter', 'pk_jitter_abs', max_val=1.0, step=0.00001)
-        with col3:
-            rap = create_input_field('RAP', 'Relative average perturbation', 'pk_rap', max_val=1.0, step=0.001)
-        with col4:
-            ppq = create_input_field('PPQ', 'Period perturbation quotient', 'pk_ppq', max_val=1.0, step=0.001)
-    ddp = create_input_field('Jitter:DDP', 'Jitter DDP', 'pk_ddp', max_val=1.0, step=0.001)
-
-    with st.expander("📉 Shimmer Measures"):
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            shimmer = create_input_field('Shimmer', 'Shimmer', 'pk_shimmer', max_val=1.0, step=0.001)
-            shimmer_db = create_input_field('Shimmer (dB)', 'Shimmer in dB', 'pk_shimmer_db', max_val=10.0, step=0.01)
-        with col2:
-            apq3 = create_input_field('APQ3', 'Amplitude perturbation quotient 3', 'pk_apq3', max_val=1.0, step=0.001)
-            apq5 = create_input_field('APQ5', 'Amplitude perturbation quotient 5', 'pk_apq5', max_val=1.0, step=0.001)
-        with col3:
-            apq = create_input_field('APQ', 'Amplitude perturbation quotient', 'pk_apq', max_val=1.0, step=0.001)
-            dda = create_input_field('DDA', 'Difference of differences of amplitudes', 'pk_dda', max_val=1.0, step=0.001)
-
-    with st.expander("🎵 Harmonic Measures"):
-        col1, col2 = st.columns(2)
-        with col1:
-            nhr = create_input_field('NHR', 'Noise-to-harmonics ratio', 'pk_nhr', max_val=1.0, step=0.001)
-        with col2:
-            hnr = create_input_field('HNR', 'Harmonics-to-noise ratio', 'pk_hnr', max_val=50.0, step=0.01)
-
-    with st.expander("🔬 Nonlinear Dynamical Complexity Measures"):
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            rpde = create_input_field('RPDE', 'Recurrence period density entropy', 'pk_rpde', max_val=1.0, step=0.001)
-            dfa = create_input_field('DFA', 'Detrended fluctuation analysis', 'pk_dfa', max_val=1.0, step=0.001)
-        with col2:
-            spread1 = create_input_field('Spread1', 'Nonlinear measure of fundamental frequency variation', 'pk_spread1', min_val=-10.0, max_val=0.0, step=0.001)
-            spread2 = create_input_field('Spread2', 'Nonlinear measure of fundamental frequency variation', 'pk_spread2', max_val=1.0, step=0.001)
-        with col3:
-            d2 = create_input_field('D2', 'Correlation dimension', 'pk_d2', max_val=10.0, step=0.001)
-            ppe = create_input_field('PPE', 'Pitch period entropy', 'pk_ppe', max_val=1.0, step=0.001)
-
-    if st.button('🔍 Predict Parkinson\'s Risk', type="primary"):
-        try:
-            input_data = [fo, fhi, flo, jitter_percent, jitter_abs, rap, ppq, ddp, shimmer, shimmer_db,
-                         apq3, apq5, apq, dda, nhr, hnr, rpde, dfa, spread1, spread2, d2, ppe]
-            prediction = model.predict([input_data])
-            timestamp = datetime.now().isoformat()
-            save_prediction_history('Parkinsons', input_data, prediction, timestamp)
-            display_prediction_result(prediction, 'Parkinson\'s Disease')
-        except Exception as e:
-            st.error(f"Error making prediction: {str(e)}")
-
-def lung_cancer_prediction(model):
-    st.subheader("🫁 Lung Cancer Risk Assessment")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        gender = st.selectbox('Gender', [0, 1], format_func=lambda x: 'Female' if x == 0 else 'Male', key='lc_gender')
-        age = create_input_field('Age (years)', 'Age of the person', 'lc_age', max_val=120)
-        smoking = st.selectbox('Smoking History', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='lc_smoking')
-        yellow_fingers = st.selectbox('Yellow Fingers', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='lc_yellow_fingers')
-        anxiety = st.selectbox('Anxiety', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='lc_anxiety')
-    with col2:
-        peer_pressure = st.selectbox('Peer Pressure', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='lc_peer_pressure')
-        chronic_disease = st.selectbox('Chronic Disease', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='lc_chronic_disease')
-        fatigue = st.selectbox('Fatigue', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='lc_fatigue')
-        allergy = st.selectbox('Allergy', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='lc_allergy')
-        wheezing = st.selectbox('Wheezing', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='lc_wheezing')
-    with col3:
-        alcohol_consuming = st.selectbox('Alcohol Consumption', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='lc_alcohol')
-        coughing = st.selectbox('Coughing', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='lc_coughing')
-        shortness_of_breath = st.selectbox('Shortness of Breath', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='lc_shortness')
-        swallowing_difficulty = st.selectbox('Swallowing Difficulty', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='lc_swallowing')
-        chest_pain = st.selectbox('Chest Pain', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='lc_chest_pain')
-
-    if st.button('🔍 Predict Lung Cancer Risk', type="primary"):
-        try:
-            input_data = [gender, age, smoking, yellow_fingers, anxiety, peer_pressure, chronic_disease,
-                         fatigue, allergy, wheezing, alcohol_consuming, coughing, shortness_of_breath,
-                         swallowing_difficulty, chest_pain]
-            prediction = model.predict([input_data])
-            timestamp = datetime.now().isoformat()
-            save_prediction_history('Lung Cancer', input_data, prediction, timestamp)
-            display_prediction_result(prediction, 'Lung Cancer')
-        except Exception as e:
-            st.error(f"Error making prediction: {str(e)}")
-
-def thyroid_prediction(model):
-    st.subheader("🦋 Thyroid Disease Risk Assessment")
-    col1, col2 = st.columns(2)
-    with col1:
-        age = create_input_field('Age (years)', 'Age of the person', 'th_age', max_val=120)
-        sex = st.selectbox('Gender', [0, 1], format_func=lambda x: 'Female' if x == 0 else 'Male', key='th_sex')
-        on_thyroxine = st.selectbox('On Thyroxine Medication', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='th_on_thyroxine')
-        tsh = create_input_field('TSH Level (mU/L)', 'Thyroid Stimulating Hormone level', 'th_tsh', max_val=100.0, step=0.01)
-    with col2:
-        t3_measured = st.selectbox('T3 Measured', [0, 1], format_func=lambda x: 'No' if x == 0 else 'Yes', key='th_t3_measured')
-        t3 = create_input_field('T3 Level (ng/dL)', 'Triiodothyronine level', 'th_t3', max_val=10.0, step=0.01)
-        tt4 = create_input_field('TT4 Level (μg/dL)', 'Total thyroxine level', 'th_tt4', max_val=30.0, step=0.1)
-
-    if st.button('🔍 Predict Thyroid Disease Risk', type="primary"):
-        try:
-            input_data = [age, sex, on_thyroxine, tsh, t3_measured, t3, tt4]
-            if any(val is None or val < 0 for val in input_data):
-                st.error("Please fill in all fields with valid non-negative values.")
-                return
-            prediction = model.predict([input_data])
-            timestamp = datetime.now().isoformat()
-            save_prediction_history('Hypo-Thyroid', input_data, prediction, timestamp)
-            display_prediction_result(prediction, 'Hypothyroidism')
-        except Exception as e:
-            st.error(f"Error making prediction: {str(e)}")
+@timed('screening')
+def full_screening(models):
+    """One combined form for all five diseases, scored concurrently"""
+    st.subheader("🩻 Full Screening")
+    st.info("Enter the shared fields once. Leave a disease unchecked to skip it.")
+    shared_schemas = {'age': SCHEMAS['diabetes'], 'sex': SCHEMAS['heart_disease']}
+    record = {}
+    for col, field in zip(st.columns(len(SHARED_FIELDS)), SHARED_FIELDS):
+        schema = shared_schemas[field]
+        with col:
+            record[field] = create_feature_input(schema, schema.features[schema.names.index(field)], 'scr_')
+
+    diseases = []
+    for schema in SCHEMAS.values():
+        with st.expander(schema.header):
+            if st.checkbox(f"Include {schema.result_name}", value=True, key=f"scr_include_{schema.disease}"):
+                diseases.append(schema.disease)
+            shared = shared_features(schema.disease)
+            features = [f for f in schema.features if f.name not in shared]
+            values = {}
+            for i, col in enumerate(st.columns(3)):
+                with col:
+                    for feature in features[i::3]:
+                        values[feature.name] = create_feature_input(schema, feature, 'scr_')
+            record[schema.disease] = values
+
+    if st.button("🔍 Run Full Screening", type="primary", disabled=not diseases):
+        cache = load_prediction_cache()
+        routed = {disease: models.route(disease, session_key()) for disease in diseases}
+        report = screen(record, {d: model for d, (model, _) in routed.items()}, diseases, score=cache.predict)
+        timestamp = datetime.now().isoformat()
+        for disease, result in report['results'].items():
+            schema = SCHEMAS[disease]
+            if result['status'] == 'ok':
+                prediction = np.array([result['prediction']])
+                REGISTRY.inc('predictions_total', disease=disease, result=result['prediction'])
+                save_prediction_history(schema.history_name, result['inputs'], prediction, timestamp,
+                                        routed[disease][1])
+                display_prediction_result(prediction, schema.result_name, result['probability'])
+                display_explanation(schema, routed[disease][0], np.asarray(result['inputs']))
+            elif result['status'] == 'invalid':
+                st.error(f"{schema.result_name}: please correct " + "; ".join(result['errors']))
+            elif result['status'] == 'unavailable':
+                st.error(f"{schema.result_name}: model is not available.")
+            else:
+                st.error(f"{schema.result_name}: {result.get('error', result['status'])}")
+        st.caption(f"Screened {len(diseases)} models in {report['seconds'] * 1000:.1f} ms")
 
 # Run the app
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+"""Headless batch scoring of CSV/Parquet extracts.
+
+Streams the input file in chunks, maps its columns onto the feature order of
+the selected model and scores every chunk as a single NumPy block. With
+--explain, each row also gets one contrib_<feature> column per input (see
+explain.py).
+
+    python batch_predict.py patients.csv --disease heart_disease -o scored.csv
+"""
+import argparse
+import json
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from disease_models import MODEL_FILES, MODELS_DIR, load_model
+from explain import contribution_columns, contributions
+from feature_schema import SCHEMAS
+from inference import PRECISIONS
+from validation import summarize, validate
+
+DEFAULT_CHUNKSIZE = 50000
+
+
+def file_format(path):
+    """Infer 'csv' or 'parquet' from a file extension"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.parquet', '.pq'):
+        return 'parquet'
+    if ext in ('.csv', '.txt', '.gz'):
+        return 'csv'
+    raise ValueError(f"Unsupported file type: {path}")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet support requires pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrame chunks from a CSV or Parquet file without loading it whole"""
+    if file_format(path) == 'csv':
+        yield from pd.read_csv(path, chunksize=chunksize)
+    else:
+        pa = _require_pyarrow()
+        parquet_file = pa.parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+
+
+def score_block(model, X, valid=None):
+    """Score a 2-D float64 block, leaving rows that are not valid (default: not finite) unscored"""
+    n_rows = X.shape[0]
+    predictions = np.full(n_rows, -1, dtype=np.int64)
+    probabilities = np.full(n_rows, np.nan)
+    if valid is None:
+        valid = np.isfinite(X).all(axis=1)
+    if valid.any():
+        X_valid = X[valid] if not valid.all() else X
+        with warnings.catch_warnings():
+            # Models fitted on DataFrames warn on every unnamed NumPy block
+            warnings.filterwarnings('ignore', message='X does not have valid feature names')
+            predictions[valid] = model.predict(X_valid)
+            if hasattr(model, 'predict_proba') and getattr(model, 'probability', True):
+                probabilities[valid] = model.predict_proba(X_valid)[:, 1]
+    return predictions, probabilities, valid
+
+
+class ResultWriter:
+    """Append scored chunks to a CSV or Parquet file as they are produced"""
+
+    def __init__(self, path):
+        self.path = path
+        self.format = file_format(path)
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, df):
+        if self.format == 'csv':
+            df.to_csv(self.path, mode='a' if self._wrote_header else 'w',
+                      header=not self._wrote_header, index=False)
+            self._wrote_header = True
+            return
+        pa = _require_pyarrow()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._parquet_writer is None:
+            self._parquet_writer = pa.parquet.ParquetWriter(self.path, table.schema)
+        self._parquet_writer.write_table(table)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+
+def score_file(input_path, output_path, disease, model=None, chunksize=DEFAULT_CHUNKSIZE,
+               keep_columns=(), models_dir=MODELS_DIR, explain=False, precision=None):
+    """Score every row of input_path with the disease model and stream results to output_path"""
+    if model is None:
+        model = load_model(disease, models_dir, precision)
+    schema = SCHEMAS[disease]
+    writer = ResultWriter(output_path)
+    columns = None
+    totals = {'rows': 0, 'scored': 0, 'positive': 0}
+    field_counts = np.zeros((4, schema.n_features), dtype=np.int64)
+    try:
+        for chunk in iter_chunks(input_path, chunksize):
+            if columns is None:
+                columns = schema.resolve_columns(chunk.columns)
+            X = schema.pack_frame(chunk, columns)
+            report = validate(disease, X)
+            field_counts += report.field_counts
+            predictions, probabilities, valid = score_block(model, X, report.row_valid)
+
+            result = chunk[list(keep_columns)].copy() if keep_columns else pd.DataFrame(index=chunk.index)
+            result['disease'] = disease
+            result['valid'] = valid
+            result['prediction'] = pd.Series(predictions, index=chunk.index, dtype='Int64').mask(~valid)
+            result['probability'] = probabilities
+            if explain:
+                contrib = np.full(X.shape, np.nan)
+                if valid.any():
+                    contrib[valid] = contributions(model, X[valid])[0]
+                for name, column in zip(contribution_columns(schema), contrib.T):
+                    result[name] = column
+            writer.write(result)
+
+            totals['rows'] += len(chunk)
+            totals['scored'] += int(valid.sum())
+            totals['positive'] += int((predictions == 1).sum())
+    finally:
+        writer.close()
+    totals['validation'] = summarize(schema, totals['rows'], totals['rows'] - totals['scored'], field_counts)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file with one of the disease models")
+    parser.add_argument('input', help="CSV or Parquet file with one patient per row")
+    parser.add_argument('-d', '--disease', required=True, choices=sorted(MODEL_FILES))
+    parser.add_argument('-o', '--output', required=True, help="CSV or Parquet file to write results to")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows scored per block")
+    parser.add_argument('--keep', action='append', default=[], metavar='COLUMN',
+                        help="Input column to copy into the output (e.g. a patient id); repeatable")
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--explain', action='store_true', help="Add per-feature contribution columns")
+    parser.add_argument('--precision', choices=PRECISIONS,
+                        help="Score with the store's variant at this precision (default: $MODEL_PRECISION)")
+    parser.add_argument('--report', help="Write a JSON summary of invalid rows per field to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        totals = score_file(args.input, args.output, args.disease, chunksize=args.chunksize,
+                            keep_columns=args.keep, models_dir=args.models_dir, explain=args.explain,
+                            precision=args.precision)
+    except (ValueError, RuntimeError, FileNotFoundError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Scored {totals['scored']}/{totals['rows']} rows "
+          f"({totals['positive']} positive) -> {args.output}")
+    for name, counts in totals['validation']['fields'].items():
+        print(f"  {name}: {counts['violations']} invalid values", file=sys.stderr)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(totals['validation'], f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""Headless latency and throughput benchmarks for the disease models and the app.
+
+Measures, per disease, model load time (pickle and model store), single-row
+latency percentiles and batch throughput; then the cold import time of app1
+with its slowest imports, the cost of a full app1 rerun per page and of the
+page helpers, all on synthetic rows drawn from each field's range. Results are written as JSON. Against a baseline, any
+metric that got worse by more than --tolerance fails the run:
+
+    python benchmark.py --output bench.json --save-baseline baseline.json
+    python benchmark.py --output bench.json --baseline baseline.json
+    python benchmark.py --startup     # import-time breakdown only
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+from disease_models import MODEL_FILES, MODELS_DIR, load_model, load_pickled_model
+from feature_schema import SCHEMAS
+from inference import sample_inputs
+
+BATCH_SIZES = (1, 10, 100, 1000, 10000, 100000)
+PERCENTILES = (50, 95, 99)
+
+
+def _timings_us(fn, repeat, warmup=10):
+    for _ in range(warmup):
+        fn()
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter_ns()
+        fn()
+        timings[i] = time.perf_counter_ns() - start
+    return timings / 1000.0
+
+
+def _latency(timings):
+    return {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(timings, PERCENTILES))}
+
+
+def bench_load(disease, models_dir, repeat=20):
+    """Seconds to unpickle the .sav file and to load the served model (store first)"""
+    result = {}
+    for name, loader in (('pickle_s', load_pickled_model), ('served_s', load_model)):
+        try:
+            result[name] = float(np.median(_timings_us(lambda: loader(disease, models_dir), repeat, warmup=1))) / 1e6
+        except FileNotFoundError:
+            result[name] = None
+    return result
+
+
+def bench_model(disease, model, repeat=2000, batch_sizes=BATCH_SIZES, seed=0):
+    """Single-row latency percentiles (µs) and batch throughput (rows/s) for one model"""
+    schema = SCHEMAS[disease]
+    X = sample_inputs(schema, max(batch_sizes), seed)
+    rows = iter(np.resize(np.arange(len(X)), repeat + 10))
+    result = {
+        'model': type(model).__name__,
+        'predict_latency_us': _latency(_timings_us(lambda: model.predict(X[next(rows)][None, :]), repeat)),
+    }
+    if hasattr(model, 'predict_one'):
+        rows = iter(np.resize(np.arange(len(X)), repeat + 10))
+        result['predict_one_latency_us'] = _latency(_timings_us(lambda: model.predict_one(X[next(rows)]), repeat))
+    throughput = {}
+    for size in batch_sizes:
+        block = X[:size]
+        n = max(3, min(200, 200000 // size))
+        seconds = float(np.median(_timings_us(lambda: model.predict(block), n, warmup=2))) / 1e6
+        throughput[str(size)] = size / seconds
+    result['throughput_rows_per_s'] = throughput
+    return result
+
+
+def _import_times(module, cwd):
+    # One fresh interpreter per run; python -X importtime reports on stderr, children first
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"], cwd=cwd,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True).stderr
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(cumulative) / 1e6))
+    for i in range(len(entries) - 1, -1, -1):
+        if entries[i][:2] == (0, module):
+            children = []
+            for depth, name, seconds in reversed(entries[:i]):
+                if depth == 0:
+                    break
+                if depth == 1:
+                    children.append((name, seconds))
+            return entries[i][2], children
+    raise RuntimeError(f"Importing {module} failed")
+
+
+def bench_startup(app='app1.py', repeat=3, top=15):
+    """Cold import time of the app (s) and its slowest direct imports (ms), best of repeat runs"""
+    module = os.path.splitext(os.path.basename(app))[0]
+    total, children = min((_import_times(module, os.path.dirname(app) or '.') for _ in range(repeat)),
+                          key=lambda run: run[0])
+    children.sort(key=lambda child: child[1], reverse=True)
+    return {
+        'import_s': total,
+        # A list, so the per-module breakdown is reported but not compared against baselines
+        'imports_ms': [[name, seconds * 1000.0] for name, seconds in children[:top]],
+    }
+
+
+def bench_ui(app='app1.py', repeat=5):
+    """Full script reruns per page (ms, via streamlit's AppTest) and page-helper costs (µs)"""
+    from streamlit.logger import set_log_level
+    from streamlit.testing.v1 import AppTest
+
+    result = {'rerun_ms': {}, 'helpers_us': {}}
+    at = AppTest.from_file(app, default_timeout=60).run()
+    for schema in SCHEMAS.values():
+        at.sidebar.selectbox[0].select(schema.title).run()
+        timings = _timings_us(lambda: at.run(), repeat, warmup=1)
+        result['rerun_ms'][schema.disease] = float(np.median(timings)) / 1000.0
+
+    # Bare-mode streamlit calls log a warning each; they are expected here
+    set_log_level('error')
+    page = importlib.import_module(os.path.splitext(os.path.basename(app))[0])
+    for schema in SCHEMAS.values():
+        feature = schema.features[0]
+        helpers = {
+            'display_disease_info': lambda: page.display_disease_info(schema.title),
+            'create_input_field': lambda: page.create_input_field(
+                feature.label, feature.help, f"bench_{feature.name}", min_val=feature.min,
+                max_val=feature.max, step=feature.step),
+        }
+        for name, fn in helpers.items():
+            if hasattr(page, name):
+                timings = _timings_us(fn, repeat * 20, warmup=2)
+                result['helpers_us'][f"{name}.{schema.disease}"] = float(np.median(timings))
+    return result
+
+
+def run(models_dir=MODELS_DIR, repeat=2000, batch_sizes=BATCH_SIZES, ui=True, app='app1.py', startup=True):
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+        },
+        'models': {},
+    }
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        for disease in MODEL_FILES:
+            try:
+                model = load_model(disease, models_dir)
+            except FileNotFoundError:
+                print(f"{disease}: model file not found, skipped", file=sys.stderr)
+                continue
+            results['models'][disease] = dict(load=bench_load(disease, models_dir),
+                                              **bench_model(disease, model, repeat, batch_sizes))
+            print(f"{disease}: {results['models'][disease]['predict_latency_us']}", file=sys.stderr)
+    if startup:
+        results['startup'] = bench_startup(app)
+    if ui:
+        results['ui'] = bench_ui(app)
+    return results
+
+
+def flatten(results, prefix=''):
+    """{'models.heart_disease.predict_latency_us.p95': 12.3, ...} for every numeric leaf"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(results, baseline, tolerance=0.3):
+    """Metrics that got worse than the baseline by more than the relative tolerance"""
+    current = flatten({k: v for k, v in results.items() if k != 'meta'})
+    regressions = []
+    for key, base in flatten({k: v for k, v in baseline.items() if k != 'meta'}).items():
+        value = current.get(key)
+        if value is None or not base:
+            continue
+        higher_is_better = 'throughput' in key
+        change = (base - value) / base if higher_is_better else (value - base) / base
+        if change > tolerance:
+            regressions.append({'metric': key, 'baseline': base, 'current': value, 'change': change})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark model latency, throughput and app reruns")
+    parser.add_argument('-o', '--output', default='bench.json', help="JSON file for the results")
+    parser.add_argument('--baseline', help="Fail if a metric is worse than this earlier result")
+    parser.add_argument('--save-baseline', help="Also write the results to this baseline file")
+    parser.add_argument('--tolerance', type=float, default=0.3, help="Allowed relative slowdown")
+    parser.add_argument('--repeat', type=int, default=2000, help="Single-row calls per latency measurement")
+    parser.add_argument('--sizes', default=','.join(map(str, BATCH_SIZES)), help="Comma-separated batch sizes")
+    parser.add_argument('--no-ui', action='store_true', help="Skip the Streamlit rerun and helper benchmarks")
+    parser.add_argument('--no-startup', action='store_true', help="Skip the app import-time measurement")
+    parser.add_argument('--startup', action='store_true', help="Only print the app's import-time breakdown")
+    parser.add_argument('--app', default='app1.py')
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        startup = bench_startup(args.app)
+        print(f"{args.app}: imported in {startup['import_s'] * 1000:.0f} ms")
+        for name, ms in startup['imports_ms']:
+            print(f"  {ms:8.1f} ms  {name}")
+        return 0
+
+    sizes = tuple(int(size) for size in args.sizes.split(','))
+    results = run(args.models_dir, args.repeat, sizes, ui=not args.no_ui, app=args.app,
+                  startup=not args.no_startup)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['metric']}: {r['baseline']:.4g} -> {r['current']:.4g} "
+                  f"({r['change']:+.0%})", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Training data and held-out splits of the notebooks, reproduced as code.
+
+Each loader repeats its notebook's cleanup and ``train_test_split`` call
+(same test size, stratification and random state), so the test split scored
+here is the one behind the accuracy each notebook printed. The CSV files are
+not part of the repository; point ``--data-dir`` at a folder holding the
+files the notebooks read from ``/content``.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from feature_schema import SCHEMAS
+
+DATA_DIR = 'data'
+
+# Source CSV, split settings and the test accuracy printed by each notebook
+NOTEBOOKS = {
+    # No diabetes notebook is in the repository: the split mirrors the others
+    # and there is no recorded accuracy to compare against
+    'diabetes': {
+        'notebook': None,
+        'csv': 'diabetes.csv',
+        'target': 'Outcome',
+        'test_size': 0.2,
+        'stratify': True,
+        'random_state': 2,
+        'test_accuracy': None,
+    },
+    'heart_disease': {
+        'notebook': 'Heart_Disease_Prediction.ipynb',
+        'csv': 'heart_disease_data.csv',
+        'target': 'target',
+        'test_size': 0.2,
+        'stratify': True,
+        'random_state': 2,
+        'test_accuracy': 0.819672131147541,
+    },
+    'parkinsons': {
+        'notebook': "Parkinson's_Disease_Detection.ipynb",
+        'csv': 'parkinsons_data.csv',
+        'target': 'status',
+        'test_size': 0.2,
+        'stratify': False,
+        'random_state': 2,
+        'test_accuracy': 0.8717948717948718,
+    },
+    'lung_cancer': {
+        'notebook': 'Lung_Cancer.ipynb',
+        'csv': 'survey lung cancer.csv',
+        'target': 'LUNG_CANCER',
+        'test_size': 0.2,
+        'stratify': True,
+        'random_state': 2,
+        'test_accuracy': 0.9354838709677419,
+    },
+    'thyroid': {
+        'notebook': 'Thyroid.ipynb',
+        'csv': 'hypothyroid.csv',
+        'target': 'binaryClass',
+        'test_size': 0.2,
+        'stratify': False,
+        'random_state': 42,
+        'test_accuracy': 0.9562913907284768,
+    },
+}
+
+
+def _clean_lung_cancer(df):
+    # LabelEncoder in the notebook: F/M -> 0/1 and NO/YES -> 0/1
+    df.columns = df.columns.str.strip()
+    df['GENDER'] = (df['GENDER'] == 'M').astype(np.int64)
+    df['LUNG_CANCER'] = (df['LUNG_CANCER'] == 'YES').astype(np.int64)
+    return df
+
+
+def _clean_thyroid(df):
+    df['binaryClass'] = df['binaryClass'].map({'P': 0, 'N': 1})
+    df = df.drop(columns=['TBG', 'referral source'])
+    df = df.replace({'t': 1, 'f': 0, 'F': 1, 'M': 0, '?': np.nan})
+    df = df.apply(pd.to_numeric, errors='coerce')
+    # One mean-fill over the whole frame instead of a SimpleImputer per column;
+    # like the notebook, means are taken before the train/test split
+    return df.fillna(df.mean())
+
+
+CLEANERS = {
+    'lung_cancer': _clean_lung_cancer,
+    'thyroid': _clean_thyroid,
+}
+
+
+def load_dataset(disease, data_dir=DATA_DIR):
+    """Cleaned features (schema column order) and target for one disease"""
+    spec = NOTEBOOKS[disease]
+    df = pd.read_csv(os.path.join(data_dir, spec['csv']))
+    cleaner = CLEANERS.get(disease)
+    if cleaner is not None:
+        df = cleaner(df)
+    X = df[SCHEMAS[disease].columns]
+    y = df[spec['target']].astype(np.int64)
+    return X, y
+
+
+def train_test(disease, data_dir=DATA_DIR):
+    """The notebook's train/test split as float64 arrays: X_train, X_test, y_train, y_test"""
+    from sklearn.model_selection import train_test_split
+
+    spec = NOTEBOOKS[disease]
+    X, y = load_dataset(disease, data_dir)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=spec['test_size'], random_state=spec['random_state'],
+        stratify=y if spec['stratify'] else None)
+    return (np.ascontiguousarray(X_train.to_numpy(dtype=np.float64)),
+            np.ascontiguousarray(X_test.to_numpy(dtype=np.float64)),
+            y_train.to_numpy(), y_test.to_numpy())
@@ -0,0 +1,64 @@
+import os
+import pickle
+
+from drift import reference_means
+from inference import compile_model
+from metrics import timer
+from model_store import LazyModels, load_stored_model, precision_for
+from scoring import apply_threshold, load_thresholds
+
+# Directory holding the pickled models produced by the notebooks
+MODELS_DIR = 'Models'
+
+# Model file for each disease, keyed by the names used throughout the app
+MODEL_FILES = {
+    'diabetes': 'diabetes_model.sav',
+    'heart_disease': 'heart_disease_model.sav',
+    'parkinsons': 'parkinsons_model.sav',
+    'lung_cancer': 'lungs_disease_model.sav',
+    'thyroid': 'Thyroid_model.sav'
+}
+
+
+def model_path(disease, models_dir=MODELS_DIR):
+    """Path of the pickled model for a disease"""
+    return os.path.join(models_dir, MODEL_FILES[disease])
+
+
+def load_pickled_model(disease, models_dir=MODELS_DIR):
+    """Unpickle the model for a single disease"""
+    with open(model_path(disease, models_dir), 'rb') as f:
+        return pickle.load(f)
+
+
+def with_baseline(model, disease, models_dir=MODELS_DIR):
+    """Give a kernel exported without training means the drift reference's, as its explanation baseline"""
+    if hasattr(model, 'decision_gradient') and model.baseline is None:
+        model.baseline = reference_means(models_dir).get(disease)
+    return model
+
+
+def load_model(disease, models_dir=MODELS_DIR, precision=None):
+    """Load a disease model from the array store, falling back to the pickled .sav file
+
+    Either way, supported models come back as NumPy kernels (see inference.py),
+    with the disease's probability threshold applied if one is configured
+    and the training feature means as their explanation baseline.
+    The store's reduced-precision variant is used if precision (default:
+    $MODEL_PRECISION) asks for one and it was exported.
+    """
+    precision = precision or precision_for(disease)
+    model = load_stored_model(disease, os.path.join(models_dir, 'store'), precision=precision)
+    if model is None:
+        model = compile_model(load_pickled_model(disease, models_dir))
+    model = with_baseline(model, disease, models_dir)
+    return apply_threshold(model, load_thresholds(models_dir).get(disease), disease)
+
+
+def load_models(models_dir=MODELS_DIR, on_error=None):
+    """Dict-like view of all disease models; each is loaded on first access"""
+    def load(disease):
+        with timer('model_load', disease):
+            return load_model(disease, models_dir)
+
+    return LazyModels(load, MODEL_FILES, on_error)
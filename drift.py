@@ -0,0 +1,404 @@
+"""Input drift of the served models against their training data, in constant memory.
+
+A reference is computed once per disease from the notebook's training split
+(datasets.py): per feature, bin edges at the training quantiles (one bin per
+value for features with few distinct values), the share of training rows in
+each bin, and the mean, spread and a few quantiles.
+
+Production inputs are summarized in sketches binned on those same edges:
+Welford/Chan mean and variance, min and max, and bin counts, which also give
+approximate quantiles. Sketches have a fixed size and merge by addition, so
+the history writer (history_store.py) folds each batch of saved predictions
+into a running sketch and a daily one, in the same transaction as the rows.
+Nothing ever re-scans the history, and a report over any number of days
+merges a few small rows.
+
+Drift per feature compares a sketch with the reference:
+
+- PSI (population stability index) over the bins; by the usual rule of thumb
+  below 0.1 is stable and above 0.25 is a real shift.
+- KS-style distance: the largest gap between the two CDFs at the bin edges.
+
+    python drift.py reference all --data-dir data    # writes Models/drift_reference.json
+    python drift.py report --days 7                  # drift of the last week's inputs
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from feature_schema import SCHEMAS, SCHEMAS_BY_HISTORY_NAME
+from metrics import REGISTRY
+
+REFERENCE_FILE = 'drift_reference.json'
+REFERENCE_ENV = 'DRIFT_REFERENCE'
+# Training deciles, the usual PSI binning: finer bins inflate PSI on small samples
+BINS = 10
+QUANTILES = (0.05, 0.5, 0.95)
+# Floor for empty bins, so PSI stays finite
+EPSILON = 1e-4
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+# Below this many inputs the scores are mostly sampling noise
+MIN_ROWS = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drift (
+    period TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    disease TEXT NOT NULL,
+    reference TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (period, bucket, disease)
+);
+"""
+
+REGISTRY.describe('input_drift_psi', "Largest per-feature PSI of all served inputs against the training data")
+
+
+class Sketch:
+    """Mergeable per-feature summary of a block of rows: moments, range and counts per reference bin"""
+
+    def __init__(self, n, mean, m2, low, high, counts):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.low = low
+        self.high = high
+        self.counts = counts
+
+    @classmethod
+    def of(cls, X, edges):
+        """Summary of the rows of X, binned on the (n_features, n_edges) reference edges"""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        n, d = X.shape
+        mean = X.mean(axis=0)
+        # Bin b holds edges[b - 1] <= x < edges[b]; the +inf padding never matches
+        bins = (X[:, :, None] >= edges[None]).sum(axis=2)
+        width = edges.shape[1] + 1
+        counts = np.bincount((bins + np.arange(d) * width).ravel(), minlength=d * width).reshape(d, width)
+        return cls(n, mean, ((X - mean) ** 2).sum(axis=0), X.min(axis=0), X.max(axis=0), counts)
+
+    def merge(self, other):
+        """Summary of both blocks together (Chan et al.'s pairwise update of the moments)"""
+        if not other.n:
+            return self
+        if not self.n:
+            return other
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        return Sketch(n, self.mean + delta * other.n / n,
+                      self.m2 + other.m2 + delta ** 2 * self.n * other.n / n,
+                      np.minimum(self.low, other.low), np.maximum(self.high, other.high),
+                      self.counts + other.counts)
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / self.n)
+
+    @property
+    def proportions(self):
+        return self.counts / self.n
+
+    def quantiles(self, reference, qs=QUANTILES):
+        """(n_features, len(qs)) quantiles: the value of a bin for discrete features, else interpolated
+        linearly inside the bins"""
+        result = np.empty((len(self.mean), len(qs)))
+        for j in range(len(self.mean)):
+            inner = reference.edges[j][np.isfinite(reference.edges[j])]
+            bounds = np.clip(np.concatenate([[self.low[j]], inner, [self.high[j]]]), self.low[j], self.high[j])
+            counts = self.counts[j, :len(inner) + 1]
+            cdf = np.concatenate([[0.0], np.cumsum(counts) / self.n])
+            for k, q in enumerate(qs):
+                b = min(max(int(np.searchsorted(cdf, q)) - 1, 0), len(counts) - 1)
+                if reference.discrete[j]:
+                    result[j, k] = reference.levels[j, b]
+                    continue
+                share = (q - cdf[b]) / (cdf[b + 1] - cdf[b]) if counts[b] else 0.0
+                result[j, k] = bounds[b] + share * (bounds[b + 1] - bounds[b])
+        return result
+
+    def to_json(self):
+        return json.dumps({'n': self.n, 'mean': self.mean.tolist(), 'm2': self.m2.tolist(),
+                           'low': self.low.tolist(), 'high': self.high.tolist(), 'counts': self.counts.tolist()})
+
+    @classmethod
+    def from_json(cls, text):
+        state = json.loads(text)
+        return cls(state['n'], np.array(state['mean']), np.array(state['m2']), np.array(state['low']),
+                   np.array(state['high']), np.array(state['counts'], dtype=np.int64))
+
+
+class Reference:
+    """Training-data summary of one disease that production sketches are compared with"""
+
+    def __init__(self, disease, edges, levels, proportions, mean, std, quantiles, rows):
+        self.disease = disease
+        self.edges = np.asarray(edges, dtype=np.float64)
+        # Training value of each bin for features binned one value per bin, NaN otherwise
+        self.levels = np.asarray(levels, dtype=np.float64)
+        self.discrete = ~np.isnan(self.levels[:, 0])
+        self.proportions = np.asarray(proportions, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.std = np.asarray(std, dtype=np.float64)
+        self.quantiles = np.asarray(quantiles, dtype=np.float64)
+        self.rows = rows
+        # Sketches binned on other edges cannot be merged with this reference's
+        self.digest = hashlib.sha256(self.edges.tobytes()).hexdigest()[:12]
+
+    @classmethod
+    def build(cls, disease, X, bins=BINS):
+        """Reference from the training rows of one disease"""
+        X = np.asarray(X, dtype=np.float64)
+        edges = np.full((X.shape[1], bins - 1), np.inf)
+        levels = np.full((X.shape[1], bins), np.nan)
+        for j in range(X.shape[1]):
+            values = np.unique(X[:, j])
+            if len(values) <= bins:
+                cuts = (values[:-1] + values[1:]) / 2
+                levels[j, :len(values)] = values
+            else:
+                cuts = np.unique(np.quantile(X[:, j], np.linspace(0, 1, bins + 1)[1:-1]))
+            edges[j, :len(cuts)] = cuts
+        sketch = Sketch.of(X, edges)
+        return cls(disease, edges, levels, sketch.proportions, sketch.mean, sketch.std,
+                   np.quantile(X, QUANTILES, axis=0).T, len(X))
+
+    def to_dict(self):
+        return {'rows': self.rows, 'edges': self.edges.tolist(), 'levels': self.levels.tolist(),
+                'proportions': self.proportions.tolist(), 'mean': self.mean.tolist(), 'std': self.std.tolist(),
+                'quantiles': self.quantiles.tolist()}
+
+    @classmethod
+    def from_dict(cls, disease, data):
+        return cls(disease, data['edges'], data['levels'], data['proportions'], data['mean'], data['std'],
+                   data['quantiles'], data['rows'])
+
+
+def reference_path(models_dir):
+    return os.path.join(models_dir, REFERENCE_FILE)
+
+
+def load_references(path):
+    """{disease: Reference} from a reference file"""
+    with open(path) as f:
+        return {disease: Reference.from_dict(disease, data) for disease, data in json.load(f).items()}
+
+
+def reference_means(models_dir):
+    """{disease: training feature means} from the references at $DRIFT_REFERENCE, or {} without them"""
+    try:
+        references = load_references(os.environ.get(REFERENCE_ENV, reference_path(models_dir)))
+    except FileNotFoundError:
+        return {}
+    return {disease: reference.mean for disease, reference in references.items()}
+
+
+def save_references(path, references):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({disease: reference.to_dict() for disease, reference in references.items()}, f)
+    os.replace(tmp, path)
+
+
+def psi(expected, observed):
+    """Population stability index per feature between two (n_features, n_bins) proportion arrays"""
+    expected = np.maximum(expected, EPSILON)
+    observed = np.maximum(observed, EPSILON)
+    return ((observed - expected) * np.log(observed / expected)).sum(axis=1)
+
+
+def ks(expected, observed):
+    """Largest CDF gap per feature, measured at the bin edges"""
+    return np.abs(np.cumsum(expected, axis=1) - np.cumsum(observed, axis=1)).max(axis=1)
+
+
+def _status(score, rows):
+    if rows < MIN_ROWS:
+        return 'few inputs'
+    return 'alert' if score > PSI_ALERT else 'warn' if score > PSI_WARN else 'stable'
+
+
+def compare(reference, sketch):
+    """Per-feature drift of a sketch against its reference, largest PSI first"""
+    schema = SCHEMAS[reference.disease]
+    scores = psi(reference.proportions, sketch.proportions)
+    distances = ks(reference.proportions, sketch.proportions)
+    quantiles = sketch.quantiles(reference)
+    report = []
+    for j, feature in enumerate(schema.features):
+        report.append({
+            'feature': feature.name,
+            'label': feature.label,
+            'rows': sketch.n,
+            'psi': float(scores[j]),
+            'ks': float(distances[j]),
+            'status': _status(scores[j], sketch.n),
+            'mean': float(sketch.mean[j]),
+            'reference_mean': float(reference.mean[j]),
+            'std': float(sketch.std[j]),
+            'reference_std': float(reference.std[j]),
+            'median': float(quantiles[j, 1]),
+            'reference_median': float(reference.quantiles[j, 1]),
+        })
+    report.sort(key=lambda row: -row['psi'])
+    return report
+
+
+class DriftMonitor:
+    """Drift sketches of every disease with a reference, stored in the prediction history database"""
+
+    def __init__(self, references):
+        self.references = references
+        self._psi = {}
+        self._lock = threading.Lock()
+
+    def create(self, conn):
+        conn.executescript(SCHEMA)
+
+    def record(self, conn, batch):
+        """Fold a batch of history rows into the stored sketches, inside the writer's transaction"""
+        blocks = {}
+        for timestamp, name, _, inputs, _ in batch:
+            schema = SCHEMAS_BY_HISTORY_NAME.get(name)
+            disease = schema and schema.disease
+            if disease in self.references:
+                blocks.setdefault(disease, {}).setdefault(timestamp[:10], []).append(json.loads(inputs))
+        for disease, days in blocks.items():
+            reference = self.references[disease]
+            total = None
+            for day, rows in days.items():
+                X = np.array(rows, dtype=np.float64)
+                if X.ndim != 2 or X.shape[1] != len(reference.mean):
+                    continue
+                sketch = Sketch.of(X, reference.edges)
+                self._merge(conn, 'day', day, reference, sketch)
+                total = sketch if total is None else total.merge(sketch)
+            if total is not None:
+                self._publish(disease, self._merge(conn, 'all', '', reference, total))
+
+    def _merge(self, conn, period, bucket, reference, sketch):
+        row = conn.execute("SELECT reference, state FROM drift WHERE period = ? AND bucket = ? AND disease = ?",
+                           (period, bucket, reference.disease)).fetchone()
+        # A sketch binned for an older reference is started over
+        if row is not None and row[0] == reference.digest:
+            sketch = Sketch.from_json(row[1]).merge(sketch)
+        conn.execute("INSERT OR REPLACE INTO drift VALUES (?, ?, ?, ?, ?)",
+                     (period, bucket, reference.disease, reference.digest, sketch.to_json()))
+        return sketch
+
+    def _publish(self, disease, sketch):
+        value = float(psi(self.references[disease].proportions, sketch.proportions).max())
+        with self._lock:
+            if disease not in self._psi:
+                REGISTRY.gauge('input_drift_psi', lambda: self._psi[disease], disease=disease)
+            self._psi[disease] = value
+
+    def sketch(self, conn, disease, days=None, now=None):
+        """Merged sketch of a disease's inputs over the last `days` days (all time without days)"""
+        reference = self.references[disease]
+        if days is None:
+            rows = conn.execute("SELECT reference, state FROM drift WHERE period = 'all' AND disease = ?",
+                                (disease,))
+        else:
+            start = ((now or datetime.now()) - timedelta(days=days)).isoformat()[:10]
+            rows = conn.execute("SELECT reference, state FROM drift WHERE period = 'day' AND disease = ? "
+                                "AND bucket >= ?", (disease, start))
+        sketch = None
+        for digest, state in rows:
+            if digest == reference.digest:
+                sketch = Sketch.from_json(state) if sketch is None else sketch.merge(Sketch.from_json(state))
+        return sketch
+
+    def report(self, conn, days=None, diseases=None):
+        """{disease: per-feature drift rows} for every disease with recorded inputs"""
+        result = {}
+        for disease in diseases or self.references:
+            sketch = self.sketch(conn, disease, days)
+            if sketch is not None:
+                result[disease] = compare(self.references[disease], sketch)
+        return result
+
+    def clear(self, conn):
+        conn.execute("DELETE FROM drift")
+
+
+def from_env(models_dir=None):
+    """Monitor for the references at $DRIFT_REFERENCE or <models_dir>/drift_reference.json, or None"""
+    if models_dir is None:
+        from disease_models import MODELS_DIR as models_dir
+    path = os.environ.get(REFERENCE_ENV, reference_path(models_dir))
+    try:
+        return DriftMonitor(load_references(path))
+    except FileNotFoundError:
+        return None
+
+
+def main(argv=None):
+    from datasets import DATA_DIR, train_test
+    from disease_models import MODELS_DIR
+    from history_store import HISTORY_DB, HISTORY_DB_ENV, HistoryStore
+
+    parser = argparse.ArgumentParser(description="Build drift references from the training data, or report drift")
+    parser.add_argument('command', choices=('reference', 'report'))
+    parser.add_argument('diseases', nargs='*', help="Diseases (default: all)")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--db', default=os.environ.get(HISTORY_DB_ENV, HISTORY_DB))
+    parser.add_argument('--days', type=int, help="Only inputs of the last N days (default: all time)")
+    parser.add_argument('--top', type=int, default=5, help="Features shown per disease")
+    parser.add_argument('--fail-above', type=float, help="Exit with 1 if any feature's PSI is above this")
+    args = parser.parse_args(argv)
+    diseases = list(SCHEMAS) if not args.diseases or 'all' in args.diseases else args.diseases
+    unknown = sorted(set(diseases) - set(SCHEMAS))
+    if unknown:
+        parser.error(f"unknown disease(s): {', '.join(unknown)}; choose from {', '.join(SCHEMAS)}")
+    path = os.environ.get(REFERENCE_ENV, reference_path(args.models_dir))
+
+    if args.command == 'reference':
+        try:
+            references = load_references(path)
+        except FileNotFoundError:
+            references = {}
+        status = 0
+        for disease in diseases:
+            try:
+                X_train, _, _, _ = train_test(disease, args.data_dir)
+            except FileNotFoundError as e:
+                print(f"{disease}: skipped ({e})", file=sys.stderr)
+                status = 1
+                continue
+            references[disease] = Reference.build(disease, X_train)
+            print(f"{disease}: reference from {len(X_train)} training rows ({references[disease].digest})")
+        save_references(path, references)
+        print(f"References -> {path}")
+        return status
+
+    try:
+        monitor = DriftMonitor(load_references(path))
+    except FileNotFoundError:
+        print(f"No drift reference at {path}; run `python drift.py reference` first", file=sys.stderr)
+        return 1
+    store = HistoryStore(args.db, drift=monitor)
+    report = store.drift_report(args.days, [d for d in diseases if d in monitor.references])
+    if not report:
+        print("No inputs recorded yet")
+    status = 0
+    for disease, features in report.items():
+        print(f"{disease}: {features[0]['rows']} inputs, largest PSI {features[0]['psi']:.3f}")
+        for row in features[:args.top]:
+            print(f"  {row['feature']:<22} psi {row['psi']:.3f} ks {row['ks']:.3f} [{row['status']}] "
+                  f"mean {row['mean']:.4g} (train {row['reference_mean']:.4g}) "
+                  f"median {row['median']:.4g} (train {row['reference_median']:.4g})")
+        if args.fail_above is not None and features[0]['rows'] >= MIN_ROWS and features[0]['psi'] > args.fail_above:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
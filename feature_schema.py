@@ -0,0 +1,324 @@
+"""Single registry of the input features of every disease model.
+
+Each model's fields are declared once, in the order the model was trained on,
+together with their widget, range and step. The Streamlit forms, input checks
+and the batch/API paths are all generated from these declarations.
+"""
+import re
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+
+YES_NO = ('No', 'Yes')
+GENDER = ('Female', 'Male')
+
+
+@dataclass(frozen=True)
+class Feature:
+    """One model input: how it is rendered, its valid range and its training column"""
+    name: str
+    column: str
+    label: str
+    help: str = ''
+    min: float = 0
+    max: float = None
+    step: float = 1
+    widget: str = 'number'
+    options: tuple = ()
+    # Upper bound accepted by validation where the training data goes past the form's max
+    valid_max: float = None
+
+    @property
+    def dtype(self):
+        return 'float64' if isinstance(self.step, float) else 'int64'
+
+    @property
+    def codes(self):
+        """Model codes of a select field's options, in option order"""
+        return range(int(self.min), int(self.min) + len(self.options))
+
+    def option_label(self, code):
+        return self.options[int(code) - int(self.min)]
+
+
+@dataclass(frozen=True)
+class Section:
+    """A block of the form: optional expander title and the number of fields per column"""
+    title: str = None
+    columns: tuple = (1,)
+    expanded: bool = False
+
+
+@dataclass(frozen=True)
+class DiseaseSchema:
+    """Everything needed to render, validate and pack the inputs of one model"""
+    disease: str
+    title: str
+    header: str
+    button: str
+    history_name: str
+    result_name: str
+    key_prefix: str
+    features: tuple
+    layout: tuple
+    note: str = None
+    _local: threading.local = field(default_factory=threading.local, repr=False, compare=False)
+
+    @cached_property
+    def names(self):
+        return [f.name for f in self.features]
+
+    @cached_property
+    def columns(self):
+        return [f.column for f in self.features]
+
+    @cached_property
+    def n_features(self):
+        return len(self.features)
+
+    @cached_property
+    def lower(self):
+        return np.array([f.min for f in self.features], dtype=np.float64)
+
+    @cached_property
+    def upper(self):
+        return np.array([f.valid_max if f.valid_max is not None else np.inf if f.max is None else f.max
+                         for f in self.features], dtype=np.float64)
+
+    @cached_property
+    def steps(self):
+        return np.array([f.step for f in self.features], dtype=np.float64)
+
+    @cached_property
+    def categorical_mask(self):
+        return np.array([f.widget == 'select' for f in self.features])
+
+    @cached_property
+    def _lookup(self):
+        lookup = {}
+        for i, f in enumerate(self.features):
+            lookup[normalize_column(f.name)] = i
+            lookup[normalize_column(f.column)] = i
+        return lookup
+
+    def key(self, feature):
+        """Streamlit widget key of a feature"""
+        return f"{self.key_prefix}{feature.name}"
+
+    def sections(self):
+        """Yield (section, [[features of column 1], [features of column 2], ...]) in model order"""
+        position = 0
+        for section in self.layout:
+            columns = []
+            for count in section.columns:
+                columns.append(self.features[position:position + count])
+                position += count
+            yield section, columns
+
+    def row_buffer(self):
+        """Preallocated float64 row reused by every request served on this thread"""
+        buffer = getattr(self._local, 'row', None)
+        if buffer is None:
+            buffer = self._local.row = np.empty(self.n_features, dtype=np.float64)
+        return buffer
+
+    def pack(self, values, out=None):
+        """Pack a list in model order, or a dict keyed by feature name or column, into a float64 row"""
+        if out is None:
+            out = np.empty(self.n_features, dtype=np.float64)
+        if isinstance(values, dict):
+            out.fill(np.nan)
+            for name, value in values.items():
+                i = self._lookup.get(normalize_column(name))
+                if i is not None:
+                    out[i] = np.nan if value is None else value
+            missing = [self.names[i] for i in np.flatnonzero(np.isnan(out))]
+            if missing:
+                raise ValueError(f"Missing features for {self.disease}: {', '.join(missing)}")
+            return out
+        if len(values) != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features for {self.disease}, got {len(values)}")
+        out[:] = [np.nan if value is None else value for value in values]
+        return out
+
+    def resolve_columns(self, columns):
+        """Map the model's feature order onto the columns of a table (by name or training column)"""
+        available = {}
+        for col in columns:
+            i = self._lookup.get(normalize_column(col))
+            if i is not None:
+                available.setdefault(i, col)
+        missing = [self.columns[i] for i in range(self.n_features) if i not in available]
+        if missing:
+            raise ValueError(f"Input is missing columns for {self.disease}: {', '.join(missing)}")
+        return [available[i] for i in range(self.n_features)]
+
+    def pack_frame(self, df, columns=None):
+        """Pack a DataFrame into a contiguous (rows, features) float64 block in model order"""
+        if columns is None:
+            columns = self.resolve_columns(df.columns)
+        return np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64))
+
+
+def normalize_column(name):
+    """Normalize a column name so 'CHRONIC DISEASE', 'chronic_disease' and 'Chronic-Disease' match"""
+    return re.sub(r'[^0-9a-z]+', '', str(name).lower())
+
+
+def number(name, column, label, help, max, min=0, step=1, valid_max=None):
+    return Feature(name, column, label, help, min=min, max=max, step=step, valid_max=valid_max)
+
+
+def choice(name, column, label, options, valid_max=None, first=0):
+    return Feature(name, column, label, min=first, max=first + len(options) - 1, widget='select',
+                   options=tuple(options), valid_max=valid_max)
+
+
+SCHEMAS = {
+    'diabetes': DiseaseSchema(
+        disease='diabetes',
+        title='Diabetes Prediction',
+        header="🩺 Diabetes Risk Assessment",
+        button='🔍 Predict Diabetes Risk',
+        history_name='Diabetes',
+        result_name='Diabetes',
+        key_prefix='',
+        features=(
+            number('pregnancies', 'Pregnancies', 'Number of Pregnancies', 'Number of times pregnant', max=20),
+            number('glucose', 'Glucose', 'Glucose Level (mg/dL)', 'Plasma glucose concentration', max=300),
+            number('blood_pressure', 'BloodPressure', 'Blood Pressure (mm Hg)', 'Diastolic blood pressure', max=200),
+            number('skin_thickness', 'SkinThickness', 'Skin Thickness (mm)', 'Triceps skinfold thickness', max=100),
+            number('insulin', 'Insulin', 'Insulin Level (μU/mL)', '2-Hour serum insulin', max=1000),
+            number('bmi', 'BMI', 'BMI', 'Body mass index (weight in kg/(height in m)^2)', max=70.0, step=0.1),
+            number('dpf', 'DiabetesPedigreeFunction', 'Diabetes Pedigree Function', 'Diabetes pedigree function score', max=5.0, step=0.01),
+            number('age', 'Age', 'Age (years)', 'Age of the person', max=120),
+        ),
+        layout=(Section(columns=(4, 4)),),
+    ),
+    'heart_disease': DiseaseSchema(
+        disease='heart_disease',
+        title='Heart Disease Prediction',
+        header="❤️ Heart Disease Risk Assessment",
+        button='🔍 Predict Heart Disease Risk',
+        history_name='Heart Disease',
+        result_name='Heart Disease',
+        key_prefix='hd_',
+        features=(
+            number('age', 'age', 'Age (years)', 'Age of the person', max=120),
+            choice('sex', 'sex', 'Gender', GENDER),
+            choice('cp', 'cp', 'Chest Pain Type', ['Typical Angina', 'Atypical Angina', 'Non-anginal Pain', 'Asymptomatic']),
+            number('trestbps', 'trestbps', 'Resting Blood Pressure (mm Hg)', 'Resting blood pressure', max=250),
+            number('chol', 'chol', 'Cholesterol (mg/dL)', 'Serum cholesterol', max=600),
+            choice('fbs', 'fbs', 'Fasting Blood Sugar > 120 mg/dl', YES_NO),
+            choice('restecg', 'restecg', 'Resting ECG', ['Normal', 'ST-T Wave Abnormality', 'Left Ventricular Hypertrophy']),
+            number('thalach', 'thalach', 'Max Heart Rate', 'Maximum heart rate achieved', max=250),
+            choice('exang', 'exang', 'Exercise Induced Angina', YES_NO),
+            number('oldpeak', 'oldpeak', 'ST Depression', 'ST depression induced by exercise', max=10.0, step=0.1),
+            choice('slope', 'slope', 'Slope of Peak Exercise ST', ['Upsloping', 'Flat', 'Downsloping']),
+            # The training data also has ca = 4 and thal = 3 (about 40% of rows)
+            number('ca', 'ca', 'Major Vessels (0-3)', 'Number of major vessels colored by fluoroscopy', max=3,
+                   valid_max=4),
+            choice('thal', 'thal', 'Thalassemia', ['Normal', 'Fixed Defect', 'Reversible Defect'], valid_max=3),
+        ),
+        layout=(Section(columns=(5, 4, 4)),),
+    ),
+    'parkinsons': DiseaseSchema(
+        disease='parkinsons',
+        title='Parkinsons Prediction',
+        header="🧠 Parkinson's Disease Risk Assessment",
+        button='🔍 Predict Parkinson\'s Risk',
+        history_name='Parkinsons',
+        result_name='Parkinson\'s Disease',
+        key_prefix='pk_',
+        note="This assessment uses voice measurement data. Please consult with a healthcare professional for proper voice analysis.",
+        features=(
+            number('fo', 'MDVP:Fo(Hz)', 'MDVP:Fo(Hz)', 'Average vocal fundamental frequency', max=300.0, step=0.01),
+            number('fhi', 'MDVP:Fhi(Hz)', 'MDVP:Fhi(Hz)', 'Maximum vocal fundamental frequency', max=600.0, step=0.01),
+            number('flo', 'MDVP:Flo(Hz)', 'MDVP:Flo(Hz)', 'Minimum vocal fundamental frequency', max=300.0, step=0.01),
+            number('jitter_percent', 'MDVP:Jitter(%)', 'Jitter (%)', 'Jitter percentage', max=10.0, step=0.001),
+            number('jitter_abs', 'MDVP:Jitter(Abs)', 'Jitter (Abs)', 'Absolute jitter', max=1.0, step=0.00001),
+            number('rap', 'MDVP:RAP', 'RAP', 'Relative average perturbation', max=1.0, step=0.001),
+            number('ppq', 'MDVP:PPQ', 'PPQ', 'Period perturbation quotient', max=1.0, step=0.001),
+            number('ddp', 'Jitter:DDP', 'Jitter:DDP', 'Jitter DDP', max=1.0, step=0.001),
+            number('shimmer', 'MDVP:Shimmer', 'Shimmer', 'Shimmer', max=1.0, step=0.001),
+            number('shimmer_db', 'MDVP:Shimmer(dB)', 'Shimmer (dB)', 'Shimmer in dB', max=10.0, step=0.01),
+            number('apq3', 'Shimmer:APQ3', 'APQ3', 'Amplitude perturbation quotient 3', max=1.0, step=0.001),
+            number('apq5', 'Shimmer:APQ5', 'APQ5', 'Amplitude perturbation quotient 5', max=1.0, step=0.001),
+            number('apq', 'MDVP:APQ', 'APQ', 'Amplitude perturbation quotient', max=1.0, step=0.001),
+            number('dda', 'Shimmer:DDA', 'DDA', 'Difference of differences of amplitudes', max=1.0, step=0.001),
+            number('nhr', 'NHR', 'NHR', 'Noise-to-harmonics ratio', max=1.0, step=0.001),
+            number('hnr', 'HNR', 'HNR', 'Harmonics-to-noise ratio', max=50.0, step=0.01),
+            number('rpde', 'RPDE', 'RPDE', 'Recurrence period density entropy', max=1.0, step=0.001),
+            number('dfa', 'DFA', 'DFA', 'Detrended fluctuation analysis', max=1.0, step=0.001),
+            number('spread1', 'spread1', 'Spread1', 'Nonlinear measure of fundamental frequency variation', min=-10.0, max=0.0, step=0.001),
+            number('spread2', 'spread2', 'Spread2', 'Nonlinear measure of fundamental frequency variation', max=1.0, step=0.001),
+            number('d2', 'D2', 'D2', 'Correlation dimension', max=10.0, step=0.001),
+            number('ppe', 'PPE', 'PPE', 'Pitch period entropy', max=1.0, step=0.001),
+        ),
+        layout=(
+            Section("📊 Fundamental Frequency Measures", (1, 1, 1), expanded=True),
+            Section("📈 Jitter Measures", (1, 1, 1, 1)),
+            # Jitter:DDP sits below the jitter expander, as in the original form
+            Section(columns=(1,)),
+            Section("📉 Shimmer Measures", (2, 2, 2)),
+            Section("🎵 Harmonic Measures", (1, 1)),
+            Section("🔬 Nonlinear Dynamical Complexity Measures", (2, 2, 2)),
+        ),
+    ),
+    'lung_cancer': DiseaseSchema(
+        disease='lung_cancer',
+        title='Lung Cancer Prediction',
+        header="🫁 Lung Cancer Risk Assessment",
+        button='🔍 Predict Lung Cancer Risk',
+        history_name='Lung Cancer',
+        result_name='Lung Cancer',
+        key_prefix='lc_',
+        features=(
+            choice('gender', 'GENDER', 'Gender', GENDER),
+            number('age', 'AGE', 'Age (years)', 'Age of the person', max=120),
+            # The survey codes symptoms 1 = No, 2 = Yes, and the model was trained on those codes
+            choice('smoking', 'SMOKING', 'Smoking History', YES_NO, first=1),
+            choice('yellow_fingers', 'YELLOW_FINGERS', 'Yellow Fingers', YES_NO, first=1),
+            choice('anxiety', 'ANXIETY', 'Anxiety', YES_NO, first=1),
+            choice('peer_pressure', 'PEER_PRESSURE', 'Peer Pressure', YES_NO, first=1),
+            choice('chronic_disease', 'CHRONIC DISEASE', 'Chronic Disease', YES_NO, first=1),
+            choice('fatigue', 'FATIGUE', 'Fatigue', YES_NO, first=1),
+            choice('allergy', 'ALLERGY', 'Allergy', YES_NO, first=1),
+            choice('wheezing', 'WHEEZING', 'Wheezing', YES_NO, first=1),
+            choice('alcohol_consuming', 'ALCOHOL CONSUMING', 'Alcohol Consumption', YES_NO, first=1),
+            choice('coughing', 'COUGHING', 'Coughing', YES_NO, first=1),
+            choice('shortness_of_breath', 'SHORTNESS OF BREATH', 'Shortness of Breath', YES_NO, first=1),
+            choice('swallowing_difficulty', 'SWALLOWING DIFFICULTY', 'Swallowing Difficulty', YES_NO, first=1),
+            choice('chest_pain', 'CHEST PAIN', 'Chest Pain', YES_NO, first=1),
+        ),
+        layout=(Section(columns=(5, 5, 5)),),
+    ),
+    'thyroid': DiseaseSchema(
+        disease='thyroid',
+        title='Hypo-Thyroid Prediction',
+        header="🦋 Thyroid Disease Risk Assessment",
+        button='🔍 Predict Thyroid Disease Risk',
+        history_name='Hypo-Thyroid',
+        result_name='Hypothyroidism',
+        key_prefix='th_',
+        features=(
+            number('age', 'age', 'Age (years)', 'Age of the person', max=120),
+            # The thyroid data codes sex F = 1, M = 0 (datasets._clean_thyroid)
+            choice('sex', 'sex', 'Gender', ('Male', 'Female')),
+            choice('on_thyroxine', 'on thyroxine', 'On Thyroxine Medication', YES_NO),
+            number('tsh', 'TSH', 'TSH Level (mU/L)', 'Thyroid Stimulating Hormone level', max=100.0, step=0.01,
+                   valid_max=530.0),
+            choice('t3_measured', 'T3 measured', 'T3 Measured', YES_NO),
+            number('t3', 'T3', 'T3 Level (ng/dL)', 'Triiodothyronine level', max=10.0, step=0.01),
+            number('tt4', 'TT4', 'TT4 Level (μg/dL)', 'Total thyroxine level', max=30.0, step=0.1),
+        ),
+        layout=(Section(columns=(4, 3)),),
+    ),
+}
+
+# Lookup by the label shown in the app's disease selector
+SCHEMAS_BY_TITLE = {schema.title: schema for schema in SCHEMAS.values()}
+# Prediction history entries are saved under the history name
+SCHEMAS_BY_HISTORY_NAME = {schema.history_name: schema for schema in SCHEMAS.values()}
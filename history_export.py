@@ -0,0 +1,252 @@
+"""Columnar export of the prediction history for bulk analysis.
+
+The history log (history_store.py) keeps each prediction's inputs as a JSON
+list whose length depends on the disease. The exporter turns it into one
+typed table per disease: id, timestamp, prediction, model_version and one
+float64 column per feature, as the models read them. Files are Parquet (zstd, with
+row-group min/max statistics) or Arrow IPC, laid out hive-style:
+
+    history/disease=thyroid/date=2026-10-17/part-<first id>-0.parquet
+
+A disease query only opens that disease's folder and a time range only the
+matching date folders. Parquet row groups whose timestamp statistics fall
+outside the range are skipped, and files are read memory-mapped. Exports are
+incremental: the last exported id of each disease is kept in
+_export_state.json, so a daily run only reads the new rows.
+
+    python history_export.py export --dir history          # new rows since the last run
+    python history_export.py query thyroid --start 2026-10-01 --end 2026-11-01 -o october.parquet
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from feature_schema import SCHEMAS
+from history_store import HISTORY_DB, HISTORY_DB_ENV, HistoryStore
+
+EXPORT_DIR = 'history'
+STATE_FILE = '_export_state.json'
+CHUNK_ROWS = 100000
+ROW_GROUP_ROWS = 65536
+FORMATS = {'parquet': 'parquet', 'arrow': 'ipc'}
+EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError:
+        raise RuntimeError("History export requires pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def table_schema(schema):
+    """Arrow schema of one disease's export; the date column is stored in the folder names"""
+    pa = _require_pyarrow()
+    return pa.schema([
+        ('id', pa.int64()),
+        ('timestamp', pa.timestamp('us')),
+        ('prediction', pa.int8()),
+        ('model_version', pa.dictionary(pa.int32(), pa.string())),
+    ] + [(name, pa.float64()) for name in schema.names] + [
+        ('date', pa.string()),
+    ])
+
+
+def _partitioning():
+    pa = _require_pyarrow()
+    return pa.dataset.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+
+
+def to_table(schema, rows):
+    """Typed Arrow table (with a date column) from raw history rows, and the number of rows left out
+    because their inputs do not have one value per feature"""
+    pa = _require_pyarrow()
+    ids, timestamps, predictions, inputs, versions = zip(*rows)
+    # One json.loads call for the whole chunk
+    values = json.loads(f"[{','.join(inputs)}]")
+    fits = np.fromiter((len(v) == schema.n_features for v in values), dtype=bool, count=len(values))
+    X = np.array([v for v, ok in zip(values, fits) if ok], dtype=np.float64).reshape(-1, schema.n_features)
+    keep = np.flatnonzero(fits)
+
+    timestamps = np.array(timestamps, dtype='datetime64[us]')[keep]
+    columns = {
+        'id': pa.array(np.array(ids, dtype=np.int64)[keep]),
+        'timestamp': pa.array(timestamps),
+        'prediction': pa.array(np.array(predictions, dtype=np.int8)[keep]),
+        'model_version': pa.array([versions[i] for i in keep], pa.string()).dictionary_encode(),
+    }
+    for j, name in enumerate(schema.names):
+        columns[name] = pa.array(X[:, j])
+    columns['date'] = pa.array(np.datetime_as_string(timestamps, unit='D'))
+    return pa.table(columns, schema=table_schema(schema)), len(rows) - len(keep)
+
+
+def read_state(output_dir):
+    try:
+        with open(os.path.join(output_dir, STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'format': None, 'last_id': {}}
+
+
+def write_state(output_dir, state):
+    path = os.path.join(output_dir, STATE_FILE)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def export(store, output_dir=EXPORT_DIR, diseases=None, fmt=None, full=False, chunk_rows=CHUNK_ROWS):
+    """Export the history rows added since the last export; returns {disease: (rows written, rows left out)}
+
+    The format defaults to the one the folder already holds, else Parquet.
+    """
+    pa = _require_pyarrow()
+    os.makedirs(output_dir, exist_ok=True)
+    state = read_state(output_dir)
+    fmt = fmt or state['format'] or 'parquet'
+    if state['format'] not in (None, fmt):
+        if not full:
+            raise ValueError(f"{output_dir} holds {state['format']} files; use --full to rewrite it as {fmt}")
+        # One format per folder: other diseases are rewritten by their next export
+        for disease in SCHEMAS:
+            shutil.rmtree(os.path.join(output_dir, f"disease={disease}"), ignore_errors=True)
+        state['last_id'] = {}
+    state['format'] = fmt
+    if fmt == 'parquet':
+        file_options = pa.dataset.ParquetFileFormat().make_write_options(compression='zstd', write_statistics=True)
+    else:
+        file_options = pa.dataset.IpcFileFormat().make_write_options(compression='zstd')
+
+    store.flush()
+    result = {}
+    for disease in diseases or SCHEMAS:
+        schema = SCHEMAS[disease]
+        disease_dir = os.path.join(output_dir, f"disease={disease}")
+        if full:
+            shutil.rmtree(disease_dir, ignore_errors=True)
+            state['last_id'].pop(disease, None)
+        last_id = state['last_id'].get(disease, 0)
+        # The log is append-only: if the last exported row is gone, it was cleared since
+        if last_id and [row[0] for row in store.scan(schema.history_name, last_id - 1, 1)] != [last_id]:
+            raise ValueError(f"{disease}: the history changed since the last export; use --full to rewrite it")
+        written = left_out = 0
+        while True:
+            rows = store.scan(schema.history_name, last_id, chunk_rows)
+            if not rows:
+                break
+            table, skipped = to_table(schema, rows)
+            if table.num_rows:
+                # File names start with the chunk's first id, so later runs add files instead of replacing them
+                pa.dataset.write_dataset(
+                    table, disease_dir, format=FORMATS[fmt], partitioning=_partitioning(),
+                    basename_template=f"part-{rows[0][0]}-{{i}}.{EXTENSIONS[fmt]}", file_options=file_options,
+                    max_rows_per_group=ROW_GROUP_ROWS, min_rows_per_group=min(ROW_GROUP_ROWS, table.num_rows),
+                    existing_data_behavior='overwrite_or_ignore')
+            written += table.num_rows
+            left_out += skipped
+            last_id = rows[-1][0]
+        if last_id:
+            state['last_id'][disease] = last_id
+        result[disease] = (written, left_out)
+    write_state(output_dir, state)
+    return result
+
+
+def _day(value):
+    return value.isoformat()[:10] if isinstance(value, datetime) else str(value)[:10]
+
+
+def dataset(output_dir, disease):
+    """Memory-mapped Arrow dataset over one disease's exported files"""
+    pa = _require_pyarrow()
+    import pyarrow.fs
+
+    fmt = read_state(output_dir)['format'] or 'parquet'
+    return pa.dataset.dataset(os.path.join(output_dir, f"disease={disease}"), schema=table_schema(SCHEMAS[disease]),
+                              format=FORMATS[fmt], partitioning=_partitioning(),
+                              filesystem=pyarrow.fs.LocalFileSystem(use_mmap=True))
+
+
+def query(output_dir, disease, start=None, end=None, columns=None):
+    """Arrow table of one disease's predictions with start <= timestamp < end
+
+    The date folders outside the range are never opened, and Parquet row groups
+    are skipped by their timestamp statistics.
+    """
+    pa = _require_pyarrow()
+    field = pa.dataset.field
+    condition = None
+    # The date clauses prune folders, the timestamp clauses row groups and rows
+    if start is not None:
+        condition = (field('date') >= _day(start)) & (field('timestamp') >= pa.scalar(np.datetime64(start, 'us')))
+    if end is not None:
+        clause = (field('date') <= _day(end)) & (field('timestamp') < pa.scalar(np.datetime64(end, 'us')))
+        condition = clause if condition is None else condition & clause
+    return dataset(output_dir, disease).to_table(columns=columns, filter=condition)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the prediction history to per-disease Parquet/Arrow files")
+    parser.add_argument('command', choices=('export', 'query'))
+    parser.add_argument('diseases', nargs='*', help="Diseases (default: all; query takes one)")
+    parser.add_argument('--db', default=os.environ.get(HISTORY_DB_ENV, HISTORY_DB))
+    parser.add_argument('--dir', default=EXPORT_DIR, help="Export folder")
+    parser.add_argument('--format', choices=sorted(FORMATS), help="Default: the folder's format, else parquet")
+    parser.add_argument('--full', action='store_true', help="Rewrite the export from the first prediction")
+    parser.add_argument('--start', type=datetime.fromisoformat, help="Query: first timestamp (inclusive)")
+    parser.add_argument('--end', type=datetime.fromisoformat, help="Query: last timestamp (exclusive)")
+    parser.add_argument('--days', type=int, help="Query: the last N days (instead of --start)")
+    parser.add_argument('--columns', help="Query: comma-separated columns to read")
+    parser.add_argument('-o', '--output', help="Query: write the result to this .parquet/.csv file")
+    args = parser.parse_args(argv)
+    diseases = args.diseases or list(SCHEMAS)
+    unknown = sorted(set(diseases) - set(SCHEMAS))
+    if unknown:
+        parser.error(f"unknown disease(s): {', '.join(unknown)}; choose from {', '.join(SCHEMAS)}")
+
+    start = time.perf_counter()
+    if args.command == 'export':
+        store = HistoryStore(args.db)
+        try:
+            result = export(store, args.dir, diseases, args.format, args.full)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        for disease, (written, left_out) in result.items():
+            print(f"{disease}: {written} rows exported" + (f", {left_out} not matching the schema left out"
+                                                           if left_out else ""))
+        print(f"Exported to {args.dir} in {time.perf_counter() - start:.2f}s")
+        return 0
+
+    if len(diseases) != 1:
+        parser.error("query takes exactly one disease")
+    begin = datetime.now() - timedelta(days=args.days) if args.days else args.start
+    try:
+        table = query(args.dir, diseases[0], begin, args.end, args.columns.split(',') if args.columns else None)
+    except FileNotFoundError:
+        print(f"No {diseases[0]} export in {args.dir}; run `python history_export.py export` first", file=sys.stderr)
+        return 1
+    print(f"{diseases[0]}: {table.num_rows} rows in {time.perf_counter() - start:.2f}s")
+    if args.output:
+        if args.output.endswith('.csv'):
+            import pyarrow.csv
+            pyarrow.csv.write_csv(table, args.output)
+        else:
+            import pyarrow.parquet
+            pyarrow.parquet.write_table(table, args.output)
+        print(f"-> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
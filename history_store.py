@@ -0,0 +1,290 @@
+"""Durable prediction history in SQLite (WAL mode) with batched background writes.
+
+Predictions are queued by the request thread and written in batches by one
+writer thread, so saving a result never waits on the disk. Reads use keyset
+pagination over the primary key: a history page only touches the rows it
+shows, however many millions of predictions are stored.
+
+Every batch also updates running per-disease totals and hourly/daily
+rollups in the same transaction, so dashboard counts and trends over any
+time range read a handful of aggregate rows instead of the raw log. With a
+drift monitor (drift.py), the batch's inputs are folded into per-feature
+drift sketches in that transaction too.
+
+    store = HistoryStore('prediction_history.db')
+    store.append('Diabetes', [6, 148, ...], prediction=1)
+    rows, older = store.page(limit=25)
+"""
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta
+
+from drift import from_env as drift_monitor_from_env
+
+HISTORY_DB_ENV = 'PREDICTION_HISTORY_DB'
+HISTORY_DB = 'prediction_history.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    disease TEXT NOT NULL,
+    prediction INTEGER NOT NULL,
+    inputs TEXT NOT NULL,
+    model_version TEXT
+);
+CREATE INDEX IF NOT EXISTS predictions_timestamp ON predictions (timestamp);
+CREATE INDEX IF NOT EXISTS predictions_disease ON predictions (disease, id);
+CREATE TABLE IF NOT EXISTS rollups (
+    period TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    disease TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    positive INTEGER NOT NULL,
+    PRIMARY KEY (period, bucket, disease)
+);
+"""
+
+# Rollup periods and the ISO timestamp prefix that names each bucket;
+# 'all' holds the running totals per disease
+PERIODS = {'all': 0, 'day': 10, 'hour': 13}
+BUCKET_LENGTHS = {'day': timedelta(days=1), 'hour': timedelta(hours=1)}
+
+COLUMNS = ('id', 'timestamp', 'disease', 'prediction', 'inputs', 'model_version')
+
+
+class HistoryStore:
+    """Append-only prediction log with a background batch writer"""
+
+    def __init__(self, path=HISTORY_DB, batch_size=256, drift=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.drift = drift
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        if drift is not None:
+            drift.create(conn)
+        if conn.execute("SELECT NOT EXISTS (SELECT 1 FROM rollups) AND EXISTS (SELECT 1 FROM predictions)").fetchone()[0]:
+            self.rebuild_rollups()
+        self._writer = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, disease, inputs, prediction, timestamp=None, model_version=None):
+        """Queue one prediction for writing; returns immediately"""
+        if timestamp is None:
+            timestamp = datetime.now().isoformat()
+        self._queue.put((timestamp, disease, int(prediction), json.dumps(list(inputs)), model_version))
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Put the sentinel back so the loop exits after this batch
+                    self._queue.task_done()
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            try:
+                self._write_batch(conn, batch)
+            except Exception as e:
+                # Any failure drops this batch only: a dead writer would leave append() and flush() hanging
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                print(f"history: dropped {len(batch)} predictions: {type(e).__name__}: {e}", file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, conn, batch):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO predictions (timestamp, disease, prediction, inputs, model_version) "
+                             "VALUES (?, ?, ?, ?, ?)", batch)
+            conn.executemany("INSERT INTO rollups VALUES (?, ?, ?, ?, ?) "
+                             "ON CONFLICT (period, bucket, disease) DO UPDATE SET "
+                             "total = total + excluded.total, positive = positive + excluded.positive",
+                             _rollup_rows(batch))
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if self.drift is not None:
+            conn.execute("SAVEPOINT drift")
+            try:
+                self.drift.record(conn, batch)
+            except Exception as e:
+                # Drift is monitoring only: the predictions are saved regardless
+                conn.execute("ROLLBACK TO drift")
+                print(f"history: drift sketches not updated: {e}", file=sys.stderr)
+            conn.execute("RELEASE drift")
+        conn.execute("COMMIT")
+
+    def flush(self):
+        """Block until every queued prediction has been written"""
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def _where(self, disease=None, before_id=None):
+        clauses, params = [], []
+        if disease is not None:
+            clauses.append("disease = ?")
+            params.append(disease)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def page(self, limit=25, before_id=None, disease=None):
+        """Newest predictions older than before_id, and whether more older rows exist"""
+        where, params = self._where(disease, before_id)
+        rows = self._connect().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM predictions{where} ORDER BY id DESC LIMIT ?",
+            params + [limit + 1]).fetchall()
+        records = [dict(zip(COLUMNS, row)) for row in rows[:limit]]
+        for record in records:
+            record['inputs'] = json.loads(record['inputs'])
+        return records, len(rows) > limit
+
+    def scan(self, disease, after_id=0, limit=100000):
+        """Raw (id, timestamp, prediction, inputs JSON, model_version) rows of one disease, oldest first"""
+        return self._connect().execute(
+            "SELECT id, timestamp, prediction, inputs, model_version FROM predictions "
+            "WHERE disease = ? AND id > ? ORDER BY id LIMIT ?", (disease, after_id, limit)).fetchall()
+
+    def counts(self, disease=None):
+        """Total, positive and negative prediction counts, from the running totals"""
+        where, params = ("AND disease = ?", [disease]) if disease is not None else ("", [])
+        total, positive = self._connect().execute(
+            f"SELECT COALESCE(SUM(total), 0), COALESCE(SUM(positive), 0) FROM rollups "
+            f"WHERE period = 'all' {where}", params).fetchone()
+        return {'total': total, 'positive': positive, 'negative': total - positive}
+
+    def counts_by_disease(self):
+        """{disease: {'total', 'positive', 'negative'}} from the running totals"""
+        rows = self._connect().execute(
+            "SELECT disease, total, positive FROM rollups WHERE period = 'all' ORDER BY disease")
+        return {disease: {'total': total, 'positive': positive, 'negative': total - positive}
+                for disease, total, positive in rows}
+
+    def rollups(self, period='day', start=None, end=None, disease=None):
+        """Per-bucket totals and positive counts for start <= time < end (ISO strings or datetimes)
+
+        Buckets are summed over diseases unless one disease is given.
+        """
+        width = PERIODS[period]
+        clauses, params = ["period = ?"], [period]
+        if start is not None:
+            clauses.append("bucket >= ?")
+            params.append(_bucket(start, width))
+        if end is not None:
+            clauses.append("bucket < ?")
+            params.append(_bucket(end, width))
+        if disease is not None:
+            clauses.append("disease = ?")
+            params.append(disease)
+        rows = self._connect().execute(
+            f"SELECT bucket, SUM(total), SUM(positive) FROM rollups WHERE {' AND '.join(clauses)} "
+            f"GROUP BY bucket ORDER BY bucket", params)
+        return [{'bucket': bucket, 'total': total, 'positive': positive,
+                 'positive_rate': positive / total if total else 0.0}
+                for bucket, total, positive in rows]
+
+    def positive_rate(self, window=timedelta(days=7), period='day', disease=None, now=None):
+        """Share of positive predictions over the trailing window, from the rollups
+
+        The window is counted in whole buckets, the current one included: with
+        the defaults, today and the six days before it. A window that is not a
+        multiple of the bucket length is rounded up to one.
+        """
+        if period not in BUCKET_LENGTHS:
+            raise ValueError(f"Rolling windows need a 'day' or 'hour' period, got {period!r}")
+        now = now or datetime.now()
+        length = BUCKET_LENGTHS[period]
+        count = -(-window // length)
+        buckets = self.rollups(period, start=now - (count - 1) * length, end=now + length, disease=disease)
+        total = sum(b['total'] for b in buckets)
+        return sum(b['positive'] for b in buckets) / total if total else 0.0
+
+    def rebuild_rollups(self):
+        """Recompute every rollup from the raw log (after an upgrade or manual edits)"""
+        self.flush()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM rollups")
+        for period, width in PERIODS.items():
+            bucket = f"substr(timestamp, 1, {width})" if width else "''"
+            conn.execute(f"INSERT INTO rollups SELECT ?, {bucket}, disease, COUNT(*), SUM(prediction = 1) "
+                         f"FROM predictions GROUP BY {bucket}, disease", (period,))
+        conn.execute("COMMIT")
+
+    def drift_report(self, days=None, diseases=None):
+        """Per-feature input drift of each disease against its training data (see drift.py)"""
+        if self.drift is None:
+            return {}
+        return self.drift.report(self._connect(), days, diseases)
+
+    def diseases(self):
+        return [row[0] for row in self._connect().execute("SELECT DISTINCT disease FROM predictions ORDER BY disease")]
+
+    def clear(self):
+        self.flush()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM predictions")
+        conn.execute("DELETE FROM rollups")
+        if self.drift is not None:
+            self.drift.clear(conn)
+        conn.execute("COMMIT")
+
+
+def _bucket(time, width):
+    if isinstance(time, datetime):
+        time = time.isoformat()
+    return time[:width]
+
+
+def _rollup_rows(batch):
+    # One upsert per (period, bucket, disease) touched by the batch
+    totals = {}
+    for timestamp, disease, prediction, _, _ in batch:
+        for period, width in PERIODS.items():
+            counts = totals.setdefault((period, timestamp[:width], disease), [0, 0])
+            counts[0] += 1
+            counts[1] += prediction == 1
+    return [key + tuple(counts) for key, counts in totals.items()]
+
+
+def from_env():
+    """History store at $PREDICTION_HISTORY_DB, or prediction_history.db in the working directory,
+    monitoring input drift when drift references have been built"""
+    return HistoryStore(os.environ.get(HISTORY_DB_ENV, HISTORY_DB), drift=drift_monitor_from_env())
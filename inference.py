@@ -0,0 +1,533 @@
+"""Pure-NumPy inference kernels for the linear and SVC disease models.
+
+The fitted parameters are pulled out of a scikit-learn estimator (or the model
+store) once. Scoring is then a dot product for the LogisticRegression and
+linear-SVC models and one kernel matrix for an RBF/poly/sigmoid SVC. This
+skips sklearn's per-call input validation, so a single row takes
+microseconds and a batch runs at BLAS speed.
+
+Parameters can also be stored at reduced precision (reduce_precision): float32
+arrays, or int8 support vectors with a per-feature scale and offset. Those
+kernels compute in float32, which halves the kernel matrix and the parameter
+bytes streamed per prediction.
+
+    python inference.py --check     # parity of the shipped models against sklearn
+    python -m pytest tests          # parity on models fitted in the tests
+"""
+import argparse
+import hashlib
+import json
+import math
+import sys
+import warnings
+
+import numpy as np
+
+# Storage precisions of exported parameters; float32 and int8 variants are computed in float32
+PRECISIONS = ('float64', 'float32', 'int8')
+# Arrays stored as int8 codes in an int8 variant: one scale and offset per feature (column)
+QUANTIZED = ('support_vectors',)
+
+
+def extract_params(model, scaler=None):
+    """Pull the fitted parameters of a binary LogisticRegression or SVC into plain arrays
+
+    A StandardScaler, passed explicitly or as leading steps of a sklearn
+    Pipeline, is folded into the parameters so the result scores raw inputs.
+    """
+    if type(model).__name__ == 'Pipeline':
+        *preprocessing, (_, final) = model.steps
+        meta, arrays = extract_params(final)
+        for _, step in reversed(preprocessing):
+            if step is None or step == 'passthrough':
+                continue
+            if type(step).__name__ != 'StandardScaler':
+                raise ValueError(f"Unsupported pipeline step: {type(step).__name__}")
+            meta, arrays = fold_scaler(meta, arrays, step.mean_, step.scale_)
+        meta['source'] = f"Pipeline({meta['source']})"
+    elif scaler is not None:
+        meta, arrays = extract_params(model)
+        meta, arrays = fold_scaler(meta, arrays, scaler.mean_, scaler.scale_)
+    else:
+        return _extract_estimator(model)
+    return meta, arrays
+
+
+def _extract_estimator(model):
+    classes = np.asarray(model.classes_)
+    if len(classes) != 2:
+        raise ValueError(f"Only binary classifiers are supported, got {len(classes)} classes")
+    meta = {'classes': classes.tolist(), 'link': None}
+    name = type(model).__name__
+
+    if name == 'SVC':
+        prob_a = np.ravel(getattr(model, '_probA', ()))
+        if prob_a.size:
+            # Fitted with probability=True: keep the Platt scaling coefficients
+            meta['link'] = 'platt'
+            meta['prob_a'] = float(prob_a[0])
+            meta['prob_b'] = float(np.ravel(model._probB)[0])
+            # predict_proba runs libsvm's pairwise coupling on top of the sigmoid
+            meta['coupling'] = 'libsvm'
+        if model.kernel == 'linear':
+            # A linear kernel collapses to a single weight vector
+            arrays = {'coef': np.ravel(model.coef_), 'intercept': np.ravel(model.intercept_)}
+            return dict(meta, kind='linear', source=name), arrays
+        if model.kernel not in ('rbf', 'poly', 'sigmoid'):
+            raise ValueError(f"Unsupported SVC kernel: {model.kernel}")
+        meta.update(kind='svc', source=name, kernel=model.kernel, gamma=float(model._gamma),
+                    coef0=float(model.coef0), degree=int(model.degree))
+        arrays = {
+            'support_vectors': np.asarray(model.support_vectors_, dtype=np.float64),
+            'dual_coef': np.ravel(model.dual_coef_),
+            'intercept': np.ravel(model.intercept_),
+        }
+        return meta, arrays
+
+    if hasattr(model, 'coef_') and hasattr(model, 'intercept_'):
+        if hasattr(model, 'predict_proba'):
+            meta['link'] = 'logistic'
+        arrays = {'coef': np.ravel(model.coef_), 'intercept': np.ravel(model.intercept_)}
+        return dict(meta, kind='linear', source=name), arrays
+
+    raise ValueError(f"Unsupported model type: {name}")
+
+
+class Kernel:
+    """Shared predict/predict_proba on top of a subclass's decision function"""
+
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.version = self._base_version = meta.get('version')
+        self.disease = None
+        # Labels are decision > cutoff (the estimator's own rule), or decision >= cutoff once
+        # set_threshold() has moved it, matching "probability >= threshold" (see _positive)
+        self.threshold = None
+        self.cutoff = 0.0
+        self.classes_ = np.asarray(meta['classes'])
+        self.probability = meta['link'] is not None
+        self._link = meta['link']
+        self._prob_a = meta.get('prob_a', 0.0)
+        self._prob_b = meta.get('prob_b', 0.0)
+        self._coupled = meta.get('coupling') == 'libsvm'
+        self.intercept = float(arrays['intercept'][0])
+        self.precision = meta.get('precision', 'float64')
+        self.dtype = np.float64 if self.precision == 'float64' else np.float32
+        # Reference input for explanations: the training mean, stored at export or folded in with a scaler
+        self.baseline = np.asarray(meta['baseline'], dtype=np.float64) if meta.get('baseline') else None
+
+    def _positive_rate(self, d):
+        if self._link == 'platt':
+            # libsvm's sigmoid, written for the sign of sklearn's decision_function
+            return 1.0 / (1.0 + np.exp(self._prob_a * d - self._prob_b))
+        return 1.0 / (1.0 + np.exp(-d))
+
+    def set_threshold(self, threshold):
+        """Label as positive when the positive-class probability is >= threshold (None: the model's own rule)
+
+        The threshold is mapped once to a cut-off on the decision value, so
+        predict() costs the same. SVCs fitted with probability=True are the
+        exception: libsvm's coupled probability is not monotone in the
+        decision value, so their labels compare that probability itself. The
+        threshold becomes part of the version, so cached and recorded labels
+        never mix thresholds.
+        """
+        if threshold is None:
+            self.threshold, self.cutoff, self.version = None, 0.0, self._base_version
+            return self
+        if not self.probability:
+            raise ValueError("A probability threshold needs a model with probability estimates; calibrate it first")
+        if not 0.0 < threshold < 1.0:
+            raise ValueError(f"Threshold must be between 0 and 1, got {threshold}")
+        log_odds = math.log(threshold / (1.0 - threshold))
+        if self._link == 'platt':
+            if self._prob_a >= 0:
+                raise ValueError("Platt scaling does not increase with the decision value")
+            # 1 / (1 + exp(a d - b)) >= t  <=>  a d - b <= -log_odds  <=>  d >= (b - log_odds) / a, as a < 0
+            self.cutoff = (-log_odds + self._prob_b) / self._prob_a
+        else:
+            self.cutoff = log_odds
+        self.threshold = float(threshold)
+        self.version = f"{self._base_version}+t{threshold:g}"
+        return self
+
+    def _positive(self, d):
+        if self.threshold is None:
+            return d > self.cutoff
+        if self._coupled:
+            # The coupling iteration stops at a tolerance, so its output can step back as d grows
+            return libsvm_coupling(self._positive_rate(np.asarray(d)))[1] >= self.threshold
+        return d >= self.cutoff
+
+    def predict(self, X):
+        return self.classes_[self._positive(self.decision_function(X)).astype(np.intp)]
+
+    def predict_proba(self, X):
+        if not self.probability:
+            raise AttributeError("Model was fitted without probability estimates")
+        p = self._positive_rate(self.decision_function(X))
+        if self._coupled:
+            return np.column_stack(libsvm_coupling(p))
+        return np.column_stack([1.0 - p, p])
+
+    def predict_one(self, row):
+        """(label, probability of the positive class or None) for one 1-D row"""
+        d = self.decision_one(row)
+        label = self.classes_[1] if self._positive(d) else self.classes_[0]
+        if not self.probability:
+            return label, None
+        if self._coupled:
+            return label, float(libsvm_coupling(np.array([self._positive_rate(d)]))[1][0])
+        if self._link == 'platt':
+            return label, 1.0 / (1.0 + math.exp(self._prob_a * d - self._prob_b))
+        return label, 1.0 / (1.0 + math.exp(-d))
+
+
+class LinearKernel(Kernel):
+    """w·x + b for LogisticRegression and linear-kernel SVC"""
+
+    def __init__(self, meta, arrays):
+        super().__init__(meta, arrays)
+        self.coef = np.ascontiguousarray(arrays['coef'], dtype=self.dtype)
+        self.n_features_in_ = self.coef.shape[0]
+
+    def decision_function(self, X):
+        return np.asarray(np.asarray(X, dtype=self.dtype) @ self.coef, dtype=np.float64) + self.intercept
+
+    def decision_one(self, row):
+        return float(np.dot(self.coef, row)) + self.intercept
+
+    def decision_gradient(self, X):
+        return np.broadcast_to(self.coef, np.shape(np.atleast_2d(X)))
+
+
+class SVCKernel(Kernel):
+    """sum_i alpha_i K(sv_i, x) + b for RBF, polynomial and sigmoid SVC
+
+    A folded StandardScaler shows up as per-feature weights on the RBF
+    distance, or as a per-support-vector offset on the poly/sigmoid dot product.
+    Reduced-precision RBF variants store their support vectors relative to
+    sv_center, so float32 distances are not lost to cancellation in
+    |x|^2 - 2 x.v + |v|^2 when the inputs are far from zero.
+    """
+
+    def __init__(self, meta, arrays):
+        super().__init__(meta, arrays)
+        self.kernel = meta['kernel']
+        self.gamma = meta['gamma']
+        self.coef0 = meta['coef0']
+        self.degree = meta['degree']
+        self.support_vectors = np.ascontiguousarray(arrays['support_vectors'], dtype=self.dtype)
+        self.dual_coef = np.ascontiguousarray(arrays['dual_coef'], dtype=self.dtype)
+        self.n_features_in_ = self.support_vectors.shape[1]
+        self.feature_weights = arrays.get('feature_weights')
+        self.sv_offset = arrays.get('sv_offset')
+        self.sv_center = arrays.get('sv_center')
+        weighted = self.support_vectors
+        if self.feature_weights is not None:
+            weighted = self.support_vectors * self.feature_weights
+        self._sv_weighted = np.ascontiguousarray(weighted)
+        self._sv_sq_norms = np.einsum('ij,ij->i', self.support_vectors, weighted)
+
+    def _kernel_matrix(self, X):
+        dots = X @ self._sv_weighted.T
+        if self.kernel == 'rbf':
+            x_sq = X * X
+            x_sq_norms = x_sq @ self.feature_weights if self.feature_weights is not None else x_sq.sum(axis=1)
+            sq_dist = x_sq_norms[:, None] - 2.0 * dots + self._sv_sq_norms
+            return np.exp(-self.gamma * np.maximum(sq_dist, 0.0))
+        if self.sv_offset is not None:
+            dots += self.sv_offset
+        if self.kernel == 'poly':
+            return (self.gamma * dots + self.coef0) ** self.degree
+        return np.tanh(self.gamma * dots + self.coef0)
+
+    def _prepare(self, X):
+        # Rows in the stored precision, moved into the support vectors' frame
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if self.sv_center is not None:
+            X = X - self.sv_center
+        return X.astype(self.dtype, copy=False)
+
+    def decision_function(self, X):
+        decision = self._kernel_matrix(self._prepare(X)) @ self.dual_coef
+        return np.asarray(decision, dtype=np.float64) + self.intercept
+
+    def decision_one(self, row):
+        return float(self.decision_function(row)[0])
+
+    def decision_gradient(self, X):
+        """d decision / dx for every row, from the same kernel matrix as decision_function"""
+        X = self._prepare(X)
+        if self.kernel == 'rbf':
+            # d/dx_j sum_i a_i exp(-g sum_j w_j (x_j - v_ij)^2) = -2g w_j sum_i a_i K_i (x_j - v_ij)
+            weighted = self._kernel_matrix(X) * self.dual_coef
+            gradient = -2.0 * self.gamma * (weighted.sum(axis=1)[:, None] * X - weighted @ self.support_vectors)
+            if self.feature_weights is not None:
+                gradient *= self.feature_weights
+            return gradient
+        dots = X @ self._sv_weighted.T
+        if self.sv_offset is not None:
+            dots += self.sv_offset
+        inner = self.gamma * dots + self.coef0
+        if self.kernel == 'poly':
+            slope = self.degree * self.gamma * inner ** (self.degree - 1)
+        else:
+            slope = self.gamma * (1.0 - np.tanh(inner) ** 2)
+        return (slope * self.dual_coef) @ self._sv_weighted
+
+
+def libsvm_coupling(p, max_iter=100):
+    """(negative, positive) class probabilities as libsvm reports them for Platt probabilities p
+
+    libsvm does not return the sigmoid itself: it feeds it to its multi-class
+    coupling iteration, which for two classes stops once the error is below
+    0.005 / 2 and so ends up to a few 1e-3 away from p. This is the same
+    iteration, run on all rows at once.
+    """
+    min_prob = 1e-7
+    # r: probability of the negative class against the positive one, clipped as libsvm does
+    r = np.clip(1.0 - np.asarray(p, dtype=np.float64), min_prob, 1.0 - min_prob)
+    q = 1.0 - r
+    Q = ((q * q, -r * q), (-r * q, r * r))
+    estimate = [np.full_like(r, 0.5), np.full_like(r, 0.5)]
+    active = np.ones(r.shape, dtype=bool)
+    for _ in range(max_iter):
+        Qp = [Q[t][0] * estimate[0] + Q[t][1] * estimate[1] for t in range(2)]
+        pQp = estimate[0] * Qp[0] + estimate[1] * Qp[1]
+        active &= np.maximum(np.abs(Qp[0] - pQp), np.abs(Qp[1] - pQp)) >= 0.005 / 2
+        if not active.any():
+            break
+        for t in range(2):
+            # Rows that have converged take a zero step
+            diff = np.where(active, (pQp - Qp[t]) / Q[t][t], 0.0)
+            estimate[t] = estimate[t] + diff
+            pQp = (pQp + diff * (diff * Q[t][t] + 2.0 * Qp[t])) / (1.0 + diff) / (1.0 + diff)
+            for j in range(2):
+                Qp[j] = (Qp[j] + diff * Q[t][j]) / (1.0 + diff)
+                estimate[j] = estimate[j] / (1.0 + diff)
+    return estimate[0], estimate[1]
+
+
+def fit_platt(decision, y, max_iter=100):
+    """Platt scaling of decision values against 0/1 labels: (prob_a, prob_b) for the 'platt' link
+
+    Newton's method with the regularized targets of Lin, Lin & Weng (2007),
+    as in libsvm. The result plugs into meta as link='platt', so an SVC fitted
+    without probability=True still gets calibrated probabilities.
+    """
+    f = np.asarray(decision, dtype=np.float64)
+    y = np.asarray(y) == 1
+    n_pos = int(y.sum())
+    n_neg = len(y) - n_pos
+    t = np.where(y, (n_pos + 1.0) / (n_pos + 2.0), 1.0 / (n_neg + 2.0))
+    a, b = 0.0, math.log((n_neg + 1.0) / (n_pos + 1.0))
+    sigma, min_step, eps = 1e-12, 1e-10, 1e-5
+
+    def objective(a, b):
+        z = f * a + b
+        # Negative log-likelihood of t under p = 1 / (1 + exp(z)), without overflow
+        return float(np.sum(np.logaddexp(0.0, z) - (1.0 - t) * z))
+
+    value = objective(a, b)
+    for _ in range(max_iter):
+        z = f * a + b
+        p = np.exp(-np.logaddexp(0.0, z))          # 1 / (1 + exp(z))
+        q = 1.0 - p
+        d2 = p * q
+        h11 = sigma + np.dot(f * f, d2)
+        h22 = sigma + d2.sum()
+        h21 = np.dot(f, d2)
+        d1 = t - p
+        g1, g2 = np.dot(f, d1), d1.sum()
+        if abs(g1) < eps and abs(g2) < eps:
+            break
+        det = h11 * h22 - h21 * h21
+        da = -(h22 * g1 - h21 * g2) / det
+        db = -(-h21 * g1 + h11 * g2) / det
+        gd = g1 * da + g2 * db
+        step = 1.0
+        while step >= min_step:
+            new_value = objective(a + step * da, b + step * db)
+            if new_value < value + 1e-4 * step * gd:
+                a, b, value = a + step * da, b + step * db, new_value
+                break
+            step /= 2.0
+        else:
+            break
+    # libsvm's p = 1 / (1 + exp(A f + B)); the kernels write exp(prob_a d - prob_b)
+    return {'link': 'platt', 'prob_a': float(a), 'prob_b': float(-b)}
+
+
+def fold_scaler(meta, arrays, mean, scale):
+    """Fold x' = (x - mean) / scale into the parameters so raw inputs can be scored directly"""
+    n_features = arrays['coef' if meta['kind'] == 'linear' else 'support_vectors'].shape[-1]
+    mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+    scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+    arrays = dict(arrays)
+
+    if meta['kind'] == 'linear':
+        coef = arrays['coef'] / scale
+        arrays['intercept'] = arrays['intercept'] - coef @ mean
+        arrays['coef'] = coef
+    elif meta['kernel'] == 'rbf':
+        # sum_j w_j ((x_j - m_j) / s_j - v_j)^2 == sum_j (w_j / s_j^2) (x_j - (m_j + s_j v_j))^2
+        weights = arrays.get('feature_weights', np.ones(n_features))
+        arrays['support_vectors'] = mean + scale * arrays['support_vectors']
+        arrays['feature_weights'] = weights / scale ** 2
+    else:
+        # ((x - m) / s) . v + c == x . (v / s) + (c - m . (v / s))
+        support_vectors = arrays['support_vectors'] / scale
+        offset = arrays.get('sv_offset', np.zeros(len(support_vectors)))
+        arrays['sv_offset'] = offset - support_vectors @ mean
+        arrays['support_vectors'] = support_vectors
+
+    steps = meta.get('preprocessing', [])
+    return dict(meta, preprocessing=['standard_scaler'] + steps, baseline=mean.tolist()), arrays
+
+
+def params_version(meta, arrays):
+    """Short content hash of a model's parameters, used as its version"""
+    digest = hashlib.sha256(json.dumps(meta, sort_keys=True).encode('utf-8'))
+    for key in sorted(arrays):
+        digest.update(key.encode('utf-8'))
+        digest.update(np.ascontiguousarray(arrays[key], dtype=np.float64).tobytes())
+    return digest.hexdigest()[:12]
+
+
+def reduce_precision(meta, arrays, precision):
+    """Parameters stored at a lower precision: float32 arrays, plus int8 codes for the support vectors
+
+    The intercept stays float64. Float32 RBF support vectors are stored
+    relative to their mean (sv_center); an int8 code q stands for
+    offset + scale * q, with one scale and offset per feature.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision {precision!r}; choose from {', '.join(PRECISIONS)}")
+    if meta.get('precision', 'float64') != 'float64':
+        raise ValueError(f"Parameters are already stored as {meta['precision']}")
+    if precision == 'int8' and not any(key in arrays for key in QUANTIZED):
+        raise ValueError(f"A {meta['kind']} model has no support vectors to quantize; use float32")
+    arrays = {key: np.asarray(array, dtype=np.float64) for key, array in arrays.items()}
+    if precision == 'float64':
+        return dict(meta), arrays
+    if meta['kind'] == 'svc' and meta['kernel'] == 'rbf':
+        center = arrays['support_vectors'].mean(axis=0)
+        arrays['support_vectors'] = arrays['support_vectors'] - center
+        arrays['sv_center'] = center
+    reduced = {}
+    for key, array in arrays.items():
+        if key in ('intercept', 'sv_center'):
+            reduced[key] = array
+        elif precision == 'int8' and key in QUANTIZED:
+            low, high = array.min(axis=0), array.max(axis=0)
+            offset = (low + high) / 2.0
+            scale = np.maximum((high - low) / 254.0, np.finfo(np.float32).tiny)
+            reduced[key] = np.round((array - offset) / scale).astype(np.int8)
+            reduced[f"{key}_scale"] = scale.astype(np.float32)
+            reduced[f"{key}_offset"] = offset.astype(np.float32)
+        else:
+            reduced[key] = array.astype(np.float32)
+    return dict(meta, precision=precision), reduced
+
+
+def _dequantize(meta, arrays):
+    # int8 codes back to the float32 arrays the kernels compute with
+    if meta.get('precision') != 'int8':
+        return arrays
+    arrays = dict(arrays)
+    for key in QUANTIZED:
+        if f"{key}_scale" in arrays:
+            codes = np.asarray(arrays[key], dtype=np.float32)
+            arrays[key] = arrays.pop(f"{key}_offset") + arrays.pop(f"{key}_scale") * codes
+    return arrays
+
+
+def from_params(meta, arrays):
+    """Build the kernel for parameters from extract_params() or the model store"""
+    arrays = _dequantize(meta, arrays)
+    if meta['kind'] == 'linear':
+        return LinearKernel(meta, arrays)
+    if meta['kind'] == 'svc':
+        return SVCKernel(meta, arrays)
+    raise ValueError(f"Unknown model kind: {meta['kind']}")
+
+
+def compile_model(model, scaler=None):
+    """Kernel equivalent of a fitted estimator; unsupported estimators are returned unchanged"""
+    if isinstance(model, Kernel):
+        return model
+    try:
+        meta, arrays = extract_params(model, scaler)
+    except (AttributeError, ValueError):
+        return model
+    return from_params(dict(meta, version=params_version(meta, arrays)), arrays)
+
+
+def check_parity(model, kernel, X, atol=1e-9):
+    """Compare labels, decision values and probabilities of a kernel against its sklearn model"""
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        expected_labels = model.predict(X)
+        expected_decision = model.decision_function(X)
+        expected_proba = model.predict_proba(X) if kernel.probability else None
+    result = {
+        'rows': len(X),
+        'label_mismatches': int((kernel.predict(X) != expected_labels).sum()),
+        'max_decision_error': float(np.abs(kernel.decision_function(X) - expected_decision).max()),
+        'max_proba_error': None,
+    }
+    if expected_proba is not None:
+        result['max_proba_error'] = float(np.abs(kernel.predict_proba(X) - expected_proba).max())
+    single = [kernel.predict_one(row)[0] for row in X[:100]]
+    result['label_mismatches'] += int((np.asarray(single) != expected_labels[:100]).sum())
+    result['ok'] = (result['label_mismatches'] == 0 and result['max_decision_error'] <= atol
+                    and (result['max_proba_error'] is None or result['max_proba_error'] <= atol))
+    return result
+
+
+def sample_inputs(schema, n_rows, seed=0):
+    """Random rows spread over each field's range (category fields get valid codes)"""
+    rng = np.random.default_rng(seed)
+    upper = np.where(np.isfinite(schema.upper), schema.upper, schema.lower + 1000.0)
+    X = rng.uniform(schema.lower, upper, size=(n_rows, schema.n_features))
+    X[:, schema.categorical_mask] = np.round(X[:, schema.categorical_mask])
+    return X
+
+
+def main(argv=None):
+    from disease_models import MODEL_FILES, MODELS_DIR, load_pickled_model
+    from feature_schema import SCHEMAS
+
+    parser = argparse.ArgumentParser(description="Check the NumPy kernels against the sklearn models")
+    parser.add_argument('--check', action='store_true', required=True)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--atol', type=float, default=1e-9)
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    args = parser.parse_args(argv)
+
+    status = 0
+    checked = 0
+    for disease in MODEL_FILES:
+        try:
+            model = load_pickled_model(disease, args.models_dir)
+        except FileNotFoundError:
+            print(f"{disease}: model file not found, skipped")
+            continue
+        kernel = compile_model(model)
+        if kernel is model:
+            print(f"{disease}: {type(model).__name__} has no NumPy kernel, sklearn is used")
+            continue
+        result = check_parity(model, kernel, sample_inputs(SCHEMAS[disease], args.rows), args.atol)
+        print(f"{disease}: {'OK' if result['ok'] else 'MISMATCH'} {result}")
+        status |= not result['ok']
+        checked += 1
+    if not checked:
+        # Nothing was compared: do not report success (tests/test_inference.py needs no model files)
+        print(f"No pickled models in {args.models_dir} to check", file=sys.stderr)
+        return 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
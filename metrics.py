@@ -0,0 +1,242 @@
+"""Low-overhead timing histograms and counters in the Prometheus text format.
+
+A timed stage costs two perf_counter() calls, one bisect and one short
+lock (a few microseconds), so instrumentation can stay on in production.
+Stages are recorded per disease:
+
+    @timed('display_result')
+    def display_prediction_result(...): ...
+
+    with timer('predict', disease='heart_disease'):
+        model.predict(X)
+
+Metrics are served on ``GET /metrics`` by api_server.py. The Streamlit apps
+start their own scrape endpoint on $METRICS_PORT, or rewrite $METRICS_FILE
+every few seconds (node-exporter textfile style).
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT_ENV = 'METRICS_PORT'
+METRICS_FILE_ENV = 'METRICS_FILE'
+PREFIX = 'disease_prediction_'
+
+# Upper bounds (seconds) of the latency buckets: 50µs to 10s
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Counters, histograms and callback gauges keyed by metric name and label values"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._help = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def _record_stage(self, key, seconds, failed):
+        # Hot path of timer(): one lock for the histogram and the error counter
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+            if failed:
+                error_key = ('stage_errors_total', key[1])
+                self._counters[error_key] = self._counters.get(error_key, 0) + 1
+
+    def gauge(self, name, fn, help=None, **labels):
+        """Report fn() as a gauge at every scrape"""
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = fn
+            if help:
+                self._help[name] = help
+
+    def describe(self, name, help):
+        self._help[name] = help
+
+    def snapshot(self):
+        """Plain-dict copy of every metric, for JSON output"""
+        with self._lock:
+            return {
+                'counters': {_series(name, labels): value for (name, labels), value in self._counters.items()},
+                'histograms': {_series(name, labels): {'count': h.count, 'sum': h.sum}
+                               for (name, labels), h in self._histograms.items()},
+            }
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(h.counts), h.sum, h.count, h.buckets)
+                                for key, h in self._histograms.items())
+            gauges = sorted(self._gauges.items(), key=lambda item: item[0])
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {PREFIX}{name} {self._help[name]}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, 'counter')
+            lines.append(f"{PREFIX}{_series(name, labels)} {value}")
+        for (name, labels), counts, total, count, buckets in histograms:
+            header(name, 'histogram')
+            cumulative = 0
+            for upper, n in zip(buckets + ('+Inf',), counts):
+                cumulative += n
+                lines.append(f"{PREFIX}{_series(name + '_bucket', labels + (('le', upper),))} {cumulative}")
+            lines.append(f"{PREFIX}{_series(name + '_sum', labels)} {total}")
+            lines.append(f"{PREFIX}{_series(name + '_count', labels)} {count}")
+        for (name, labels), fn in gauges:
+            try:
+                value = fn()
+            except Exception:
+                continue
+            header(name, 'gauge')
+            lines.append(f"{PREFIX}{_series(name, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    pairs = ",".join(f'{key}="{value}"' for key, value in labels)
+    return f"{name}{{{pairs}}}"
+
+
+REGISTRY = Registry()
+REGISTRY.describe('stage_seconds', "Time spent in each stage of the prediction flow")
+REGISTRY.describe('stage_errors_total', "Calls per stage that raised")
+REGISTRY.describe('predictions_total', "Predictions made, by disease and result")
+
+
+class timer:
+    """Record the duration of a with-block under stage_seconds{stage, disease}"""
+
+    __slots__ = ('key', 'registry', 'start')
+
+    def __init__(self, stage, disease='', registry=REGISTRY):
+        self.key = ('stage_seconds', (('disease', disease), ('stage', stage)))
+        self.registry = registry
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry._record_stage(self.key, time.perf_counter() - self.start, exc_type is not None)
+        return False
+
+
+def timed(stage, disease='', registry=REGISTRY):
+    """Decorator form of timer(); disease may be a callable taking the wrapped function's arguments"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            label = disease(*args, **kwargs) if callable(disease) else disease
+            with timer(stage, label, registry):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the registry on GET /metrics"""
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host='0.0.0.0', registry=REGISTRY):
+    """Serve /metrics from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+def write_file(path, registry=REGISTRY):
+    """Atomically replace path with the current metrics"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+
+
+def start_file_writer(path, interval=5.0, registry=REGISTRY):
+    """Rewrite the metrics file every interval seconds from a daemon thread"""
+    def loop():
+        while True:
+            time.sleep(interval)
+            write_file(path, registry)
+
+    thread = threading.Thread(target=loop, name='metrics-file', daemon=True)
+    thread.start()
+    return thread
+
+
+def start_exporters_from_env(registry=REGISTRY):
+    """Start the /metrics endpoint on $METRICS_PORT and/or the file writer for $METRICS_FILE"""
+    started = {}
+    port = os.environ.get(METRICS_PORT_ENV)
+    if port:
+        try:
+            started['http'] = start_http_server(int(port), registry=registry)
+        except OSError:
+            # Another worker on this host already serves the port
+            pass
+    path = os.environ.get(METRICS_FILE_ENV)
+    if path:
+        started['file'] = start_file_writer(path, registry=registry)
+    return started
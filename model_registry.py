@@ -0,0 +1,226 @@
+"""Hot reload and A/B serving of the disease models.
+
+ModelRegistry is the same dict-like view as disease_models.load_models,
+plus a daemon thread that polls the model sources every few seconds: the
+store manifest entry of each disease (its content version) or, for models
+not in the store, the .sav file's size and mtime, along with the disease's
+threshold (scoring.py). When a source changes the new model is loaded
+completely in the background and only then swapped in with a single
+reference assignment, so a request that already holds a model keeps scoring
+with it and no request ever sees a half-loaded one.
+
+A candidate version from the store (``python train.py thyroid --candidate``)
+can take a share of the traffic next to the stable model:
+
+    MODEL_CANDIDATES="thyroid=1f2e3d4c5b6a@0.1"   # 10% of sessions
+
+Routing hashes a caller key (e.g. the session id), so one user keeps seeing
+the same version. Every model carries its version, and the app records it
+with each history entry, tagged ``@candidate`` for candidate traffic.
+"""
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+
+from disease_models import MODELS_DIR, MODEL_FILES, load_model, model_path, with_baseline
+from feature_schema import SCHEMAS
+from inference import sample_inputs
+from metrics import REGISTRY, timer
+from model_store import LazyModels, load_stored_version, precision_for, read_manifest, served_version
+from scoring import apply_threshold, load_thresholds
+
+POLL_SECONDS_ENV = 'MODEL_POLL_SECONDS'
+CANDIDATES_ENV = 'MODEL_CANDIDATES'
+DEFAULT_POLL_SECONDS = 10.0
+CANDIDATE_TAG = '@candidate'
+
+REGISTRY.describe('model_swaps_total', "Models replaced by a newer version without a restart")
+
+
+class ModelRegistry(LazyModels):
+    """Lazily loaded disease models that follow changes on disk and can split traffic with candidates"""
+
+    def __init__(self, models_dir=MODELS_DIR, on_error=None, poll_seconds=DEFAULT_POLL_SECONDS):
+        super().__init__(self._load, MODEL_FILES, on_error)
+        self.models_dir = models_dir
+        self.store_dir = os.path.join(models_dir, 'store')
+        self._signatures = {}
+        self._rejected = {}
+        self._candidates = {}
+        self._manifest = (None, None)
+        self._stop = threading.Event()
+        self._thread = None
+        if poll_seconds:
+            self.start(poll_seconds)
+
+    # Sources
+
+    def _read_manifest(self):
+        # Re-parse the manifest only when the file itself changed
+        path = os.path.join(self.store_dir, 'manifest.json')
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {'models': {}}
+        if self._manifest[0] != mtime:
+            self._manifest = (mtime, read_manifest(self.store_dir))
+        return self._manifest[1]
+
+    def signature(self, disease):
+        """What the next load of a disease would read: a store version, or the .sav file's size and
+        mtime; plus the disease's threshold"""
+        threshold = load_thresholds(self.models_dir).get(disease)
+        entry = self._read_manifest()['models'].get(disease)
+        if entry is not None:
+            return ('store', served_version(entry, precision_for(disease)), threshold)
+        try:
+            st = os.stat(model_path(disease, self.models_dir))
+        except FileNotFoundError:
+            return None
+        return ('sav', st.st_size, st.st_mtime_ns, threshold)
+
+    def _load(self, disease):
+        # Take the signature first: a change during the load is picked up by the next poll
+        self._signatures[disease] = self.signature(disease)
+        with timer('model_load', disease):
+            return load_model(disease, self.models_dir)
+
+    # Reloading
+
+    def refresh(self, disease):
+        """Reload one disease if its source changed; True when a new model was swapped in"""
+        signature = self.signature(disease)
+        if signature is None or signature in (self._signatures.get(disease), self._rejected.get(disease)):
+            return False
+        current = self._models.get(disease)
+        try:
+            with timer('model_reload', disease):
+                model = load_model(disease, self.models_dir)
+                # Score a few sample rows before the swap: warms the new model and
+                # rejects one that does not take this disease's features
+                model.predict(sample_inputs(SCHEMAS[disease], 8))
+        except Exception as e:
+            # Keep serving the old model; a source that changes again is retried
+            print(f"Reloading {disease} failed, keeping the current model: {e}", file=sys.stderr)
+            self._rejected[disease] = signature
+            return False
+        self._signatures[disease] = signature
+        version = getattr(model, 'version', None)
+        if current is not None and version is not None and version == getattr(current, 'version', None):
+            return False
+        with self._lock:
+            self._models[disease] = model
+        REGISTRY.inc('model_swaps_total', disease=disease)
+        return True
+
+    def poll(self):
+        """Refresh every model that has been loaded (or tried) so far"""
+        return [disease for disease in list(self._models) if self.refresh(disease)]
+
+    def start(self, interval=DEFAULT_POLL_SECONDS):
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f"Model poll failed: {e}", file=sys.stderr)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name='model-registry', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # A/B candidates
+
+    def set_candidate(self, disease, version, share):
+        """Serve a stored version to roughly `share` (0..1) of the traffic for a disease"""
+        if disease not in self._diseases:
+            raise KeyError(disease)
+        if not 0.0 <= share <= 1.0:
+            raise ValueError(f"Candidate share must be between 0 and 1, got {share}")
+        model = with_baseline(load_stored_version(disease, version, self.store_dir), disease, self.models_dir)
+        apply_threshold(model, load_thresholds(self.models_dir).get(disease), disease)
+        self._candidates[disease] = (model, share)
+        return model
+
+    def clear_candidate(self, disease):
+        self._candidates.pop(disease, None)
+
+    def candidates(self):
+        return {disease: (getattr(model, 'version', None), share)
+                for disease, (model, share) in self._candidates.items()}
+
+    def route(self, disease, key=None):
+        """(model, version tag) for one request; the same key always gets the same side of a split"""
+        candidate = self._candidates.get(disease)
+        if candidate is not None:
+            model, share = candidate
+            if key is None:
+                draw = random.random()
+            else:
+                digest = hashlib.blake2b(f"{disease}:{key}".encode(), digest_size=8).digest()
+                draw = int.from_bytes(digest, 'big') / 2.0 ** 64
+            if draw < share:
+                return model, f"{model.version}{CANDIDATE_TAG}"
+        model = self[disease]
+        return model, getattr(model, 'version', None)
+
+    def status(self):
+        """Loaded version and candidate of each disease, for display"""
+        return {disease: {'version': getattr(self._models.get(disease), 'version', None),
+                          'candidate': self.candidates().get(disease)}
+                for disease in self._diseases}
+
+
+def parse_candidates(text):
+    """{disease: (version, share)} from "thyroid=1f2e3d4c5b6a@0.1,diabetes=...\""""
+    candidates = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        disease, _, spec = item.partition('=')
+        version, _, share = spec.partition('@')
+        candidates[disease.strip()] = (version.strip(), float(share) if share else 0.5)
+    return candidates
+
+
+def from_env(models_dir=MODELS_DIR, on_error=None):
+    """Registry polling every $MODEL_POLL_SECONDS (0 disables) with the candidates in $MODEL_CANDIDATES"""
+    poll_seconds = float(os.environ.get(POLL_SECONDS_ENV, DEFAULT_POLL_SECONDS))
+    registry = ModelRegistry(models_dir, on_error, poll_seconds)
+    for disease, (version, share) in parse_candidates(os.environ.get(CANDIDATES_ENV, '')).items():
+        try:
+            registry.set_candidate(disease, version, share)
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(disease, e)
+    return registry
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show which model versions the registry would serve")
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--watch', type=float, help="Keep polling every N seconds and report swaps")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.models_dir, on_error=lambda d, e: print(f"{d}: {e}", file=sys.stderr),
+                             poll_seconds=0)
+    registry.items()
+    for disease, status in registry.status().items():
+        print(f"{disease}: {status['version']}" + (f" (candidate {status['candidate'][0]} "
+                                                   f"at {status['candidate'][1]:.0%})" if status['candidate'] else ""))
+    while args.watch:
+        time.sleep(args.watch)
+        for disease in registry.poll():
+            print(f"{disease}: swapped in {registry.status()[disease]['version']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,360 @@
+"""Pickle-free model store with lazy, memory-mapped loading.
+
+Fitted LogisticRegression/SVC models are exported once to plain ``.npy``
+arrays (coefficients, intercept, support vectors) plus a JSON manifest:
+
+    Models/store/manifest.json
+    Models/store/<disease>/<version>/coef.npy, intercept.npy, ...
+
+Loading a model is then a manifest lookup and a few ``np.load(mmap_mode='r')``
+calls feeding the NumPy kernels in inference.py. No code is executed, and
+every process on the host shares the same page-cache copy of the parameters.
+
+A promoted version can get reduced-precision variants (float32, or int8
+support vectors; see inference.reduce_precision). A variant is only written
+if its accuracy on the notebook's held-out split stays within the tolerance
+of the full-precision model, and is listed under the entry's 'variants'.
+Exports also record the training split's feature means as the model's
+baseline for explanations (see explain.py) when the notebook's CSV is in
+--data-dir.
+$MODEL_PRECISION picks what each disease is served from, e.g.
+"float32" or "parkinsons=int8,diabetes=float32"; a disease without that
+variant keeps its float64 version.
+
+    python model_store.py export            # convert Models/*.sav into the store
+    python model_store.py show
+    python model_store.py check --data-dir data   # re-score the notebooks' test splits
+    python model_store.py variant --precision float32 --tolerance 0.01
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+from inference import PRECISIONS, extract_params, from_params, params_version, reduce_precision
+
+STORE_DIR = os.path.join('Models', 'store')
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+PRECISION_ENV = 'MODEL_PRECISION'
+
+
+def read_manifest(store_dir=STORE_DIR):
+    """The store manifest, or an empty one if nothing has been exported yet"""
+    try:
+        with open(os.path.join(store_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'format': FORMAT_VERSION, 'models': {}}
+
+
+def _write_manifest(manifest, store_dir):
+    path = os.path.join(store_dir, MANIFEST)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def export_model(disease, model, store_dir=STORE_DIR, scaler=None, promote=True, **extra_meta):
+    """Write a fitted model's parameters to the store and point the manifest at them
+
+    A fitted StandardScaler (or a sklearn Pipeline of scaler + model) is folded
+    into the exported parameters, so the stored model takes raw inputs. With
+    promote=False the version is written but the manifest is left alone, so
+    it can be served as an A/B candidate (see model_registry.py) first.
+    """
+    meta, arrays = extract_params(model, scaler)
+    meta.update(extra_meta)
+    return export_params(disease, meta, arrays, store_dir, promote)
+
+
+def export_params(disease, meta, arrays, store_dir=STORE_DIR, promote=True):
+    """Write already extracted parameters (see export_model) as a new version"""
+    meta = {key: value for key, value in meta.items() if key not in ('version', 'path', 'arrays', 'variants')}
+    meta['n_features'] = int(arrays['support_vectors' if meta['kind'] == 'svc' else 'coef'].shape[-1])
+    version = params_version(meta, arrays)
+    relpath = os.path.join(disease, version)
+    os.makedirs(os.path.join(store_dir, relpath), exist_ok=True)
+    # Reduced-precision variants keep the dtypes reduce_precision() chose
+    dtype = np.float64 if meta.get('precision', 'float64') == 'float64' else None
+    for key, array in arrays.items():
+        np.save(os.path.join(store_dir, relpath, f"{key}.npy"), np.ascontiguousarray(array, dtype=dtype))
+
+    entry = dict(meta, version=version, path=relpath, arrays=sorted(arrays))
+    with open(os.path.join(store_dir, relpath, 'meta.json'), 'w') as f:
+        json.dump(entry, f, indent=2, sort_keys=True)
+    if promote:
+        manifest = read_manifest(store_dir)
+        manifest['models'][disease] = entry
+        _write_manifest(manifest, store_dir)
+    return entry
+
+
+def _load_entry(disease, entry, store_dir, mmap):
+    path = os.path.join(store_dir, entry['path'])
+    arrays = {key: np.load(os.path.join(path, f"{key}.npy"), mmap_mode='r' if mmap else None)
+              for key in entry['arrays']}
+    model = from_params(entry, arrays)
+    model.disease = disease
+    return model
+
+
+def load_precisions():
+    """{disease: precision} from $MODEL_PRECISION; a bare precision applies to every disease (key '*')"""
+    precisions = {}
+    for item in filter(None, (part.strip() for part in os.environ.get(PRECISION_ENV, '').split(','))):
+        disease, _, precision = item.rpartition('=')
+        if precision not in PRECISIONS:
+            raise ValueError(f"{PRECISION_ENV}: unknown precision {precision!r}; choose from {', '.join(PRECISIONS)}")
+        precisions[disease.strip() or '*'] = precision
+    return precisions
+
+
+def precision_for(disease):
+    """The precision $MODEL_PRECISION asks for a disease, default float64"""
+    precisions = load_precisions()
+    return precisions.get(disease, precisions.get('*', 'float64'))
+
+
+def served_version(entry, precision='float64'):
+    """Version a manifest entry is served from at a precision: the variant's, else the entry's own"""
+    variant = entry.get('variants', {}).get(precision)
+    return variant['version'] if variant else entry['version']
+
+
+def load_stored_model(disease, store_dir=STORE_DIR, mmap=True, manifest=None, precision='float64'):
+    """Rebuild a model from the store, memory-mapping its arrays; None if it was never exported
+
+    With a reduced precision, the promoted version's variant is loaded if one
+    passed the accuracy check, else the full-precision version.
+    """
+    if manifest is None:
+        manifest = read_manifest(store_dir)
+    entry = manifest['models'].get(disease)
+    if entry is None:
+        return None
+    variant = entry.get('variants', {}).get(precision)
+    if variant is not None:
+        return load_stored_version(disease, variant['version'], store_dir, mmap)
+    return _load_entry(disease, entry, store_dir, mmap)
+
+
+def stored_params(disease, store_dir=STORE_DIR):
+    """(meta, arrays) of the version the manifest points at, read into memory"""
+    entry = read_manifest(store_dir)['models'][disease]
+    path = os.path.join(store_dir, entry['path'])
+    return dict(entry), {key: np.load(os.path.join(path, f"{key}.npy")) for key in entry['arrays']}
+
+
+def load_stored_version(disease, version, store_dir=STORE_DIR, mmap=True):
+    """Rebuild one specific exported version, promoted or not"""
+    with open(os.path.join(store_dir, disease, version, 'meta.json')) as f:
+        entry = json.load(f)
+    return _load_entry(disease, entry, store_dir, mmap)
+
+
+def list_versions(disease, store_dir=STORE_DIR):
+    """Versions exported for a disease, oldest first"""
+    root = os.path.join(store_dir, disease)
+    if not os.path.isdir(root):
+        return []
+    versions = [v for v in os.listdir(root) if os.path.exists(os.path.join(root, v, 'meta.json'))]
+    return sorted(versions, key=lambda v: os.path.getmtime(os.path.join(root, v, 'meta.json')))
+
+
+class LazyModels:
+    """Dict-like view of the disease models that loads each one on first access"""
+
+    def __init__(self, loader, diseases, on_error=None):
+        self._loader = loader
+        self._diseases = list(diseases)
+        self._on_error = on_error
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, disease):
+        if disease not in self._diseases:
+            raise KeyError(disease)
+        try:
+            return self._models[disease]
+        except KeyError:
+            pass
+        with self._lock:
+            if disease not in self._models:
+                try:
+                    self._models[disease] = self._loader(disease)
+                except Exception as e:
+                    if self._on_error is None:
+                        raise
+                    self._on_error(disease, e)
+                    self._models[disease] = None
+            return self._models[disease]
+
+    def get(self, disease, default=None):
+        return self[disease] if disease in self._diseases else default
+
+    def __contains__(self, disease):
+        return disease in self._diseases
+
+    def __iter__(self):
+        return iter(self._diseases)
+
+    def __len__(self):
+        return len(self._diseases)
+
+    def keys(self):
+        return list(self._diseases)
+
+    def items(self):
+        return [(disease, self[disease]) for disease in self._diseases]
+
+    def loaded(self):
+        """Diseases whose model has been loaded so far"""
+        return [disease for disease in self._diseases if self._models.get(disease) is not None]
+
+
+def training_mean(disease, data_dir):
+    """Per-feature mean of the notebook's training split"""
+    from datasets import train_test
+
+    X_train = train_test(disease, data_dir)[0]
+    return np.asarray(X_train, dtype=np.float64).mean(axis=0).tolist()
+
+
+def check_consistency(disease, model, data_dir, tolerance=0.0):
+    """Score the notebook's test split and compare with the accuracy the notebook recorded"""
+    from datasets import NOTEBOOKS, train_test
+
+    _, X_test, _, y_test = train_test(disease, data_dir)
+    accuracy = float((model.predict(X_test) == y_test).mean())
+    recorded = NOTEBOOKS[disease]['test_accuracy']
+    return {
+        'disease': disease,
+        'rows': int(len(y_test)),
+        'accuracy': accuracy,
+        'recorded_accuracy': recorded,
+        'ok': recorded is None or abs(accuracy - recorded) <= tolerance + 1e-12,
+    }
+
+
+def _accuracy(model, X, y):
+    return float((model.predict(X) == y).mean())
+
+
+def export_variant(disease, precision, store_dir=STORE_DIR, data_dir='data', tolerance=0.0):
+    """Write a reduced-precision variant of the promoted version if it passes the accuracy guardrail
+
+    Both versions score the notebook's held-out split. The variant is
+    rejected (nothing written) if its accuracy differs from the float64
+    model's by more than tolerance. Returns the comparison, with the variant's
+    version when it was accepted.
+    """
+    from datasets import train_test
+
+    meta, arrays = stored_params(disease, store_dir)
+    reduced_meta, reduced = reduce_precision(meta, arrays, precision)
+    base = from_params(meta, arrays)
+    variant = from_params(reduced_meta, reduced)
+    _, X_test, _, y_test = train_test(disease, data_dir)
+    base_accuracy = _accuracy(base, X_test, y_test)
+    accuracy = _accuracy(variant, X_test, y_test)
+    result = {
+        'disease': disease,
+        'precision': precision,
+        'rows': int(len(y_test)),
+        'base_version': meta['version'],
+        'base_accuracy': base_accuracy,
+        'accuracy': accuracy,
+        'label_agreement': float((variant.predict(X_test) == base.predict(X_test)).mean()),
+        'max_decision_error': float(np.abs(variant.decision_function(X_test) - base.decision_function(X_test)).max()),
+        'base_bytes': int(sum(array.nbytes for array in arrays.values())),
+        'bytes': int(sum(array.nbytes for array in reduced.values())),
+        'version': None,
+        'ok': abs(accuracy - base_accuracy) <= tolerance + 1e-12,
+    }
+    if not result['ok']:
+        return result
+    entry = export_params(disease, reduced_meta, reduced, store_dir, promote=False)
+    result['version'] = entry['version']
+    manifest = read_manifest(store_dir)
+    promoted = manifest['models'].get(disease)
+    # Only attach it if the version it was made from is still the promoted one
+    if promoted is not None and promoted['version'] == meta['version']:
+        promoted.setdefault('variants', {})[precision] = {
+            'version': entry['version'], 'path': entry['path'], 'accuracy': accuracy,
+            'base_accuracy': base_accuracy, 'rows': result['rows']}
+        _write_manifest(manifest, store_dir)
+    return result
+
+
+def main(argv=None):
+    from disease_models import MODEL_FILES, MODELS_DIR, load_model, load_pickled_model
+
+    parser = argparse.ArgumentParser(description="Export pickled models to the array store")
+    parser.add_argument('command', choices=['export', 'show', 'check', 'variant'],
+                        help="check: score each notebook's test split with the loaded model; "
+                             "variant: add a reduced-precision variant that keeps the test accuracy")
+    parser.add_argument('-d', '--disease', action='append', choices=sorted(MODEL_FILES),
+                        help="Disease to export or check (default: all); repeatable")
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--store-dir', default=None, help="Defaults to <models-dir>/store")
+    parser.add_argument('--data-dir', default='data', help="Folder with the notebooks' CSV files")
+    parser.add_argument('--tolerance', type=float, default=0.0, help="Allowed accuracy difference")
+    parser.add_argument('--precision', choices=PRECISIONS[1:], default='float32', help="variant: precision to store")
+    args = parser.parse_args(argv)
+    store_dir = args.store_dir or os.path.join(args.models_dir, 'store')
+
+    if args.command == 'show':
+        print(json.dumps(read_manifest(store_dir), indent=2, sort_keys=True))
+        return 0
+
+    status = 0
+    for disease in args.disease or MODEL_FILES:
+        if args.command == 'check':
+            try:
+                result = check_consistency(disease, load_model(disease, args.models_dir),
+                                           args.data_dir, args.tolerance)
+            except FileNotFoundError as e:
+                print(f"{disease}: skipped ({e})")
+                continue
+            print(f"{disease}: {'OK' if result['ok'] else 'MISMATCH'} accuracy {result['accuracy']:.4f} "
+                  f"(notebook: {result['recorded_accuracy']}) on {result['rows']} test rows")
+            status |= not result['ok']
+            continue
+        if args.command == 'variant':
+            try:
+                result = export_variant(disease, args.precision, store_dir, args.data_dir, args.tolerance)
+            except KeyError:
+                print(f"{disease}: skipped (not in the store; run `python model_store.py export` first)")
+                continue
+            except (FileNotFoundError, ValueError) as e:
+                print(f"{disease}: skipped ({e})")
+                continue
+            print(f"{disease}: {args.precision} {'ACCEPTED' if result['ok'] else 'REJECTED'} accuracy "
+                  f"{result['accuracy']:.4f} vs {result['base_accuracy']:.4f}, labels agree on "
+                  f"{result['label_agreement']:.2%} of {result['rows']} test rows, max decision error "
+                  f"{result['max_decision_error']:.1e}, {result['bytes']} bytes vs {result['base_bytes']}")
+            status |= not result['ok']
+            continue
+        try:
+            baseline = training_mean(disease, args.data_dir)
+        except FileNotFoundError:
+            # Explanations then fall back to the drift reference's means (see disease_models.with_baseline)
+            baseline = None
+        try:
+            extra = {'baseline': baseline} if baseline is not None else {}
+            entry = export_model(disease, load_pickled_model(disease, args.models_dir), store_dir, **extra)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"{disease}: not exported ({e})", file=sys.stderr)
+            status = 1
+            continue
+        print(f"{disease}: {entry['kind']} model ({entry['source']}) -> {os.path.join(store_dir, entry['path'])}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
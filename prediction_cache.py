@@ -0,0 +1,195 @@
+"""Prediction result cache keyed on the model version and the input row.
+
+Clinicians re-submit the same form many times while adjusting one field, and
+every Streamlit rerun would otherwise score the model again. Results are kept
+in a bounded in-process LRU with a TTL. An optional SQLite file lets several
+Streamlit workers on one host share their hits:
+
+    cache = PredictionCache(max_entries=4096, ttl=3600, shared=SQLiteCache('cache.db'))
+    label, probability = cache.predict(schema, model, row)
+
+Keys hold the exact float64 row by default. With quantized=True each value is
+first snapped to its field's input step, so rows that differ only by float
+noise share an entry; the snapped row is then also what gets scored, so a
+cached result always belongs to its key, at the cost of scoring the rounded
+inputs rather than the submitted ones.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+CACHE_DB_ENV = 'PREDICTION_CACHE_DB'
+
+
+def model_version(model):
+    """Content-hash version of a loaded model (NumPy kernels), or None if it has none
+
+    Object ids are reused after garbage collection and mean nothing to other
+    processes sharing the SQLite cache, so a model without a version is never cached.
+    """
+    return getattr(model, 'version', None)
+
+
+def quantize(schema, row):
+    """Snap each value to its field's input step so float noise does not split cache entries"""
+    row = np.asarray(row, dtype=np.float64)
+    return np.round(np.round(row / schema.steps) * schema.steps, 10)
+
+
+def make_key(schema, model, row, quantized=False):
+    """Cache key: disease, model version and the row's float64 bytes; None for an unversioned model"""
+    version = model_version(model)
+    if version is None:
+        return None
+    row = quantize(schema, row) if quantized else np.asarray(row, dtype=np.float64)
+    # -0.0 and 0.0 must hash alike
+    row = row + 0.0
+    return f"{schema.disease}:{version}:{row.tobytes().hex()}"
+
+
+def score_row(model, row):
+    """(label, positive-class probability or None) for one row with any supported model"""
+    if hasattr(model, 'predict_one'):
+        label, probability = model.predict_one(row)
+        return int(label), probability
+    X = np.asarray(row, dtype=np.float64).reshape(1, -1)
+    label = int(model.predict(X)[0])
+    probability = None
+    if hasattr(model, 'predict_proba') and getattr(model, 'probability', True):
+        probability = float(model.predict_proba(X)[0, 1])
+    return label, probability
+
+
+class SQLiteCache:
+    """Prediction results shared through a SQLite file, for several workers on one host"""
+
+    def __init__(self, path, ttl=3600, max_entries=100000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS predictions "
+                         "(key TEXT PRIMARY KEY, label INTEGER, probability REAL, expires REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS predictions_expires ON predictions (expires)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT label, probability FROM predictions WHERE key = ? AND expires > ?",
+            (key, time.time())).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def set(self, key, value):
+        conn = self._connect()
+        conn.execute("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                     (key, value[0], value[1], time.time() + self.ttl))
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            self.prune()
+
+    def prune(self):
+        """Drop expired rows, then the soonest-expiring ones beyond max_entries"""
+        conn = self._connect()
+        conn.execute("DELETE FROM predictions WHERE expires <= ?", (time.time(),))
+        conn.execute("DELETE FROM predictions WHERE key IN (SELECT key FROM predictions "
+                     "ORDER BY expires DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def clear(self):
+        self._connect().execute("DELETE FROM predictions")
+
+
+class PredictionCache:
+    """Bounded LRU + TTL cache of (label, probability) per disease, model version and input row"""
+
+    def __init__(self, max_entries=4096, ttl=3600, quantized=False, shared=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.quantized = quantized
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(['hits', 'shared_hits', 'misses', 'evictions', 'expirations', 'uncached'], 0)
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._counts['hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+                self._counts['expirations'] += 1
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self._store(key, value)
+                with self._lock:
+                    self._counts['shared_hits'] += 1
+                return value
+        with self._lock:
+            self._counts['misses'] += 1
+        return None
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counts['evictions'] += 1
+
+    def set(self, key, value):
+        self._store(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def predict(self, schema, model, row):
+        """Cached (label, probability) for one row; the model is only scored on a miss"""
+        if self.quantized:
+            row = quantize(schema, row)
+        key = make_key(schema, model, row, quantized=False)
+        if key is None:
+            with self._lock:
+                self._counts['uncached'] += 1
+            return score_row(model, row)
+        value = self.get(key)
+        if value is None:
+            value = score_row(model, row)
+            self.set(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts, entries=len(self._entries), max_entries=self.max_entries)
+        lookups = stats['hits'] + stats['shared_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['shared_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+
+def from_env(max_entries=4096, ttl=3600):
+    """Process cache, shared through the SQLite file named by $PREDICTION_CACHE_DB if set"""
+    path = os.environ.get(CACHE_DB_ENV)
+    shared = SQLiteCache(path, ttl=ttl) if path else None
+    return PredictionCache(max_entries=max_entries, ttl=ttl, shared=shared)
@@ -0,0 +1,318 @@
+"""Risk scores, per-disease decision thresholds and threshold sweeps.
+
+Every served model gives a probability of the positive class. Logistic
+regressions have one built in. An SVC fitted without probability=True gets
+Platt-scaled probabilities once it is calibrated on labelled rows: the two
+coefficients are stored with the model in the model store.
+
+A disease's label is "probability >= threshold". Thresholds are read from
+Models/thresholds.json, then $DISEASE_THRESHOLDS ("thyroid=0.3,diabetes=0.4").
+They are applied when a model is loaded (see Kernel.set_threshold). A
+disease without one keeps its model's own decision rule, and so does one whose
+threshold is invalid or whose model gives no probabilities: that is reported
+on stderr instead of taking the model offline.
+
+    python scoring.py calibrate parkinsons --data-dir data
+    python scoring.py sweep thyroid labelled.csv --label-column label -o roc.csv --save f1
+    python scoring.py set-threshold thyroid 0.3
+    python scoring.py rank thyroid patients.csv --keep id -o triage.csv
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from feature_schema import SCHEMAS
+from inference import fit_platt
+
+THRESHOLDS_FILE = 'thresholds.json'
+THRESHOLDS_ENV = 'DISEASE_THRESHOLDS'
+SWEEP_COLUMNS = ('threshold', 'tp', 'fp', 'tn', 'fn', 'tpr', 'fpr', 'precision', 'specificity', 'f1', 'accuracy')
+
+
+def thresholds_path(models_dir):
+    return os.path.join(models_dir, THRESHOLDS_FILE)
+
+
+_warned = set()
+
+
+def _warn_once(message):
+    # Thresholds are re-read on every registry poll; say each problem once per process
+    if message not in _warned:
+        _warned.add(message)
+        print(message, file=sys.stderr)
+
+
+def load_thresholds(models_dir):
+    """{disease: probability threshold} from thresholds.json, overridden by $DISEASE_THRESHOLDS
+
+    Entries for unknown diseases, or with values that are not probabilities
+    strictly between 0 and 1, are reported and left out.
+    """
+    try:
+        with open(thresholds_path(models_dir)) as f:
+            items = [(disease, value, THRESHOLDS_FILE) for disease, value in json.load(f).items()]
+    except FileNotFoundError:
+        items = []
+    for item in filter(None, (part.strip() for part in os.environ.get(THRESHOLDS_ENV, '').split(','))):
+        disease, _, value = item.partition('=')
+        items.append((disease.strip(), value, f"${THRESHOLDS_ENV}"))
+    thresholds = {}
+    for disease, value, source in items:
+        try:
+            threshold = float(value)
+        except (TypeError, ValueError):
+            threshold = None
+        if disease not in SCHEMAS or threshold is None or not 0.0 < threshold < 1.0:
+            _warn_once(f"{source}: ignoring threshold {disease}={value}; expected a known disease "
+                       f"and a probability between 0 and 1")
+            continue
+        thresholds[disease] = threshold
+    return thresholds
+
+
+def apply_threshold(model, threshold, disease=None):
+    """Set a loaded model's threshold; a model that cannot take it keeps its own rule, with a warning"""
+    if threshold is None or not hasattr(model, 'set_threshold'):
+        return model
+    try:
+        model.set_threshold(threshold)
+    except ValueError as e:
+        _warn_once(f"{disease or 'model'}: threshold {threshold} not applied, using the default cut-off ({e})")
+    return model
+
+
+def save_threshold(models_dir, disease, threshold):
+    """Set (or with None, remove) one disease's threshold in thresholds.json"""
+    path = thresholds_path(models_dir)
+    try:
+        with open(path) as f:
+            thresholds = json.load(f)
+    except FileNotFoundError:
+        thresholds = {}
+    if threshold is None:
+        thresholds.pop(disease, None)
+    else:
+        thresholds[disease] = float(threshold)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(thresholds, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def risk_scores(model, X):
+    """Positive-class probability of every row of a 2-D block"""
+    if not hasattr(model, 'predict_proba') or not getattr(model, 'probability', True):
+        raise ValueError(f"{type(model).__name__} gives no probabilities; run `python scoring.py calibrate` first")
+    return model.predict_proba(np.asarray(X, dtype=np.float64))[:, 1]
+
+
+def sweep(y, scores, thresholds=None):
+    """Confusion counts and rates at each threshold ("positive when score >= threshold")
+
+    One sort and two cumulative sums serve every threshold at once. Without
+    thresholds, each distinct score is one, which gives the exact ROC and PR curves.
+    """
+    y = np.asarray(y) == 1
+    scores = np.asarray(scores, dtype=np.float64)
+    order = np.argsort(-scores, kind='mergesort')
+    ranked, hits = scores[order], y[order]
+    tp_cum = np.concatenate([[0], np.cumsum(hits)])
+    fp_cum = np.concatenate([[0], np.cumsum(~hits)])
+    if thresholds is None:
+        # Cut after the last row of each distinct score
+        cuts = np.concatenate([np.flatnonzero(np.diff(ranked)), [len(ranked) - 1]]) + 1
+        thresholds = ranked[cuts - 1]
+    else:
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        # Number of scores >= each threshold, on the descending order
+        cuts = np.searchsorted(-ranked, -thresholds, side='right')
+    tp, fp = tp_cum[cuts], fp_cum[cuts]
+    n_pos, n_neg = tp_cum[-1], fp_cum[-1]
+    fn, tn = n_pos - tp, n_neg - fp
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tpr = tp / n_pos
+        fpr = fp / n_neg
+        return {
+            'threshold': thresholds,
+            'tp': tp, 'fp': fp, 'tn': tn, 'fn': fn,
+            'tpr': tpr,
+            'fpr': fpr,
+            'precision': np.where(tp + fp > 0, tp / np.maximum(tp + fp, 1), 1.0),
+            'specificity': 1.0 - fpr,
+            'f1': 2 * tp / np.maximum(2 * tp + fp + fn, 1),
+            'accuracy': (tp + tn) / len(y),
+        }
+
+
+def summarize_sweep(y, scores):
+    """ROC AUC, average precision and the thresholds that maximize F1 and Youden's J"""
+    curve = sweep(y, scores)
+    fpr = np.concatenate([[0.0], curve['fpr']])
+    tpr = np.concatenate([[0.0], curve['tpr']])
+    recall_steps = np.diff(tpr)
+    return {
+        'rows': int(len(scores)),
+        'positives': int(curve['tp'][-1]),
+        'roc_auc': float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2.0)),
+        'average_precision': float(np.sum(recall_steps * curve['precision'])),
+        'best_f1': _best(curve, curve['f1']),
+        'best_youden': _best(curve, curve['tpr'] - curve['fpr']),
+    }
+
+
+def _best(curve, objective):
+    i = int(np.nanargmax(objective))
+    return {key: float(curve[key][i]) for key in ('threshold', 'tpr', 'fpr', 'precision', 'f1', 'accuracy')}
+
+
+def calibration_meta(model, X, y):
+    """Platt-scaling meta ({'link': 'platt', 'prob_a', 'prob_b'}) fitted on labelled rows"""
+    return fit_platt(model.decision_function(np.asarray(X, dtype=np.float64)), y)
+
+
+def read_labelled(disease, path, label_column):
+    """Valid feature rows and their 0/1 labels from a labelled CSV/Parquet file"""
+    import pandas as pd
+
+    from batch_predict import iter_chunks
+    from validation import validate
+
+    schema = SCHEMAS[disease]
+    blocks, labels, columns = [], [], None
+    for chunk in iter_chunks(path):
+        if label_column not in chunk.columns:
+            raise ValueError(f"Label column {label_column!r} not found in {path}")
+        if columns is None:
+            columns = schema.resolve_columns(chunk.columns)
+        X = schema.pack_frame(chunk, columns)
+        y = pd.to_numeric(chunk[label_column], errors='coerce').to_numpy(dtype=np.float64)
+        keep = validate(disease, X).row_valid & np.isfinite(y)
+        blocks.append(X[keep])
+        labels.append(y[keep].astype(np.int64))
+    return np.concatenate(blocks), np.concatenate(labels)
+
+
+def rank_file(disease, model, input_path, output_path, keep_columns=()):
+    """Score a whole file and write it ordered by risk, highest first (invalid rows last)"""
+    import pandas as pd
+
+    from batch_predict import ResultWriter, iter_chunks, score_block
+    from validation import validate
+
+    schema = SCHEMAS[disease]
+    frames, columns = [], None
+    for chunk in iter_chunks(input_path):
+        if columns is None:
+            columns = schema.resolve_columns(chunk.columns)
+        X = schema.pack_frame(chunk, columns)
+        predictions, probabilities, valid = score_block(model, X, validate(disease, X).row_valid)
+        frame = chunk[list(keep_columns)].copy() if keep_columns else pd.DataFrame(index=chunk.index)
+        frame['probability'] = probabilities
+        frame['prediction'] = pd.Series(predictions, index=chunk.index, dtype='Int64').mask(~valid)
+        frames.append(frame)
+    result = pd.concat(frames, ignore_index=True)
+    risk = result['probability'].to_numpy()
+    order = np.argsort(-np.nan_to_num(risk, nan=-1.0), kind='stable')
+    result = result.iloc[order].reset_index(drop=True)
+    result.insert(0, 'rank', np.arange(1, len(result) + 1))
+    writer = ResultWriter(output_path)
+    try:
+        writer.write(result)
+    finally:
+        writer.close()
+    return int(np.isfinite(risk).sum()), len(result)
+
+
+def main(argv=None):
+    from datasets import DATA_DIR, train_test
+    from disease_models import MODELS_DIR, load_model, load_pickled_model
+    from inference import extract_params
+    from model_store import export_params, read_manifest, stored_params
+
+    parser = argparse.ArgumentParser(description="Calibrate models, tune thresholds and rank patients by risk")
+    parser.add_argument('command', choices=('calibrate', 'sweep', 'set-threshold', 'rank'))
+    parser.add_argument('disease', choices=sorted(SCHEMAS))
+    parser.add_argument('path', nargs='?',
+                        help="sweep: labelled CSV/Parquet (default: the notebook's test split); "
+                             "rank: file to score; set-threshold: a probability, or 'none'")
+    parser.add_argument('--label-column', default='label')
+    parser.add_argument('--steps', type=int, default=0,
+                        help="sweep: evenly spaced thresholds instead of every distinct score")
+    parser.add_argument('--save', choices=('f1', 'youden'), help="sweep: store the best threshold by this measure")
+    parser.add_argument('--keep', action='append', default=[], metavar='COLUMN', help="rank: column to copy")
+    parser.add_argument('-o', '--output', help="sweep: table as CSV; rank: CSV/Parquet results")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    args = parser.parse_args(argv)
+    disease = args.disease
+
+    if args.command == 'set-threshold':
+        threshold = None if args.path in (None, 'none') else float(args.path)
+        if threshold is not None:
+            try:
+                load_model(disease, args.models_dir).set_threshold(threshold)
+            except ValueError as e:
+                print(f"{disease}: {e}", file=sys.stderr)
+                return 1
+        save_threshold(args.models_dir, disease, threshold)
+        print(f"{disease}: threshold {'removed' if threshold is None else threshold} "
+              f"in {thresholds_path(args.models_dir)}")
+        return 0
+
+    if args.command == 'calibrate':
+        # Fit on the training split; the held-out split stays for `sweep`
+        store_dir = os.path.join(args.models_dir, 'store')
+        X_train, _, y_train, _ = train_test(disease, args.data_dir)
+        model = load_model(disease, args.models_dir)
+        if model.probability:
+            print(f"{disease}: {model.meta['source']} already gives probabilities")
+            return 0
+        calibration = calibration_meta(model, X_train, y_train)
+        if disease in read_manifest(store_dir)['models']:
+            meta, arrays = stored_params(disease, store_dir)
+        else:
+            meta, arrays = extract_params(load_pickled_model(disease, args.models_dir))
+        entry = export_params(disease, dict(meta, **calibration), arrays, store_dir)
+        print(f"{disease}: Platt scaling a={calibration['prob_a']:.4f} b={calibration['prob_b']:.4f} "
+              f"on {len(y_train)} rows -> {entry['version']}")
+        return 0
+
+    model = load_model(disease, args.models_dir)
+    if args.command == 'rank':
+        if not args.path or not args.output:
+            parser.error("rank needs an input file and --output")
+        scored, rows = rank_file(disease, model, args.path, args.output, args.keep)
+        print(f"Ranked {scored}/{rows} rows by risk -> {args.output}")
+        return 0
+
+    if args.path:
+        X, y = read_labelled(disease, args.path, args.label_column)
+    else:
+        _, X, _, y = train_test(disease, args.data_dir)
+    scores = risk_scores(model, X)
+    summary = summarize_sweep(y, scores)
+    print(f"{disease}: {summary['rows']} rows ({summary['positives']} positive), "
+          f"ROC AUC {summary['roc_auc']:.4f}, average precision {summary['average_precision']:.4f}")
+    for measure in ('best_f1', 'best_youden'):
+        best = summary[measure]
+        print(f"  {measure}: threshold {best['threshold']:.4f} recall {best['tpr']:.3f} "
+              f"fpr {best['fpr']:.3f} precision {best['precision']:.3f} accuracy {best['accuracy']:.3f}")
+    if args.output:
+        thresholds = np.linspace(0.0, 1.0, args.steps) if args.steps else None
+        table = sweep(y, scores, thresholds)
+        np.savetxt(args.output, np.column_stack([table[c] for c in SWEEP_COLUMNS]), delimiter=',',
+                   header=','.join(SWEEP_COLUMNS), comments='', fmt='%.6g')
+        print(f"Sweep table -> {args.output}")
+    if args.save:
+        threshold = summary[f"best_{args.save}"]['threshold']
+        save_threshold(args.models_dir, disease, threshold)
+        print(f"{disease}: threshold {threshold:.4f} saved to {thresholds_path(args.models_dir)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Full screening: score one patient record against every disease model at once.
+
+A combined record holds the fields shared by several models once, at the top
+level, and the remaining fields per disease:
+
+    {'age': 63, 'sex': 1,
+     'heart_disease': {'cp': 3, 'trestbps': 145, ...},
+     'thyroid': {'tsh': 1.5, ...}}
+
+Shared fields are copied into each model's feature vector. Models whose
+inputs are complete are scored concurrently on a thread pool, so the report
+arrives after the slowest model rather than after the sum of all five.
+Diseases with missing inputs are reported as incomplete, not guessed.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from feature_schema import SCHEMAS
+from prediction_cache import score_row
+from validation import validate
+
+# Patient fields that several models take, mapped to each model's feature
+# name. Shared codes follow the heart and lung forms (sex: 0 = Female, 1 = Male).
+SHARED_FIELDS = {
+    'age': {'diabetes': 'age', 'heart_disease': 'age', 'lung_cancer': 'age', 'thyroid': 'age'},
+    'sex': {'heart_disease': 'sex', 'lung_cancer': 'gender', 'thyroid': 'sex'},
+}
+# Shared codes a model was trained with differently, as {shared value: model value}:
+# the thyroid data codes sex F = 1, M = 0
+SHARED_CODES = {
+    ('sex', 'thyroid'): {0: 1, 1: 0},
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=len(SCHEMAS), thread_name_prefix='screening')
+        return _executor
+
+
+def shared_features(disease):
+    """Names of the features of one disease that come from the shared fields"""
+    return {disease_map[disease] for disease_map in SHARED_FIELDS.values() if disease in disease_map}
+
+
+def split_record(record):
+    """Per-disease {feature name: value} dicts built from a combined record"""
+    inputs = {}
+    for disease in SCHEMAS:
+        values = dict(record.get(disease) or {})
+        for field, disease_map in SHARED_FIELDS.items():
+            if disease in disease_map and field in record and record[field] is not None:
+                codes = SHARED_CODES.get((field, disease), {})
+                # Unknown codes pass through unchanged and fail validation
+                values[disease_map[disease]] = codes.get(record[field], record[field])
+        inputs[disease] = values
+    return inputs
+
+
+def _score(disease, model, row, score):
+    start = time.perf_counter()
+    prediction, probability = score(SCHEMAS[disease], model, row)
+    return {
+        'status': 'ok',
+        'prediction': int(prediction),
+        'probability': None if probability is None else float(probability),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def screen(record, models, diseases=None, score=None):
+    """Score a combined patient record with every model whose inputs it covers
+
+    Returns {'results': {disease: {...}}, 'seconds': wall time}. Each result has
+    a status of 'ok' (with prediction and probability), 'incomplete' (with the
+    missing features), 'invalid' (with the validation errors), 'unavailable'
+    (no model) or 'error'. score(schema, model, row) defaults to scoring the
+    model directly; pass a PredictionCache's predict to go through the cache.
+    """
+    if score is None:
+        score = lambda schema, model, row: score_row(model, row)
+    start = time.perf_counter()
+    inputs = split_record(record)
+    results, futures = {}, {}
+    for disease in diseases or SCHEMAS:
+        schema = SCHEMAS[disease]
+        missing = [f.name for f in schema.features if inputs[disease].get(f.name) is None]
+        if missing:
+            results[disease] = {'status': 'incomplete', 'missing': missing}
+            continue
+        row = schema.pack(inputs[disease])
+        report = validate(disease, row)
+        if not report.ok:
+            results[disease] = {'status': 'invalid', 'errors': report.row_errors()}
+            continue
+        model = models.get(disease)
+        if model is None:
+            results[disease] = {'status': 'unavailable'}
+            continue
+        futures[disease] = (row, _get_executor().submit(_score, disease, model, row, score))
+
+    for disease, (row, future) in futures.items():
+        try:
+            results[disease] = dict(future.result(), inputs=row.tolist())
+        except Exception as e:
+            results[disease] = {'status': 'error', 'error': str(e)}
+    return {'results': {d: results[d] for d in diseases or SCHEMAS}, 'seconds': time.perf_counter() - start}
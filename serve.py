@@ -0,0 +1,170 @@
+"""Pre-forked multi-process serving of the JSON prediction API.
+
+The parent loads every model once, runs warm-up predictions and freezes the
+heap; then it binds one listening socket and forks N workers. Workers share
+the model pages copy-on-write, and the kernel spreads incoming connections
+across them through the shared accept queue. Each worker warms up its own
+batchers before answering ``GET /ready`` with 200; the parent touches
+--ready-file once every worker has reported in, and replaces workers that die.
+Metrics and /stats are per worker: each scrape answers for whichever worker
+accepted the connection.
+
+    python serve.py --workers 4 --port 8000 --ready-file /tmp/ready
+"""
+import argparse
+import gc
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+from api_server import (DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS, load_available_models,
+                        make_server, warm_up)
+from disease_models import MODELS_DIR
+from feature_schema import SCHEMAS
+from inference import sample_inputs
+
+WARMUP_ROWS = 256
+
+
+def warm_models(models, rows=WARMUP_ROWS):
+    """Score sample rows with every model so lazily built state exists before forking"""
+    for disease, model in models.items():
+        X = sample_inputs(SCHEMAS[disease], rows)
+        model.predict(X)
+        if hasattr(model, 'predict_one'):
+            model.predict_one(X[0])
+
+
+def listen(host, port, backlog=1024):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+def run_worker(sock, models, ready_fd, options):
+    """Body of a forked worker: serve on the shared socket until terminated"""
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    server = make_server(models=models, sock=sock, **options)
+    warm_up(server)
+    os.write(ready_fd, b'.')
+    os.close(ready_fd)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+class Supervisor:
+    """Fork, watch and replace the worker processes"""
+
+    def __init__(self, sock, models, workers, options, ready_file=None):
+        self.sock = sock
+        self.models = models
+        self.workers = workers
+        self.options = options
+        self.ready_file = ready_file
+        self.pids = set()
+        self.stopping = False
+        self.ready_read, self.ready_write = os.pipe()
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            os.close(self.ready_read)
+            status = 0
+            try:
+                run_worker(self.sock, self.models, self.ready_write, self.options)
+            except SystemExit as e:
+                status = e.code or 0
+            except BaseException:
+                import traceback
+                traceback.print_exc()
+                status = 1
+            finally:
+                os._exit(status)
+        self.pids.add(pid)
+        return pid
+
+    def wait_ready(self, timeout=120):
+        """Block until every initial worker has finished its warm-up"""
+        deadline = time.monotonic() + timeout
+        reported = 0
+        while reported < self.workers:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self.ready_read], [], [], remaining)[0]:
+                self.stop()
+                raise RuntimeError(f"Only {reported}/{self.workers} workers became ready")
+            reported += len(os.read(self.ready_read, self.workers))
+        if self.ready_file:
+            with open(self.ready_file, 'w') as f:
+                f.write(f"{os.getpid()}\n")
+
+    def stop(self, *_):
+        self.stopping = True
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+        self.wait_ready()
+        print(f"{self.workers} workers ready on http://{self.sock.getsockname()[0]}:{self.sock.getsockname()[1]}")
+        while self.pids:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            self.pids.discard(pid)
+            if not self.stopping:
+                print(f"Worker {pid} exited with status {status}, restarting", file=sys.stderr)
+                time.sleep(0.5)
+                self.spawn()
+        if self.ready_file and os.path.exists(self.ready_file):
+            os.remove(self.ready_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the JSON API from pre-forked worker processes")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--ready-file', help="Created once every worker has warmed up (for health checks)")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, 'fork'):
+        print("Pre-forked serving needs os.fork(); use api_server.py on this platform", file=sys.stderr)
+        return 1
+
+    models = load_available_models(args.models_dir)
+    warm_models(models)
+    # Move everything allocated so far out of the collector's reach, so the
+    # workers' GC passes do not dirty the shared pages
+    gc.collect()
+    gc.freeze()
+
+    sock = listen(args.host, args.port)
+    options = dict(max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms, verbose=args.verbose)
+    Supervisor(sock, models, args.workers, options, args.ready_file).run()
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
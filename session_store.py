@@ -0,0 +1,318 @@
+"""Per-session prediction history kept out of the Streamlit server's memory.
+
+Every browser session gets a handle: its id, a ring buffer of its last few
+results (what the sidebar shows) and when it was last seen. Everything else
+is written to SQLite files sharded by session id (sessions-0.db ...), so
+concurrent sessions write to different files instead of queueing on one
+lock. The shared prediction log (history_store.py) has no notion of sessions.
+
+Handles idle for longer than idle_seconds are dropped from memory. The
+session's entries stay on disk and its ring is reloaded from its shard if it
+comes back. Server memory is therefore bounded by the number of active
+sessions times the ring size, however many sessions the process has served.
+Entries older than the retention period are purged from disk.
+
+    store = SessionStore('sessions', shards=8)
+    handle = store.handle(session_id)
+    handle.record('Diabetes', 1, model_version='1f2e3d4c5b6a')
+    handle.recent(5)                        # newest first, from memory
+    store.entries(session_id, limit=50)     # from the session's shard
+    store.clear(session_id)                 # forget one session, leaving the others alone
+
+    python session_store.py simulate --sessions 500   # RSS as concurrent sessions grow
+"""
+import argparse
+import atexit
+import hashlib
+import itertools
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+SESSION_DIR_ENV = 'SESSION_STORE_DIR'
+SESSION_DIR = 'sessions'
+DEFAULT_SHARDS = 8
+RING_SIZE = 20
+IDLE_SECONDS = 1800.0
+SWEEP_SECONDS = 60.0
+RETENTION_DAYS = 30
+# SQLite page cache per shard connection; the default 2 MB each would grow with the shard count
+CACHE_KB = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    disease TEXT NOT NULL,
+    prediction INTEGER NOT NULL,
+    model_version TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_session ON entries (session, id);
+CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp);
+"""
+
+ENTRY_COLUMNS = ('timestamp', 'disease', 'prediction', 'model_version')
+
+
+class SessionHandle:
+    """What the server keeps in memory for one session: its id and its last few results"""
+    __slots__ = ('session', 'last_seen', '_ring', '_store')
+
+    def __init__(self, store, session, entries):
+        self.session = session
+        self.last_seen = time.monotonic()
+        self._ring = deque(entries, maxlen=store.ring_size)
+        self._store = store
+
+    def record(self, disease, prediction, timestamp=None, model_version=None):
+        """Remember one result: in the ring right away, in the session's shard in the background"""
+        entry = (timestamp or datetime.now().isoformat(), disease, int(prediction), model_version)
+        self._ring.appendleft(entry)
+        self.last_seen = time.monotonic()
+        self._store._queue.put((self.session,) + entry)
+
+    def recent(self, limit=None):
+        """Newest results first, without touching the disk"""
+        return [dict(zip(ENTRY_COLUMNS, entry)) for entry in itertools.islice(self._ring, limit)]
+
+
+class SessionStore:
+    """Session handles in memory, session entries in SQLite shards written by a background thread"""
+
+    def __init__(self, directory=SESSION_DIR, shards=DEFAULT_SHARDS, ring_size=RING_SIZE,
+                 idle_seconds=IDLE_SECONDS, batch_size=256):
+        os.makedirs(directory, exist_ok=True)
+        self.paths = [os.path.join(directory, f"sessions-{i}.db") for i in range(shards)]
+        self.ring_size = ring_size
+        self.idle_seconds = idle_seconds
+        self.batch_size = batch_size
+        self._local = threading.local()
+        self._handles = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._evictions = 0
+        self._queue = queue.Queue()
+        for shard in range(shards):
+            self._connect(shard).executescript(SCHEMA)
+        self._writer = threading.Thread(target=self._write_loop, name='session-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def shard(self, session):
+        """Index of the shard holding a session's entries"""
+        digest = hashlib.blake2b(session.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') % len(self.paths)
+
+    def _connect(self, shard):
+        conns = getattr(self._local, 'conns', None)
+        if conns is None:
+            conns = self._local.conns = {}
+        conn = conns.get(shard)
+        if conn is None:
+            conn = sqlite3.connect(self.paths[shard], timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA cache_size=-{CACHE_KB}")
+            conns[shard] = conn
+        return conn
+
+    # Handles
+
+    def handle(self, session):
+        """The session's handle, reloading its ring from disk if it was evicted"""
+        now = time.monotonic()
+        with self._lock:
+            handle = self._handles.get(session)
+        if handle is None:
+            loaded = SessionHandle(self, session, self._load_ring(session))
+            with self._lock:
+                handle = self._handles.setdefault(session, loaded)
+        handle.last_seen = now
+        if now - self._last_sweep > SWEEP_SECONDS:
+            self.evict_idle(now)
+        return handle
+
+    def _load_ring(self, session):
+        return self._connect(self.shard(session)).execute(
+            f"SELECT {', '.join(ENTRY_COLUMNS)} FROM entries WHERE session = ? ORDER BY id DESC LIMIT ?",
+            (session, self.ring_size)).fetchall()
+
+    def evict_idle(self, now=None):
+        """Drop the handles of sessions idle for longer than idle_seconds; returns how many"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._last_sweep = now
+            idle = [session for session, handle in self._handles.items()
+                    if now - handle.last_seen > self.idle_seconds]
+            for session in idle:
+                del self._handles[session]
+            self._evictions += len(idle)
+        return len(idle)
+
+    # Entries on disk
+
+    def entries(self, session, limit=50, before_id=None):
+        """A session's results older than before_id, newest first"""
+        where, params = ("AND id < ?", [before_id]) if before_id is not None else ("", [])
+        rows = self._connect(self.shard(session)).execute(
+            f"SELECT id, {', '.join(ENTRY_COLUMNS)} FROM entries WHERE session = ? {where} "
+            f"ORDER BY id DESC LIMIT ?", [session] + params + [limit])
+        return [dict(zip(('id',) + ENTRY_COLUMNS, row)) for row in rows]
+
+    def counts(self, session):
+        """Total, positive and negative results of one session"""
+        self.flush()
+        total, positive = self._connect(self.shard(session)).execute(
+            "SELECT COUNT(*), COALESCE(SUM(prediction = 1), 0) FROM entries WHERE session = ?", (session,)).fetchone()
+        return {'total': total, 'positive': positive, 'negative': total - positive}
+
+    def clear(self, session):
+        """Delete one session's results from its shard and its handle; returns how many"""
+        self.flush()
+        with self._lock:
+            handle = self._handles.get(session)
+        if handle is not None:
+            handle._ring.clear()
+        return self._connect(self.shard(session)).execute(
+            "DELETE FROM entries WHERE session = ?", (session,)).rowcount
+
+    def purge(self, retention=timedelta(days=RETENTION_DAYS), now=None):
+        """Delete entries older than the retention period from every shard; returns how many"""
+        self.flush()
+        cutoff = ((now or datetime.now()) - retention).isoformat()
+        return sum(self._connect(shard).execute("DELETE FROM entries WHERE timestamp < ?", (cutoff,)).rowcount
+                   for shard in range(len(self.paths)))
+
+    def stats(self):
+        with self._lock:
+            return {'handles': len(self._handles), 'evictions': self._evictions,
+                    'queued': self._queue.qsize(), 'shards': len(self.paths)}
+
+    # Background writes
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Put the sentinel back so the loop exits after this batch
+                    self._queue.task_done()
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch):
+        by_shard = {}
+        for entry in batch:
+            try:
+                by_shard.setdefault(self.shard(entry[0]), []).append(entry)
+            except Exception as e:
+                print(f"sessions: dropped an entry: {type(e).__name__}: {e}", file=sys.stderr)
+        for shard, entries in by_shard.items():
+            try:
+                self._write_shard(self._connect(shard), entries)
+            except Exception as e:
+                # Any failure drops these entries only: a dead writer would leave record() and flush() hanging
+                print(f"sessions: dropped {len(entries)} entries: {type(e).__name__}: {e}", file=sys.stderr)
+
+    def _write_shard(self, conn, entries):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO entries (session, timestamp, disease, prediction, model_version) "
+                             "VALUES (?, ?, ?, ?, ?)", entries)
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def flush(self):
+        """Block until every recorded entry has been written"""
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+
+def from_env():
+    """Session store in $SESSION_STORE_DIR, or sessions/ in the working directory"""
+    return SessionStore(os.environ.get(SESSION_DIR_ENV, SESSION_DIR))
+
+
+def _rss_mb():
+    # Current resident set size (Linux), else the peak
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(argv=None):
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Simulate many concurrent sessions and report server memory, "
+                                                 "or purge old session entries")
+    parser.add_argument('command', choices=('simulate', 'purge'))
+    parser.add_argument('--dir', default=os.environ.get(SESSION_DIR_ENV, SESSION_DIR))
+    parser.add_argument('--sessions', type=int, default=500)
+    parser.add_argument('--predictions', type=int, default=50, help="Results recorded per session")
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARDS)
+    parser.add_argument('--days', type=int, default=RETENTION_DAYS, help="Purge: keep this many days")
+    args = parser.parse_args(argv)
+
+    if args.command == 'purge':
+        store = SessionStore(args.dir, args.shards)
+        print(f"Purged {store.purge(timedelta(days=args.days))} entries older than {args.days} days")
+        return 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SessionStore(directory, args.shards)
+        base = _rss_mb()
+        start = time.perf_counter()
+        step = max(args.sessions // 5, 1)
+        for i in range(args.sessions):
+            handle = store.handle(f"session-{i}")
+            for j in range(args.predictions):
+                handle.record('Diabetes', j % 2, model_version='simulated')
+            if (i + 1) % step == 0:
+                store.flush()
+                print(f"{i + 1:>6} sessions, {(i + 1) * args.predictions:>8} entries: "
+                      f"RSS +{_rss_mb() - base:.1f} MB, {store.stats()['handles']} handles in memory")
+        store.flush()
+        seconds = time.perf_counter() - start
+        print(f"Recorded {args.sessions * args.predictions} entries in {seconds:.2f}s "
+              f"({args.sessions * args.predictions / seconds:,.0f}/s)")
+        store.idle_seconds = 0
+        print(f"Evicted {store.evict_idle()} idle handles; RSS +{_rss_mb() - base:.1f} MB")
+        handle = store.handle('session-0')
+        print(f"session-0 reloaded with {len(handle.recent())} recent entries, "
+              f"{len(store.entries('session-0', limit=1000))} on disk")
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
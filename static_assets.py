@@ -0,0 +1,118 @@
+"""Locally vendored static assets for the Streamlit apps.
+
+The sidebar icon of app1.py and the page background of app.py live on
+third-party hosts. Fetch them once, at image build time, into static/:
+
+    python static_assets.py fetch
+
+The apps then serve them from there: images passed to st.image are read
+once per process, and CSS refers to Streamlit's static file route
+(app/static/..., enabled in .streamlit/config.toml) so browsers cache them.
+Without a local copy they fall back to the remote URL, so nothing breaks
+offline. Page CSS built from an asset is rendered once per process.
+"""
+import argparse
+import functools
+import os
+import sys
+import urllib.request
+
+# Streamlit serves this folder (next to the app) at app/static/
+ASSETS_DIR = 'static'
+STATIC_ROUTE = 'app/static'
+
+# Asset name -> (remote source, local file name)
+ASSETS = {
+    'health_checkup_icon': ('https://img.icons8.com/fluency/96/000000/health-checkup.png', 'health-checkup.png'),
+    'background': ('https://www.strategyand.pwc.com/m1/en/strategic-foresight/sector-strategies/healthcare/'
+                   'ai-powered-healthcare-solutions/img01-section1.jpg', 'background.jpg'),
+}
+
+
+def asset_path(name, assets_dir=ASSETS_DIR):
+    """Local path of an asset, whether or not it has been fetched"""
+    return os.path.join(assets_dir, ASSETS[name][1])
+
+
+def fetch(name, assets_dir=ASSETS_DIR, timeout=10):
+    """Download one asset into assets_dir (atomically) and return its path"""
+    url, _ = ASSETS[name]
+    path = asset_path(name, assets_dir)
+    os.makedirs(assets_dir, exist_ok=True)
+    request = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        data = response.read()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return path
+
+
+@functools.lru_cache(maxsize=None)
+def image_source(name):
+    """Image bytes from the local copy, or the remote URL if there is none (for st.image)"""
+    try:
+        with open(asset_path(name), 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return ASSETS[name][0]
+
+
+@functools.lru_cache(maxsize=None)
+def static_url(name):
+    """URL of the local copy on Streamlit's static route, or the remote URL if there is none (for CSS)"""
+    if os.path.exists(asset_path(name)):
+        return f"{STATIC_ROUTE}/{ASSETS[name][1]}"
+    return ASSETS[name][0]
+
+
+@functools.lru_cache(maxsize=None)
+def background_css(name='background', overlay=0.7):
+    """Full-page background image with a dark overlay"""
+    return f"""
+<style>
+[data-testid="stAppViewContainer"] {{
+background-image: url({static_url(name)});
+background-size: cover;
+background-position: center;
+background-repeat: no-repeat;
+background-attachment: fixed;
+}}
+
+[data-testid="stAppViewContainer"]::before {{
+content: "";
+position: absolute;
+top: 0;
+left: 0;
+width: 100%;
+height: 100%;
+background-color: rgba(0, 0, 0, {overlay});
+}}
+</style>
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vendor the apps' remote images into a local folder")
+    parser.add_argument('command', choices=('fetch', 'list'))
+    parser.add_argument('names', nargs='*', help="Assets to fetch (default: all)")
+    parser.add_argument('--assets-dir', default=ASSETS_DIR)
+    args = parser.parse_args(argv)
+
+    status = 0
+    for name in args.names or ASSETS:
+        path = asset_path(name, args.assets_dir)
+        if args.command == 'list':
+            print(f"{name}: {path if os.path.exists(path) else 'remote ' + ASSETS[name][0]}")
+            continue
+        try:
+            print(f"{name}: {fetch(name, args.assets_dir)} ({os.path.getsize(path)} bytes)")
+        except OSError as e:
+            print(f"{name}: not fetched, the app will use the remote URL ({e})", file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""Streaming inference over newline-delimited JSON.
+
+Reads one patient record per line from a file or stdin:
+
+    {"id": "p-1", "disease": "thyroid", "features": [44, 0, 0, 4.5, 1, 1.4, 8]}
+    {"id": "p-2", "disease": "diabetes", "glucose": 148, "bmi": 33.6, ...}
+
+Features are given as a list in model order, as a "features" object, or
+inline next to "disease". Records are packed straight into a fixed-size
+buffer per disease, and each full buffer is scored as one block. Results are
+written as JSONL with the input line number and id. Memory is bounded by
+the buffers, and reading blocks while a batch is scored or the consumer
+is slow, so a stream of any size runs in constant memory:
+
+    cat records.jsonl | python stream_predict.py - > results.jsonl
+
+Results come out batch by batch, not in input order; join on "line" or "id".
+With --max-delay-ms a partial batch is scored once its oldest record has
+waited that long, even if no further input arrives: lines are then read on a
+separate thread into a small bounded queue, and the scorer wakes up at the
+next deadline.
+With --explain each result carries a "contributions" object (see explain.py),
+computed for the whole batch at once, if the model has training means to
+explain against.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from queue import Empty, Queue
+
+import numpy as np
+
+from batch_predict import score_block
+from disease_models import MODELS_DIR, load_models
+from explain import contributions, explainable
+from feature_schema import SCHEMAS
+from validation import validate
+
+DEFAULT_BATCH_SIZE = 1024
+META_FIELDS = ('id', 'disease', 'features')
+_EOF = object()
+
+
+class DiseaseBuffer:
+    """Preallocated rows waiting to be scored for one disease"""
+
+    def __init__(self, schema, batch_size):
+        self.schema = schema
+        self.X = np.empty((batch_size, schema.n_features), dtype=np.float64)
+        self.meta = []
+        self.first_at = None
+
+    def add(self, features, line, record_id):
+        """Pack one record's features into the next free row"""
+        row = self.X[len(self.meta)]
+        if isinstance(features, dict):
+            self.schema.pack(features, out=row)
+        else:
+            if len(features) != self.schema.n_features:
+                raise ValueError(f"Expected {self.schema.n_features} features for {self.schema.disease}, "
+                                 f"got {len(features)}")
+            row[:] = [np.nan if value is None else value for value in features]
+        if not self.meta:
+            self.first_at = time.monotonic()
+        self.meta.append((line, record_id))
+
+    def full(self):
+        return len(self.meta) == len(self.X)
+
+
+class StreamScorer:
+    """Route records into per-disease buffers and write each scored batch as JSONL"""
+
+    def __init__(self, models, output, batch_size=DEFAULT_BATCH_SIZE, max_delay_ms=None, explain=False):
+        self.models = models
+        self.output = output
+        self.explain = explain
+        self.batch_size = batch_size
+        self.max_delay = None if max_delay_ms is None else max_delay_ms / 1000.0
+        self.buffers = {}
+        self.counts = {'records': 0, 'scored': 0, 'positive': 0, 'errors': 0}
+        # Why a disease's model could not be loaded, kept for the rest of the run
+        self.unavailable = {}
+
+    def _emit(self, result):
+        self.output.write(json.dumps(result))
+        self.output.write("\n")
+
+    def _error(self, line, record_id, disease, message):
+        self.counts['errors'] += 1
+        self._emit({'line': line, 'id': record_id, 'disease': disease, 'error': message})
+
+    def process_line(self, line_number, text):
+        if not text.strip():
+            return
+        self.counts['records'] += 1
+        record_id = disease = None
+        try:
+            record = json.loads(text)
+            if not isinstance(record, dict):
+                raise ValueError("record must be a JSON object")
+            record_id = record.get('id')
+            disease = record.get('disease')
+            if disease not in SCHEMAS:
+                raise ValueError(f"Unknown disease: {disease}")
+            features = record.get('features')
+            if features is None:
+                features = {key: value for key, value in record.items() if key not in META_FIELDS}
+            buffer = self.buffers.get(disease)
+            if buffer is None:
+                buffer = self.buffers[disease] = DiseaseBuffer(SCHEMAS[disease], self.batch_size)
+            buffer.add(features, line_number, record_id)
+        except (ValueError, TypeError) as e:
+            self._error(line_number, record_id, disease, str(e))
+            return
+        if buffer.full():
+            self.flush(disease)
+        elif self.max_delay is not None:
+            self.flush_stale()
+
+    def flush_stale(self):
+        """Score partial batches whose oldest record has waited longer than max_delay"""
+        now = time.monotonic()
+        for disease, buffer in self.buffers.items():
+            if buffer.meta and now - buffer.first_at >= self.max_delay:
+                self.flush(disease)
+
+    def flush(self, disease):
+        buffer = self.buffers[disease]
+        n = len(buffer.meta)
+        if not n:
+            return
+        X = buffer.X[:n]
+        report = validate(disease, X)
+        model = self._model(disease)
+        if model is None:
+            for line, record_id in buffer.meta:
+                self._error(line, record_id, disease, self.unavailable[disease])
+        else:
+            predictions, probabilities, valid = score_block(model, X, report.row_valid)
+            contrib = None
+            if self.explain and explainable(model):
+                contrib = contributions(model, X)[0]
+            for i, (line, record_id) in enumerate(buffer.meta):
+                if not valid[i]:
+                    self._error(line, record_id, disease, "; ".join(report.row_errors(i)))
+                    continue
+                probability = probabilities[i]
+                result = {'line': line, 'id': record_id, 'disease': disease,
+                          'prediction': int(predictions[i]),
+                          'probability': None if np.isnan(probability) else float(probability)}
+                if contrib is not None:
+                    result['contributions'] = dict(zip(buffer.schema.names, contrib[i].round(6).tolist()))
+                self._emit(result)
+            self.counts['scored'] += int(valid.sum())
+            self.counts['positive'] += int((predictions[valid] == 1).sum())
+        buffer.meta.clear()
+        self.output.flush()
+
+    def _model(self, disease):
+        # A failed load is tried once per run, not again on every flush
+        if disease in self.unavailable:
+            return None
+        try:
+            model = self.models[disease]
+        except Exception as e:
+            model, message = None, f"Model for {disease} is not available: {e}"
+        else:
+            message = f"Model for {disease} is not available"
+        if model is None:
+            self.unavailable[disease] = message
+            print(message, file=sys.stderr)
+        return model
+
+    def close(self):
+        for disease in list(self.buffers):
+            self.flush(disease)
+
+    def _next_deadline(self):
+        # Seconds until the oldest waiting record is due, or None with nothing buffered
+        pending = [buffer.first_at for buffer in self.buffers.values() if buffer.meta]
+        if not pending:
+            return None
+        return max(0.0, min(pending) + self.max_delay - time.monotonic())
+
+    def _read_with_deadlines(self, lines):
+        # Only reading happens on the other thread, so a stalled input cannot hold back a due batch
+        queue = Queue(maxsize=self.batch_size)
+
+        def read():
+            try:
+                for item in enumerate(lines, start=1):
+                    queue.put(item)
+            except Exception as e:
+                queue.put(e)
+            queue.put(_EOF)
+
+        threading.Thread(target=read, name='stream-reader', daemon=True).start()
+        while True:
+            try:
+                item = queue.get(timeout=self._next_deadline())
+            except Empty:
+                self.flush_stale()
+                continue
+            if item is _EOF:
+                return
+            if isinstance(item, Exception):
+                raise item
+            self.process_line(*item)
+
+    def run(self, lines):
+        if self.max_delay is None:
+            for line_number, text in enumerate(lines, start=1):
+                self.process_line(line_number, text)
+        else:
+            self._read_with_deadlines(lines)
+        self.close()
+        return self.counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score newline-delimited JSON patient records")
+    parser.add_argument('input', nargs='?', default='-', help="JSONL file, or - for stdin (default)")
+    parser.add_argument('-o', '--output', default='-', help="JSONL file for results, or - for stdout (default)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Rows scored per block")
+    parser.add_argument('--max-delay-ms', type=float,
+                        help="Score a partial batch once its oldest record has waited this long")
+    parser.add_argument('--explain', action='store_true', help="Add per-feature contributions to each result")
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        scorer = StreamScorer(load_models(args.models_dir), output, args.batch_size, args.max_delay_ms,
+                              explain=args.explain)
+        counts = scorer.run(source)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f"Scored {counts['scored']}/{counts['records']} records "
+          f"({counts['positive']} positive, {counts['errors']} errors)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
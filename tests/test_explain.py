@@ -0,0 +1,39 @@
+"""Explanations are measured from the training means, not from a zero input"""
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+
+from disease_models import load_model
+from drift import REFERENCE_ENV, Reference, reference_path, save_references
+from explain import contributions, explainable
+
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv(REFERENCE_ENV, raising=False)
+    X, y = make_classification(n_samples=200, n_features=8, random_state=0)
+    X = X * 10.0 + 100.0
+    with open(tmp_path / 'diabetes_model.sav', 'wb') as f:
+        pickle.dump(LogisticRegression(max_iter=5000).fit(X, y), f)
+    return tmp_path, X
+
+
+def test_unscaled_model_uses_the_drift_reference_means(models_dir):
+    path, X = models_dir
+    save_references(reference_path(str(path)), {'diabetes': Reference.build('diabetes', X)})
+    model = load_model('diabetes', str(path))
+    np.testing.assert_allclose(model.baseline, X.mean(axis=0))
+    contrib, base_value = contributions(model, X[:20])
+    np.testing.assert_allclose(base_value, model.decision_function(X.mean(axis=0)[None, :])[0])
+    np.testing.assert_allclose(contrib.sum(axis=1) + base_value, model.decision_function(X[:20]), atol=1e-9)
+
+
+def test_model_without_training_means_is_not_explained(models_dir):
+    path, X = models_dir
+    model = load_model('diabetes', str(path))
+    assert not explainable(model)
+    with pytest.raises(ValueError, match='training means'):
+        contributions(model, X[:5])
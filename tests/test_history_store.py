@@ -0,0 +1,52 @@
+"""Background writes and rollup windows of the prediction history"""
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from history_store import HistoryStore
+
+
+def _flush(store, timeout=5):
+    # flush() blocks for good if the writer thread has died
+    flusher = threading.Thread(target=store.flush, daemon=True)
+    flusher.start()
+    flusher.join(timeout)
+    assert not flusher.is_alive(), "flush() hung: the writer thread is gone"
+
+
+def test_writer_survives_a_bad_item(tmp_path, capsys):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    try:
+        # Not an ISO string: building the rollup buckets raises TypeError
+        store.append('Diabetes', [1, 2], 1, timestamp=12345)
+        _flush(store)
+        store.append('Diabetes', [1, 2], 1, timestamp='2026-10-17T10:00:00')
+        _flush(store)
+        assert store.counts()['total'] == 1
+        assert 'dropped 1 predictions: TypeError' in capsys.readouterr().err
+    finally:
+        store.close()
+
+
+def test_positive_rate_covers_whole_buckets(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    try:
+        # One positive on 2026-10-10, eight days before now: outside a 7-day window
+        store.append('Diabetes', [1], 1, timestamp='2026-10-10T23:00:00')
+        for day in range(11, 18):
+            store.append('Diabetes', [1], 0, timestamp=f"2026-10-{day}T09:00:00")
+        store.append('Diabetes', [1], 1, timestamp='2026-10-17T11:30:00')
+        # After now, so not part of its window either
+        store.append('Diabetes', [1], 1, timestamp='2026-10-18T01:00:00')
+        store.flush()
+        now = datetime(2026, 10, 17, 12, 0)
+        assert store.positive_rate(now=now) == 1 / 8
+        assert store.positive_rate(timedelta(days=1), now=now) == 1 / 2
+        # Three hour buckets: 10:00, 11:00 and 12:00
+        assert store.positive_rate(timedelta(hours=3), period='hour', now=now) == 1.0
+        assert store.positive_rate(timedelta(hours=1), period='hour', now=now) == 0.0
+        with pytest.raises(ValueError):
+            store.positive_rate(period='all', now=now)
+    finally:
+        store.close()
@@ -0,0 +1,118 @@
+"""Parity of the NumPy kernels with the sklearn models they are compiled from"""
+import warnings
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from inference import LinearKernel, SVCKernel, compile_model
+
+ATOL = 1e-9
+
+
+@pytest.fixture(scope='module')
+def data():
+    X, y = make_classification(n_samples=300, n_features=6, n_informative=4, random_state=0)
+    # Features far from zero and on different scales, like the clinical inputs
+    X = X * np.array([1.0, 10.0, 50.0, 0.1, 3.0, 200.0]) + np.array([0.0, 100.0, -40.0, 5.0, 0.0, 1000.0])
+    return X[:200], y[:200], X[200:]
+
+
+def _svc(kernel, probability):
+    with warnings.catch_warnings():
+        # sklearn >= 1.9 deprecates probability=True; the kernels still support it
+        warnings.simplefilter('ignore', FutureWarning)
+        return SVC(kernel=kernel, probability=probability, random_state=0)
+
+
+MODELS = {
+    'logistic': lambda: LogisticRegression(max_iter=5000),
+    'svc-linear': lambda: _svc('linear', False),
+    'svc-linear-proba': lambda: _svc('linear', True),
+    'svc-rbf': lambda: _svc('rbf', False),
+    'svc-rbf-proba': lambda: _svc('rbf', True),
+    'svc-poly': lambda: _svc('poly', False),
+    'svc-poly-proba': lambda: _svc('poly', True),
+    'svc-sigmoid': lambda: _svc('sigmoid', False),
+}
+
+
+def _fit(model, X, y):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return model.fit(X, y)
+
+
+def assert_parity(model, kernel, X):
+    np.testing.assert_array_equal(kernel.predict(X), model.predict(X))
+    np.testing.assert_allclose(kernel.decision_function(X), model.decision_function(X), rtol=0, atol=ATOL)
+    if kernel.probability:
+        np.testing.assert_allclose(kernel.predict_proba(X), model.predict_proba(X), rtol=0, atol=ATOL)
+    else:
+        assert not hasattr(model, 'probability') or not model.probability
+    for row, label in zip(X, model.predict(X)):
+        predicted, probability = kernel.predict_one(row)
+        assert predicted == label
+        if kernel.probability:
+            assert probability == pytest.approx(model.predict_proba(row[None, :])[0, 1], abs=ATOL)
+        else:
+            assert probability is None
+
+
+@pytest.mark.parametrize('name', sorted(MODELS))
+def test_estimator_parity(name, data):
+    X_train, y_train, X_test = data
+    scaled = StandardScaler().fit_transform(X_train)
+    model = _fit(MODELS[name](), scaled, y_train)
+    kernel = compile_model(model)
+    assert isinstance(kernel, LinearKernel if name == 'logistic' or 'linear' in name else SVCKernel)
+    assert_parity(model, kernel, StandardScaler().fit(X_train).transform(X_test))
+
+
+@pytest.mark.parametrize('name', sorted(MODELS))
+def test_pipeline_parity(name, data):
+    # The scaler is folded into the parameters, so the kernel scores raw inputs
+    X_train, y_train, X_test = data
+    pipeline = _fit(make_pipeline(StandardScaler(), MODELS[name]()), X_train, y_train)
+    kernel = compile_model(pipeline)
+    assert kernel is not pipeline
+    assert kernel.meta['preprocessing'] == ['standard_scaler']
+    np.testing.assert_allclose(kernel.baseline, pipeline[0].mean_)
+    assert_parity(pipeline, kernel, X_test)
+
+
+def test_unsupported_model_is_returned_unchanged(data):
+    from sklearn.tree import DecisionTreeClassifier
+
+    X_train, y_train, _ = data
+    model = DecisionTreeClassifier(random_state=0).fit(X_train, y_train)
+    assert compile_model(model) is model
+
+
+def test_threshold_moves_the_cutoff(data):
+    X_train, y_train, X_test = data
+    model = _fit(LogisticRegression(max_iter=5000), X_train, y_train)
+    kernel = compile_model(model).set_threshold(0.8)
+    np.testing.assert_array_equal(kernel.predict(X_test), (model.predict_proba(X_test)[:, 1] >= 0.8).astype(int))
+    assert kernel.version.endswith('+t0.8')
+
+
+@pytest.mark.parametrize('name', sorted(name for name in MODELS if name == 'logistic' or name.endswith('-proba')))
+def test_threshold_labels_match_the_probabilities(name, data):
+    X_train, y_train, X_test = data
+    scaler = StandardScaler().fit(X_train)
+    model = _fit(MODELS[name](), scaler.transform(X_train), y_train)
+    X = scaler.transform(X_test)
+    proba = model.predict_proba(X)[:, 1]
+    ordered = np.unique(proba)
+    # Thresholds between each pair of neighbouring probabilities, where a misplaced cut-off shows
+    for i, threshold in enumerate((ordered[1:] + ordered[:-1]) / 2):
+        kernel = compile_model(model).set_threshold(threshold)
+        expected = (proba >= threshold).astype(int)
+        np.testing.assert_array_equal(kernel.predict(X), expected)
+        if i % 10 == 0:
+            np.testing.assert_array_equal([kernel.predict_one(row)[0] for row in X], expected)
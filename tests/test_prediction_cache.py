@@ -0,0 +1,128 @@
+"""Counts, expiry, bounds and invalidation of the prediction cache"""
+import numpy as np
+import pytest
+
+import prediction_cache
+from feature_schema import SCHEMAS
+from prediction_cache import PredictionCache, SQLiteCache, quantize
+
+SCHEMA = SCHEMAS['diabetes']
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+class CountingModel:
+    """Positive when the first input is above 100; records every row it scores"""
+
+    def __init__(self, version='v1'):
+        self.version = version
+        self.rows = []
+
+    def predict_one(self, row):
+        self.rows.append(np.array(row))
+        return int(row[0] > 100), float(row[0]) / 1000
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache, 'time', clock)
+    return clock
+
+
+def _row(first):
+    return np.array([first, 120, 70, 20, 80, 32.0, 0.5, 33])
+
+
+def test_hits_and_misses(clock):
+    cache, model = PredictionCache(), CountingModel()
+    assert cache.predict(SCHEMA, model, _row(1)) == cache.predict(SCHEMA, model, _row(1))
+    cache.predict(SCHEMA, model, _row(2))
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 2)
+    assert len(model.rows) == 2 and stats['hit_rate'] == pytest.approx(1 / 3)
+
+
+def test_lru_bound_evicts_least_recently_used(clock):
+    cache, model = PredictionCache(max_entries=2), CountingModel()
+    cache.predict(SCHEMA, model, _row(1))
+    cache.predict(SCHEMA, model, _row(2))
+    cache.predict(SCHEMA, model, _row(1))
+    cache.predict(SCHEMA, model, _row(3))
+    assert cache.stats()['evictions'] == 1 and cache.stats()['entries'] == 2
+    cache.predict(SCHEMA, model, _row(1))
+    cache.predict(SCHEMA, model, _row(2))
+    assert cache.stats()['hits'] == 2 and len(model.rows) == 4
+
+
+def test_ttl_expiry(clock):
+    cache, model = PredictionCache(ttl=60), CountingModel()
+    cache.predict(SCHEMA, model, _row(1))
+    clock.now += 59
+    cache.predict(SCHEMA, model, _row(1))
+    clock.now += 2
+    cache.predict(SCHEMA, model, _row(1))
+    stats = cache.stats()
+    assert (stats['hits'], stats['expirations'], stats['misses']) == (1, 1, 2)
+
+
+def test_new_model_version_misses(clock):
+    cache = PredictionCache()
+    cache.predict(SCHEMA, CountingModel('v1'), _row(1))
+    model = CountingModel('v2')
+    cache.predict(SCHEMA, model, _row(1))
+    assert len(model.rows) == 1 and cache.stats()['misses'] == 2
+
+
+def test_unversioned_model_is_not_cached(clock):
+    cache, model = PredictionCache(), CountingModel(None)
+    cache.predict(SCHEMA, model, _row(1))
+    cache.predict(SCHEMA, model, _row(1))
+    assert len(model.rows) == 2 and cache.stats()['uncached'] == 2 and cache.stats()['entries'] == 0
+
+
+def test_exact_rows_by_default(clock):
+    cache, model = PredictionCache(), CountingModel()
+    cache.predict(SCHEMA, model, _row(100.4))
+    assert cache.predict(SCHEMA, model, _row(100.6)) == (1, 0.1006)
+
+
+def test_quantized_cache_scores_the_row_it_keys(clock):
+    cache, model = PredictionCache(quantized=True), CountingModel()
+    first = cache.predict(SCHEMA, model, _row(100.4))
+    assert cache.predict(SCHEMA, model, _row(100.3)) == first
+    assert len(model.rows) == 1
+    np.testing.assert_array_equal(model.rows[0], quantize(SCHEMA, _row(100.4)))
+    assert first == model.predict_one(quantize(SCHEMA, _row(100.3)))
+
+
+def test_shared_backend(clock, tmp_path):
+    path = str(tmp_path / 'cache.db')
+    model = CountingModel()
+    first = PredictionCache(shared=SQLiteCache(path, ttl=60))
+    second = PredictionCache(shared=SQLiteCache(path, ttl=60))
+    value = first.predict(SCHEMA, model, _row(1))
+    assert second.predict(SCHEMA, model, _row(1)) == value
+    assert second.stats()['shared_hits'] == 1 and len(model.rows) == 1
+    clock.now += 61
+    third = PredictionCache(shared=SQLiteCache(path, ttl=60))
+    third.predict(SCHEMA, model, _row(1))
+    assert third.stats()['misses'] == 1 and len(model.rows) == 2
+
+
+def test_shared_backend_prune_bounds_rows(clock, tmp_path):
+    shared = SQLiteCache(str(tmp_path / 'cache.db'), ttl=60, max_entries=3)
+    for i in range(5):
+        clock.now += 1
+        shared.set(f"k{i}", (0, 0.5))
+    shared.prune()
+    assert [shared.get(f"k{i}") is not None for i in range(5)] == [False, False, True, True, True]
@@ -0,0 +1,30 @@
+"""Bad threshold configuration is reported, not fatal to model loading"""
+import json
+import pickle
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.svm import SVC
+
+from disease_models import load_model
+from scoring import THRESHOLDS_ENV, load_thresholds
+
+
+def test_invalid_entries_are_skipped(tmp_path, monkeypatch, capsys):
+    (tmp_path / 'thresholds.json').write_text(json.dumps({'diabetes': 0.3, 'heart': 1.5, 'nosuch': 0.5}))
+    monkeypatch.setenv(THRESHOLDS_ENV, 'lung=abc,thyroid=0.7')
+    assert load_thresholds(str(tmp_path)) == {'diabetes': 0.3, 'thyroid': 0.7}
+    err = capsys.readouterr().err
+    assert 'heart=1.5' in err and 'nosuch=0.5' in err and 'lung=abc' in err
+
+
+def test_threshold_on_uncalibrated_model_keeps_default_rule(tmp_path, monkeypatch, capsys):
+    X, y = make_classification(n_samples=100, n_features=22, random_state=0)
+    svc = SVC(kernel='linear').fit(X, y)
+    with open(tmp_path / 'parkinsons_model.sav', 'wb') as f:
+        pickle.dump(svc, f)
+    monkeypatch.setenv(THRESHOLDS_ENV, 'parkinsons=0.8')
+    model = load_model('parkinsons', str(tmp_path))
+    assert model.threshold is None
+    np.testing.assert_array_equal(model.predict(X), svc.predict(X))
+    assert 'parkinsons: threshold 0.8 not applied' in capsys.readouterr().err
@@ -0,0 +1,42 @@
+"""Screening fields reach each model in the encoding it was trained with"""
+import numpy as np
+
+from feature_schema import SCHEMAS
+from screening import split_record
+from validation import validate
+
+
+def test_sex_is_recoded_for_the_thyroid_model():
+    # Shared codes: 0 = Female, 1 = Male; the thyroid data codes F = 1, M = 0
+    for shared, thyroid in ((0, 1), (1, 0)):
+        inputs = split_record({'age': 40, 'sex': shared})
+        assert inputs['heart_disease']['sex'] == shared
+        assert inputs['lung_cancer']['gender'] == shared
+        assert inputs['thyroid']['sex'] == thyroid
+        assert inputs['diabetes']['age'] == 40
+
+
+def test_invalid_shared_code_is_passed_through():
+    assert split_record({'sex': 7})['thyroid']['sex'] == 7
+
+
+def test_lung_symptoms_use_the_survey_codes():
+    # The lung data codes symptoms 1 = No, 2 = Yes; 0 is a code the model never saw
+    schema = SCHEMAS['lung_cancer']
+    symptoms = [f for f in schema.features if f.widget == 'select' and f.name != 'gender']
+    assert len(symptoms) == 13
+    for feature in symptoms:
+        assert list(feature.codes) == [1, 2]
+        assert feature.option_label(1) == 'No' and feature.option_label(2) == 'Yes'
+    row = {f.name: 2 for f in symptoms}
+    row.update(gender=1, age=60)
+    inputs = split_record({'age': 60, 'sex': 1, 'lung_cancer': row})['lung_cancer']
+    assert not validate('lung_cancer', schema.pack(inputs)).violations.any()
+    inputs['smoking'] = 0
+    report = validate('lung_cancer', schema.pack(inputs))
+    assert report.row_errors() == ['Smoking History must be one of 1, 2']
+
+
+def test_zero_based_choices_keep_their_codes():
+    sex = SCHEMAS['heart_disease'].features[1]
+    assert list(sex.codes) == [0, 1] and sex.option_label(np.float64(1)) == 'Male'
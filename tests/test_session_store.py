@@ -0,0 +1,51 @@
+"""Per-session results: one visitor's history and clear never reach another's"""
+import threading
+
+from session_store import SessionStore
+
+
+def test_clear_only_touches_one_session(tmp_path):
+    store = SessionStore(str(tmp_path), shards=2)
+    try:
+        for i in range(6):
+            store.handle('alice').record('Diabetes', i % 2)
+            store.handle('bob').record('Thyroid', 1)
+        assert store.counts('alice') == {'total': 6, 'positive': 3, 'negative': 3}
+        assert {entry['disease'] for entry in store.entries('alice')} == {'Diabetes'}
+
+        assert store.clear('alice') == 6
+        assert store.counts('alice')['total'] == 0
+        assert store.handle('alice').recent() == []
+        assert store.counts('bob') == {'total': 6, 'positive': 6, 'negative': 0}
+        assert len(store.handle('bob').recent()) == 6
+    finally:
+        store.close()
+
+
+def test_evicted_session_reloads_its_ring(tmp_path):
+    store = SessionStore(str(tmp_path), shards=2, ring_size=3, idle_seconds=0)
+    try:
+        for i in range(5):
+            store.handle('carol').record('Diabetes', 1, timestamp=f"2026-10-17T10:0{i}:00")
+        store.flush()
+        assert store.evict_idle() == 1
+        recent = store.handle('carol').recent()
+        assert [entry['timestamp'][-5:-3] for entry in recent] == ['04', '03', '02']
+    finally:
+        store.close()
+
+
+def test_writer_survives_a_bad_item(tmp_path, capsys):
+    store = SessionStore(str(tmp_path), shards=2)
+    try:
+        # No session id to pick a shard with
+        store._queue.put((None, '2026-10-17T10:00:00', 'Diabetes', 1, None))
+        store.handle('dave').record('Diabetes', 1)
+        flusher = threading.Thread(target=store.flush, daemon=True)
+        flusher.start()
+        flusher.join(5)
+        assert not flusher.is_alive(), "flush() hung: the writer thread is gone"
+        assert store.counts('dave')['total'] == 1
+        assert 'sessions: dropped an entry' in capsys.readouterr().err
+    finally:
+        store.close()
@@ -0,0 +1,73 @@
+"""Batching, deadlines and model failures of the stream scorer"""
+import io
+import json
+import time
+
+import numpy as np
+import pytest
+
+from stream_predict import StreamScorer
+
+
+class FailingModels:
+    def __init__(self):
+        self.loads = 0
+
+    def __getitem__(self, disease):
+        self.loads += 1
+        raise OSError("corrupt model file")
+
+
+class ConstantModel:
+    def predict(self, X):
+        return np.ones(len(X), dtype=np.int64)
+
+
+def _lines(n, disease='diabetes'):
+    return [json.dumps({'id': i, 'disease': disease, 'features': [1, 100, 70, 20, 80, 30.0, 0.5, 40]})
+            for i in range(n)]
+
+
+def test_failed_load_is_remembered_for_the_run():
+    models = FailingModels()
+    output = io.StringIO()
+    counts = StreamScorer(models, output, batch_size=2).run(_lines(7))
+    assert models.loads == 1
+    assert counts['errors'] == 7
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert all('corrupt model file' in result['error'] for result in results)
+
+
+def test_records_are_scored_in_batches():
+    output = io.StringIO()
+    counts = StreamScorer({'diabetes': ConstantModel()}, output, batch_size=3).run(_lines(7))
+    assert counts == {'records': 7, 'scored': 7, 'positive': 7, 'errors': 0}
+    assert sorted(json.loads(line)['line'] for line in output.getvalue().splitlines()) == list(range(1, 8))
+
+
+def test_partial_batch_is_flushed_while_input_stalls():
+    output = io.StringIO()
+    flushed_while_stalled = []
+
+    def stalled_input():
+        yield from _lines(2)
+        # No more input until the results show up, or give up after 5 s
+        deadline = time.monotonic() + 5
+        while not output.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        flushed_while_stalled.append(len(output.getvalue().splitlines()))
+        yield from _lines(1)
+
+    scorer = StreamScorer({'diabetes': ConstantModel()}, output, batch_size=100, max_delay_ms=50)
+    counts = scorer.run(stalled_input())
+    assert flushed_while_stalled == [2]
+    assert counts['scored'] == 3
+
+
+def test_reader_errors_are_raised():
+    def broken_input():
+        yield from _lines(1)
+        raise OSError("input went away")
+
+    with pytest.raises(OSError, match='input went away'):
+        StreamScorer({'diabetes': ConstantModel()}, io.StringIO(), max_delay_ms=50).run(broken_input())
@@ -0,0 +1,95 @@
+"""Round trips of the binary wire format, and the messages it must refuse"""
+import struct
+
+import numpy as np
+import pytest
+
+from feature_schema import SCHEMAS
+from wire_format import (HEADER, RESPONSE, WireFormatError, decode, decode_response, encode, encode_response,
+                         schema_version)
+
+
+def _with(message, offset, packed):
+    # The message with the header bytes at offset replaced
+    return message[:offset] + packed + message[offset + len(packed):]
+
+
+@pytest.fixture
+def message():
+    return encode('parkinsons', np.arange(44, dtype=np.float64).reshape(2, 22))
+
+
+@pytest.mark.parametrize('disease', sorted(SCHEMAS))
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+@pytest.mark.parametrize('rows', [0, 1, 257])
+def test_request_round_trip(disease, dtype, rows):
+    X = np.random.default_rng(rows).normal(size=(rows, SCHEMAS[disease].n_features)) * 100
+    decoded_disease, decoded = decode(encode(disease, X, dtype))
+    assert decoded_disease == disease
+    assert decoded.dtype == dtype and decoded.shape == X.shape
+    np.testing.assert_array_equal(decoded, X.astype(dtype))
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+def test_response_round_trip(dtype):
+    rng = np.random.default_rng(0)
+    predictions, probabilities = rng.integers(-1, 2, 10), rng.random(10)
+    disease, p, q = decode_response(encode_response('thyroid', predictions, probabilities, dtype))
+    assert disease == 'thyroid'
+    np.testing.assert_array_equal(p, predictions)
+    np.testing.assert_array_equal(q, probabilities.astype(dtype))
+
+
+def test_request_decodes_without_copy(message):
+    _, X = decode(message)
+    assert not X.flags.writeable and not X.flags.owndata
+
+
+def test_unsupported_element_type():
+    with pytest.raises(WireFormatError, match='Unsupported element type'):
+        encode('diabetes', np.zeros((1, 8)), np.int32)
+
+
+MALFORMED = {
+    'short header': (lambda m: m[:HEADER.size - 1], 'shorter than'),
+    'bad magic': (lambda m: _with(m, 0, b'XXXX'), 'Not a version'),
+    'bad version': (lambda m: _with(m, 4, bytes([2])), 'Not a version'),
+    'wrong kind': (lambda m: _with(m, 5, bytes([RESPONSE])), 'Expected a request'),
+    'bad element type': (lambda m: _with(m, 6, bytes([9])), 'Unknown element type'),
+    'unknown disease': (lambda m: _with(m, 7, bytes([99])), 'Unknown disease id'),
+    'wrong columns': (lambda m: _with(m, 16, struct.pack('<H', 21)), 'expected 22 columns'),
+}
+
+
+@pytest.mark.parametrize('name', MALFORMED)
+def test_malformed_header(message, name):
+    corrupt, error = MALFORMED[name]
+    with pytest.raises(WireFormatError, match=error):
+        decode(corrupt(message))
+
+
+def test_wrong_schema(message):
+    assert schema_version('parkinsons') != 0
+    with pytest.raises(WireFormatError, match="feature order differs"):
+        decode(_with(message, 8, struct.pack('<I', 0)))
+
+
+def test_other_disease_schema_is_refused(message):
+    with pytest.raises(WireFormatError, match="feature order differs"):
+        decode(_with(message, 8, struct.pack('<I', schema_version('thyroid'))))
+
+
+@pytest.mark.parametrize('cut', [1, 8, 22 * 8])
+def test_truncated_payload(message, cut):
+    with pytest.raises(WireFormatError, match='should be'):
+        decode(message[:-cut])
+
+
+def test_trailing_bytes(message):
+    with pytest.raises(WireFormatError, match='should be'):
+        decode(message + b'\0')
+
+
+def test_rows_beyond_payload(message):
+    with pytest.raises(WireFormatError, match='should be'):
+        decode(_with(message, 12, struct.pack('<I', 3)))
@@ -0,0 +1,158 @@
+"""Reproducible training of the five disease models, extracted from the notebooks.
+
+Each disease has one entry point that loads and cleans its CSV through
+datasets.py, searches a small hyperparameter grid with cross-validation on
+the notebook's training split, scores the held-out split, and exports the
+best model to the model store as a new content-versioned artifact:
+
+    python train.py all --data-dir data          # retrain everything
+    python train.py thyroid --jobs 4 --no-export # search and report only
+
+Inputs are standardized inside a Pipeline; the scaler is folded into the
+exported parameters, so the app still feeds raw form values. SVCs are
+Platt-calibrated on cross-validated decision values, so every exported
+model gives probabilities (see scoring.py). The grid runs
+on a process pool (joblib, --jobs workers), and seeds are fixed, so the same
+data and settings always give the same model version.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from datasets import DATA_DIR, NOTEBOOKS, train_test
+from disease_models import MODELS_DIR
+from inference import fit_platt
+from model_store import export_model
+from scoring import summarize_sweep
+
+RANDOM_STATE = 2
+CV_FOLDS = 5
+
+
+def _logistic_regression():
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    estimator = Pipeline([('scaler', StandardScaler()), ('model', LogisticRegression(max_iter=5000))])
+    grid = {'model__C': np.logspace(-3, 3, 13).tolist()}
+    return estimator, grid
+
+
+def _svc():
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.svm import SVC
+
+    estimator = Pipeline([('scaler', StandardScaler()), ('model', SVC())])
+    grid = [
+        {'model__kernel': ['linear'], 'model__C': [0.01, 0.1, 1.0, 10.0]},
+        {'model__kernel': ['rbf'], 'model__C': [0.1, 1.0, 10.0, 100.0], 'model__gamma': ['scale', 0.01, 0.1]},
+    ]
+    return estimator, grid
+
+
+# Model family per disease: the one the shipped model uses, plus a grid around it
+ESTIMATORS = {
+    'diabetes': _logistic_regression,
+    'heart_disease': _logistic_regression,
+    'parkinsons': _svc,
+    'lung_cancer': _logistic_regression,
+    'thyroid': _logistic_regression,
+}
+
+
+def _data_digest(*arrays):
+    digest = hashlib.sha256()
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()[:12]
+
+
+def train(disease, data_dir=DATA_DIR, jobs=-1, store_dir=None, promote=True):
+    """Search, fit and (with store_dir) export one disease model; returns a report dict"""
+    from sklearn.model_selection import GridSearchCV, StratifiedKFold, cross_val_predict
+
+    start = time.perf_counter()
+    X_train, X_test, y_train, y_test = train_test(disease, data_dir)
+    estimator, grid = ESTIMATORS[disease]()
+    cv = StratifiedKFold(CV_FOLDS, shuffle=True, random_state=RANDOM_STATE)
+    search = GridSearchCV(estimator, grid, scoring='accuracy', n_jobs=jobs, refit=True, cv=cv)
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', category=UserWarning)
+        search.fit(X_train, y_train)
+        model = search.best_estimator_
+        calibration = {}
+        if not hasattr(model, 'predict_proba'):
+            # Out-of-fold decision values, so the sigmoid is not fitted on memorized rows
+            calibration = fit_platt(cross_val_predict(model, X_train, y_train, cv=cv, n_jobs=jobs,
+                                                      method='decision_function'), y_train)
+    report = {
+        'disease': disease,
+        'estimator': type(model.steps[-1][1]).__name__,
+        'params': {key.split('__', 1)[-1]: value for key, value in search.best_params_.items()},
+        'cv_accuracy': float(search.best_score_),
+        'test_accuracy': float((model.predict(X_test) == y_test).mean()),
+        'test_roc_auc': summarize_sweep(y_test, model.decision_function(X_test))['roc_auc'],
+        'calibration': 'platt' if calibration else 'logistic',
+        'notebook_test_accuracy': NOTEBOOKS[disease]['test_accuracy'],
+        'train_rows': int(len(y_train)),
+        'test_rows': int(len(y_test)),
+        'data': _data_digest(X_train, y_train, X_test, y_test),
+        'candidates': len(search.cv_results_['params']),
+    }
+    if store_dir is not None:
+        entry = export_model(disease, model, store_dir, promote=promote, training={
+            key: report[key] for key in ('params', 'cv_accuracy', 'test_accuracy', 'data')}, **calibration)
+        report['version'] = entry['version']
+        report['artifact'] = os.path.join(store_dir, entry['path'])
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retrain the disease models and export them to the model store")
+    parser.add_argument('diseases', nargs='+', choices=sorted(ESTIMATORS) + ['all'])
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Folder with the notebooks' CSV files")
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--store-dir', default=None, help="Defaults to <models-dir>/store")
+    parser.add_argument('--jobs', type=int, default=-1, help="Worker processes for the grid search (-1: all cores)")
+    parser.add_argument('--no-export', action='store_true', help="Report only; leave the model store untouched")
+    parser.add_argument('--candidate', action='store_true',
+                        help="Export without promoting, to serve as an A/B candidate (MODEL_CANDIDATES)")
+    parser.add_argument('--report', help="Write the training reports as JSON to this file")
+    args = parser.parse_args(argv)
+
+    diseases = list(ESTIMATORS) if 'all' in args.diseases else args.diseases
+    store_dir = None if args.no_export else (args.store_dir or os.path.join(args.models_dir, 'store'))
+    reports, status = [], 0
+    start = time.perf_counter()
+    for disease in diseases:
+        try:
+            report = train(disease, args.data_dir, args.jobs, store_dir, promote=not args.candidate)
+        except FileNotFoundError as e:
+            print(f"{disease}: skipped ({e})", file=sys.stderr)
+            status = 1
+            continue
+        reports.append(report)
+        notebook = report['notebook_test_accuracy']
+        print(f"{disease}: {report['estimator']} {report['params']} cv {report['cv_accuracy']:.4f} "
+              f"test {report['test_accuracy']:.4f} auc {report['test_roc_auc']:.4f}"
+              + (f" (notebook {notebook:.4f})" if notebook is not None else "")
+              + (f" -> {report['version']}" if 'version' in report else "")
+              + f" in {report['seconds']:.1f}s")
+    print(f"Trained {len(reports)} models in {time.perf_counter() - start:.1f}s")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(reports, f, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Vectorized input validation shared by the UI, batch and API paths.
+
+Whole (rows, features) arrays are checked against the per-field ranges of the
+feature schema in a handful of NumPy operations. The result is a row-by-field
+violation bitmap plus per-field counts, so a bad row in a large file costs no
+more to find than a good one.
+"""
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+from feature_schema import SCHEMAS
+
+
+@dataclass(frozen=True, eq=False)
+class ValidationReport:
+    """Row-by-field violation bitmap for one block of inputs"""
+    schema: object
+    X: np.ndarray
+    violations: np.ndarray
+
+    @cached_property
+    def row_valid(self):
+        return ~self.violations.any(axis=1)
+
+    @property
+    def n_rows(self):
+        return self.violations.shape[0]
+
+    @cached_property
+    def n_invalid(self):
+        return int(self.n_rows - np.count_nonzero(self.row_valid))
+
+    @property
+    def ok(self):
+        return self.n_invalid == 0
+
+    @cached_property
+    def field_counts(self):
+        """Violations per field as a (4, features) array: total, missing, below_min, above_max"""
+        X, schema = self.X, self.schema
+        with np.errstate(invalid='ignore'):
+            return np.stack([
+                self.violations.sum(axis=0),
+                np.isnan(X).sum(axis=0),
+                (X < schema.lower).sum(axis=0),
+                (X > schema.upper).sum(axis=0),
+            ])
+
+    def summary(self):
+        """Counts of bad rows and of violations per field (fields without violations are left out)"""
+        return summarize(self.schema, self.n_rows, self.n_invalid, self.field_counts)
+
+    def packed(self):
+        """The violation bitmap packed to one bit per field (rows, ceil(features / 8)) uint8"""
+        return np.packbits(self.violations, axis=1)
+
+    def row_errors(self, row=0):
+        """Human readable problems with one row, e.g. for a form error message"""
+        errors = []
+        for i in np.flatnonzero(self.violations[row]):
+            feature, value = self.schema.features[i], self.X[row, i]
+            if np.isnan(value):
+                errors.append(f"{feature.label} is missing")
+            elif feature.widget == 'select':
+                codes = range(int(feature.min), int(self.schema.upper[i]) + 1)
+                errors.append(f"{feature.label} must be one of {', '.join(map(str, codes))}")
+            else:
+                upper = '∞' if np.isinf(self.schema.upper[i]) else f"{self.schema.upper[i]:g}"
+                errors.append(f"{feature.label} must be between {feature.min} and {upper}")
+        return errors
+
+
+def validate(disease, X):
+    """Check every value of a 1-D row or 2-D block against its field's range"""
+    schema = SCHEMAS[disease]
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    if X.shape[1] != schema.n_features:
+        raise ValueError(f"Expected {schema.n_features} features for {disease}, got {X.shape[1]}")
+    with np.errstate(invalid='ignore'):
+        # NaN fails both comparisons, so missing values are flagged here as well
+        violations = ~((X >= schema.lower) & (X <= schema.upper))
+        if schema.categorical_mask.any():
+            # Category codes must also be whole numbers
+            codes = schema.categorical_mask
+            violations[:, codes] |= X[:, codes] % 1 != 0
+    return ValidationReport(schema, X, violations)
+
+
+def summarize(schema, n_rows, n_invalid, field_counts):
+    """Build the JSON-friendly summary for (possibly accumulated) validation counts"""
+    fields = {}
+    for i in np.flatnonzero(field_counts[0]):
+        total, missing, below, above = (int(c) for c in field_counts[:, i])
+        fields[schema.features[i].name] = {
+            'violations': total,
+            'missing': missing,
+            'below_min': below,
+            'above_max': above,
+            'not_a_category': total - missing - below - above,
+        }
+    return {
+        'disease': schema.disease,
+        'rows': int(n_rows),
+        'invalid_rows': int(n_invalid),
+        'fields': fields,
+    }
@@ -0,0 +1,211 @@
+"""Compact binary request/response format for high-volume programmatic scoring.
+
+A message is a fixed 24-byte little-endian header followed by one packed
+row-major matrix:
+
+    offset  size  field
+    0       4     magic b'DPWF'
+    4       1     format version (1)
+    5       1     kind: 0 request (feature rows), 1 response (prediction, probability)
+    6       1     element type: 1 float32, 2 float64
+    7       1     disease id (DISEASE_IDS)
+    8       4     schema version: CRC-32 of the disease's feature names, in model order
+    12      4     rows
+    16      2     columns
+    18      6     reserved, zero
+
+Decoding checks the header and wraps the payload with np.frombuffer, so a
+float64 request reaches the model without a copy. A float32 request halves the
+bytes on the wire and is widened once to the models' float64. Response rows
+are (prediction, probability), where a prediction of -1 marks a row that
+failed validation. The schema version makes a client built against another
+feature order fail loudly instead of being scored on shuffled inputs.
+
+    POST /predict/<disease>   Content-Type: application/x-disease-matrix   (see api_server.py)
+
+    python wire_format.py bench --rows 100000   # throughput against JSON (tests/test_wire_format.py checks decoding)
+"""
+import argparse
+import json
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from feature_schema import SCHEMAS
+
+CONTENT_TYPE = 'application/x-disease-matrix'
+MAGIC = b'DPWF'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBBIIH6x')
+REQUEST = 0
+RESPONSE = 1
+
+# Wire ids are fixed here: never renumber a disease, only append
+DISEASE_IDS = {'diabetes': 1, 'heart_disease': 2, 'parkinsons': 3, 'lung_cancer': 4, 'thyroid': 5}
+DISEASES_BY_ID = {number: disease for disease, number in DISEASE_IDS.items()}
+DTYPES = {1: np.dtype('<f4'), 2: np.dtype('<f8')}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+
+
+class WireFormatError(ValueError):
+    """A message that is not a well-formed matrix for the expected disease and schema"""
+
+
+def schema_version(disease):
+    """CRC-32 of the disease's feature names in model order"""
+    return zlib.crc32(','.join(SCHEMAS[disease].names).encode())
+
+
+def encode(disease, X, dtype=np.float64, kind=REQUEST):
+    """Header plus the packed little-endian rows of a 2-D block"""
+    dtype = np.dtype(dtype).newbyteorder('<')
+    if dtype not in DTYPE_CODES:
+        raise WireFormatError(f"Unsupported element type {dtype}; use float32 or float64")
+    X = np.ascontiguousarray(np.atleast_2d(X), dtype=dtype)
+    rows, columns = X.shape
+    header = HEADER.pack(MAGIC, VERSION, kind, DTYPE_CODES[dtype], DISEASE_IDS[disease],
+                         schema_version(disease), rows, columns)
+    return header + X.tobytes()
+
+
+def decode(buffer, kind=REQUEST):
+    """(disease, read-only (rows, columns) array viewing the buffer) of one message"""
+    if len(buffer) < HEADER.size:
+        raise WireFormatError(f"Message of {len(buffer)} bytes is shorter than the {HEADER.size}-byte header")
+    magic, version, message_kind, dtype_code, disease_id, schema, rows, columns = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise WireFormatError(f"Not a version {VERSION} disease matrix message")
+    if message_kind != kind:
+        raise WireFormatError(f"Expected a {'request' if kind == REQUEST else 'response'} message")
+    disease = DISEASES_BY_ID.get(disease_id)
+    if disease is None:
+        raise WireFormatError(f"Unknown disease id {disease_id}")
+    if schema != schema_version(disease):
+        raise WireFormatError(f"{disease}: the client's feature order differs from the server's schema")
+    expected = 2 if kind == RESPONSE else SCHEMAS[disease].n_features
+    if columns != expected:
+        raise WireFormatError(f"{disease}: expected {expected} columns, got {columns}")
+    dtype = DTYPES.get(dtype_code)
+    if dtype is None:
+        raise WireFormatError(f"Unknown element type {dtype_code}")
+    size = HEADER.size + rows * columns * dtype.itemsize
+    if len(buffer) != size:
+        raise WireFormatError(f"{rows}x{columns} {dtype.name} message should be {size} bytes, got {len(buffer)}")
+    return disease, np.frombuffer(buffer, dtype, rows * columns, HEADER.size).reshape(rows, columns)
+
+
+def encode_response(disease, predictions, probabilities, dtype=np.float64):
+    """Response message: one (prediction, probability) row per request row"""
+    return encode(disease, np.column_stack([predictions, probabilities]), dtype, RESPONSE)
+
+
+def decode_response(buffer):
+    """(disease, int predictions, probabilities) of a response message"""
+    disease, result = decode(buffer, RESPONSE)
+    return disease, result[:, 0].astype(np.int64), result[:, 1]
+
+
+def post(url, disease, X, dtype=np.float64, timeout=30.0):
+    """Score a block on a running api_server.py: POST /predict/<disease>; returns (predictions, probabilities)"""
+    import urllib.request
+
+    request = urllib.request.Request(f"{url.rstrip('/')}/predict/{disease}", data=encode(disease, X, dtype),
+                                     headers={'Content-Type': CONTENT_TYPE})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        _, predictions, probabilities = decode_response(response.read())
+    return predictions, probabilities
+
+
+def _throughput(disease, rows, repeat=3):
+    # Client encode + server decode of the same rows, as JSON requests and as one binary message
+    from inference import sample_inputs
+
+    schema = SCHEMAS[disease]
+    X = sample_inputs(schema, rows)
+    results = {}
+
+    def json_round_trip():
+        bodies = [json.dumps({'features': row}).encode() for row in X.tolist()]
+        block = np.empty((rows, schema.n_features))
+        for i, body in enumerate(bodies):
+            schema.pack(json.loads(body)['features'], out=block[i])
+        return sum(map(len, bodies))
+
+    def json_batch_round_trip():
+        body = json.dumps({'features': X.tolist()}).encode()
+        np.array(json.loads(body)['features'], dtype=np.float64)
+        return len(body)
+
+    def binary_round_trip(dtype):
+        message = encode(disease, X, dtype)
+        decode(message)
+        return len(message)
+
+    for name, fn in (('json per row', json_round_trip), ('json batch', json_batch_round_trip),
+                     ('binary float64', lambda: binary_round_trip(np.float64)),
+                     ('binary float32', lambda: binary_round_trip(np.float32))):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            size = fn()
+            best = min(best, time.perf_counter() - start)
+        results[name] = {'seconds': best, 'rows_per_s': rows / best, 'bytes': size}
+    return results
+
+
+def _http_throughput(disease, rows, json_requests=2000):
+    # JSON requests one row at a time against one binary POST, on an in-process api_server
+    import threading
+    import urllib.request
+
+    from api_server import make_server
+    from disease_models import load_model
+    from inference import sample_inputs
+
+    X = sample_inputs(SCHEMAS[disease], rows)
+    # No batching window: sequential JSON requests would each wait it out
+    server = make_server(port=0, models={disease: load_model(disease)}, max_wait_ms=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        start = time.perf_counter()
+        for row in X[:json_requests].tolist():
+            request = urllib.request.Request(f"{url}/predict/{disease}", data=json.dumps({'features': row}).encode(),
+                                             headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(request) as response:
+                json.loads(response.read())
+        json_rate = json_requests / (time.perf_counter() - start)
+        start = time.perf_counter()
+        post(url, disease, X)
+        binary_rate = rows / (time.perf_counter() - start)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return json_rate, binary_rate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the throughput of the binary wire format with JSON")
+    parser.add_argument('command', choices=('bench',))
+    parser.add_argument('--disease', default='parkinsons', choices=sorted(SCHEMAS))
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--http', action='store_true', help="Also score through a local api_server (needs Models/)")
+    args = parser.parse_args(argv)
+
+    results = _throughput(args.disease, args.rows)
+    baseline = results['json per row']['seconds']
+    for name, result in results.items():
+        print(f"{name:<15} {result['rows_per_s']:>12,.0f} rows/s {result['bytes'] / args.rows:>7.1f} bytes/row "
+              f"{baseline / result['seconds']:>8.1f}x")
+    if args.http:
+        json_rate, binary_rate = _http_throughput(args.disease, args.rows)
+        print(f"HTTP end to end: JSON {json_rate:,.0f} rows/s, binary {binary_rate:,.0f} rows/s "
+              f"({binary_rate / json_rate:.0f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())